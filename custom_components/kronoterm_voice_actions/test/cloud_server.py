@@ -0,0 +1,233 @@
+# src/kronoterm_voice_actions/test/cloud_server.py
+
+"""Local stand-in for cloud.kronoterm.com served over HTTP.
+
+Emulates the login and the jsoncgi.php pages KronotermCloudApi uses, with
+configurable latency, injected errors and session expiry. Used by the tests to
+exercise the client end to end, and runnable as a benchmark of the caching,
+coalescing and retry behaviour without an account:
+
+    python -m kronoterm_voice_actions.test.cloud_server --iterations 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+import secrets
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from kronoterm_voice_actions.wyoming.kronoterm_enums import APIEndpoint
+
+SESSION_COOKIE = "PHPSESSID"
+THEORETICAL_USE_PAGE = "TopPage=4&Subpage=4&Action=4"
+
+# Pages of a heat pump heating on a cold day, as the cloud reports them
+DEFAULT_PAGES: dict[str, dict] = {
+    APIEndpoint.INITIAL.value: {
+        "hp_id": "1234",
+        "user_level": "1",
+        "Location": "Hiša",
+        "CircleNames": "Radiatorji;Konvektorji",
+        "ActiveErrorsCnt": "0",
+    },
+    APIEndpoint.BASIC.value: {
+        "TemperaturesAndConfig": {
+            "outside_temp": "-3.5",
+            "heating_circle_2_temp": "21.5",
+            "reservoir_temp": "34.0",
+            "tap_water_temp": "46.3",
+            "working_function": 0,
+            "main_mode": 0,
+        }
+    },
+    APIEndpoint.SYSTEM_REVIEW.value: {"CurrentFunctionData": [{"dv_temp": "35.6"}]},
+    APIEndpoint.SHORTCUTS.value: {},
+    APIEndpoint.HEATING_LOOP_1.value: {"HeatingCircleData": {"circle_temp": "21.5", "circle_status": 1, "circle_mode": 1}},
+    APIEndpoint.HEATING_LOOP_2.value: {"HeatingCircleData": {"circle_temp": "21.0", "circle_status": 1, "circle_mode": 1}},
+    APIEndpoint.TAP_WATER.value: {"HeatingCircleData": {"circle_temp": "48.0", "circle_status": 1, "circle_mode": 1}},
+    APIEndpoint.ALARMS.value: {"AlarmsData": []},
+}
+
+# Settings page of every loop, as in the page numbers the client posts
+SETTING_PAGES: dict[str, str] = {
+    APIEndpoint.HEATING_LOOP_1_SET.value: APIEndpoint.HEATING_LOOP_1.value,
+    APIEndpoint.HEATING_LOOP_2_SET.value: APIEndpoint.HEATING_LOOP_2.value,
+    APIEndpoint.TAP_WATER_SET.value: APIEndpoint.TAP_WATER.value,
+}
+
+
+class CloudServer:
+    """HTTP server answering like cloud.kronoterm.com for one account."""
+
+    def __init__(
+        self,
+        username: str = "user",
+        password: str = "password",
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        session_lifetime: float | None = None,
+        seed: int | None = None,
+    ):
+        """
+        :param latency: seconds every response is delayed by
+        :param error_rate: share of page requests answered with an internal server error
+        :param session_lifetime: seconds a session stays valid after login, forever by default
+        """
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_lifetime = session_lifetime
+        self.pages = copy.deepcopy(DEFAULT_PAGES)
+        # Page and setting requests by query string, and logins
+        self.requests: Counter[str] = Counter()
+        self.logins = 0
+        self._sessions: dict[str, float] = {}
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/", self._login)
+        self.app.router.add_route("*", "/jsoncgi.php", self._page)
+
+    @property
+    def url(self) -> str:
+        # A host name rather than an IP address, aiohttp only keeps cookies of named hosts
+        return f"http://localhost:{self.port}"
+
+    def expire_sessions(self) -> None:
+        """Forget every session, as the cloud does after its idle timeout."""
+        self._sessions.clear()
+
+    async def _delay(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _login(self, request: web.Request) -> web.Response:
+        await self._delay()
+        form = await request.post()
+        response = web.Response(text="<html></html>", content_type="text/html")
+        if form.get("username") != self.username or form.get("password") != self.password:
+            response.set_cookie("AuthReason", "wrong username or password")
+            return response
+
+        self.logins += 1
+        session_id = secrets.token_hex(16)
+        expires = time.monotonic() + self.session_lifetime if self.session_lifetime else float("inf")
+        self._sessions[session_id] = expires
+        response.set_cookie(SESSION_COOKIE, session_id)
+        return response
+
+    def _authorized(self, request: web.Request) -> bool:
+        expires = self._sessions.get(request.cookies.get(SESSION_COOKIE, ""))
+        return expires is not None and time.monotonic() < expires
+
+    async def _page(self, request: web.Request) -> web.Response:
+        await self._delay()
+        page = request.query_string
+        self.requests[page] += 1
+        if not self._authorized(request):
+            # An expired session is sent back to the login page
+            raise web.HTTPFound("/?login=1")
+        if self._random.random() < self.error_rate:
+            raise web.HTTPInternalServerError(text="Injected cloud failure")
+
+        if request.method == "POST":
+            return web.json_response(self._apply(page, await request.post()))
+        if page not in self.pages:
+            raise web.HTTPNotFound()
+        return web.json_response(self.pages[page])
+
+    def _apply(self, page: str, form) -> dict:
+        if page == THEORETICAL_USE_PAGE:
+            hours = 24 if form.get("type") == "day" else 7
+            return {
+                "trend_consumption": {
+                    "CompHeating": [0.5] * hours,
+                    "CompActiveCooling": [0.0] * hours,
+                    "CompTapWater": [0.2] * hours,
+                    "CPLoops": [0.05] * hours,
+                }
+            }
+
+        name, value = form.get("param_name"), form.get("param_value")
+        if page == APIEndpoint.ADVANCED_SETTINGS.value and name == "main_mode":
+            self.pages[APIEndpoint.BASIC.value]["TemperaturesAndConfig"]["main_mode"] = int(value)
+            return {"result": "success"}
+
+        circle = self.pages.get(SETTING_PAGES.get(page), {}).get("HeatingCircleData")
+        if circle is None:
+            return {"result": "error"}
+        if name == "circle_temp":
+            circle["circle_temp"] = str(float(value))
+        elif name == "circle_status":
+            # The client posts loop modes under circle_status
+            circle["circle_mode"] = int(value)
+        else:
+            return {"result": "error"}
+        return {"result": "success"}
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port or 0).start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "CloudServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+async def benchmark(iterations: int = 50, concurrency: int = 5, **server_options) -> dict[str, float]:
+    """Time rounds of concurrent voice-style reads through KronotermCloudApi against a fresh server."""
+    from kronoterm_voice_actions.wyoming.kronoterm_cloud_api import KronotermCloudApi
+
+    async with CloudServer(**server_options) as server:
+        api = KronotermCloudApi(server.username, server.password, None, base_url=server.url)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await asyncio.gather(*(api.get_outside_temperature() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await api.close()
+
+        return {
+            "reads": iterations * concurrency,
+            "requests": sum(server.requests.values()),
+            "logins": server.logins,
+            "reads_per_second": iterations * concurrency / elapsed if elapsed else 0.0,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the cloud client against a local stand-in server")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated response delay in seconds")
+    parser.add_argument("--session-lifetime", type=float, default=None, help="Seconds until sessions expire")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(
+        args.iterations, args.concurrency, latency=args.latency, session_lifetime=args.session_lifetime,
+    ))
+    for name, value in results.items():
+        print(f"{name:>20}: {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
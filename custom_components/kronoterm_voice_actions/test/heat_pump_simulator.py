@@ -0,0 +1,261 @@
+# src/kronoterm_voice_actions/test/heat_pump_simulator.py
+
+"""Simulated Kronoterm heat pump served over Modbus TCP.
+
+Used by the tests to exercise the client against a real bus, and runnable as a
+benchmark for throughput and tail latency without hardware:
+
+    python -m kronoterm_voice_actions.test.heat_pump_simulator --iterations 500
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import time
+
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusSlaveContext
+from pymodbus.server import ModbusTcpServer
+
+from kronoterm_voice_actions.wyoming.const import MODBUS_SLAVE_ID
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+
+# Highest register address the simulated map covers
+REGISTER_COUNT = 2400
+
+# Raw register values of a heat pump heating on a cold day
+DEFAULT_VALUES: dict[RegisterAddress, int] = {
+    RegisterAddress.SYSTEM_STATUS: 1,
+    RegisterAddress.OPERATING_MODE: 0,
+    RegisterAddress.OPERATING_REGIME: 1,
+    RegisterAddress.PROGRAM_MODE: 0,
+    RegisterAddress.SYSTEM_ON: 1,
+    RegisterAddress.DHW_TARGET_TEMP: 480,
+    RegisterAddress.DHW_CURRENT_TARGET_TEMP: 480,
+    RegisterAddress.DHW_MODE_SELECT: 1,
+    RegisterAddress.DHW_SCHEDULE_STATUS: 1,
+    RegisterAddress.LOOP_1_MODE_SELECT: 1,
+    RegisterAddress.LOOP_1_SCHEDULE_STATUS: 1,
+    RegisterAddress.LOOP_1_TARGET_ROOM_TEMP: 215,
+    RegisterAddress.LOOP_1_CURRENT_TARGET_ROOM_TEMP: 215,
+    RegisterAddress.LOOP_2_TARGET_ROOM_TEMP: 210,
+    RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP: 210,
+    RegisterAddress.LOOP_2_MODE_SELECT: 1,
+    RegisterAddress.LOOP_2_SCHEDULE_STATUS: 1,
+    RegisterAddress.LOOP_3_ROOM_TARGET_TEMP: 200,
+    RegisterAddress.LOOP_3_TARGET_ROOM_TEMP: 500,
+    RegisterAddress.LOOP_4_ROOM_TARGET_TEMP: 200,
+    RegisterAddress.LOOP_4_TARGET_ROOM_TEMP: 500,
+    RegisterAddress.HP_INLET_TEMP: 312,
+    RegisterAddress.DHW_TEMP: 463,
+    RegisterAddress.OUTSIDE_TEMP: -35,
+    RegisterAddress.HP_OUTLET_TEMP: 356,
+    RegisterAddress.EVAPORATING_TEMP: -92,
+    RegisterAddress.COMPRESSOR_TEMP: 684,
+    RegisterAddress.LOOP_1_TEMP_SENSOR: 341,
+    RegisterAddress.LOOP_2_TEMP_SENSOR: 298,
+    RegisterAddress.LOOP_3_TEMP_SENSOR: 205,
+    RegisterAddress.LOOP_4_TEMP_SENSOR: 201,
+    RegisterAddress.HEAT_SYSTEM_PRESSURE: 16,
+    RegisterAddress.CURRENT_HP_LOAD: 62,
+    RegisterAddress.CURRENT_POWER_CONSUMPTION: 5400,
+    RegisterAddress.ENERGY_ELECTRIC_HIGH: 0,
+    RegisterAddress.ENERGY_ELECTRIC_LOW: 18234,
+    RegisterAddress.ENERGY_HEAT_HIGH: 1,
+    RegisterAddress.ENERGY_HEAT_LOW: 4410,
+    RegisterAddress.COP: 412,
+    RegisterAddress.SCOP: 385,
+}
+
+# Raw setpoint limits the controller clamps writes to
+SETPOINT_LIMITS: dict[RegisterAddress, tuple[int, int]] = {
+    RegisterAddress.DHW_TARGET_TEMP: (100, 650),
+    RegisterAddress.LOOP_1_TARGET_ROOM_TEMP: (50, 350),
+    RegisterAddress.LOOP_2_TARGET_ROOM_TEMP: (50, 350),
+    RegisterAddress.LOOP_3_ROOM_TARGET_TEMP: (50, 350),
+    RegisterAddress.LOOP_4_ROOM_TARGET_TEMP: (50, 350),
+}
+
+# Writing a setting is reflected in a status register on the real controller
+MIRRORED_REGISTERS: dict[RegisterAddress, RegisterAddress] = {
+    RegisterAddress.SYSTEM_ON: RegisterAddress.SYSTEM_STATUS,
+    RegisterAddress.DHW_TARGET_TEMP: RegisterAddress.DHW_CURRENT_TARGET_TEMP,
+    RegisterAddress.LOOP_1_TARGET_ROOM_TEMP: RegisterAddress.LOOP_1_CURRENT_TARGET_ROOM_TEMP,
+    RegisterAddress.LOOP_2_TARGET_ROOM_TEMP: RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP,
+    RegisterAddress.DHW_QUICK_HEAT_ENABLE: RegisterAddress.DHW_QUICK_HEAT,
+}
+
+
+class SimulatedRegisters(ModbusSlaveContext):
+    """Holding register map with setpoint clamping, response delay and error injection."""
+
+    def __init__(self, response_delay: float = 0.0, error_rate: float = 0.0, seed: int | None = None):
+        block = ModbusSequentialDataBlock(0, [0] * REGISTER_COUNT)
+        super().__init__(hr=block)
+        self.response_delay = response_delay
+        self.error_rate = error_rate
+        self.requests = 0
+        # Set once a request arrives, and an event every request waits for when given
+        self.received = asyncio.Event()
+        self.hold: asyncio.Event | None = None
+        self._random = random.Random(seed)
+
+        for addr, raw in DEFAULT_VALUES.items():
+            self.set_raw(addr, raw)
+
+    def set_raw(self, addr: RegisterAddress, raw: int) -> None:
+        """Set a register the way the controller would report it, signed values as two's complement."""
+        # The context stores protocol address N at index N + 1, which is the register number
+        self.store["h"].setValues(addr.to_int(), [raw & 0xFFFF])
+
+    def get_raw(self, addr: RegisterAddress) -> int:
+        """Return the unsigned 16-bit word stored in a register."""
+        return self.store["h"].getValues(addr.to_int(), 1)[0]
+
+    def setValues(self, fc_as_hex: int, address: int, values: list[int]) -> None:
+        clamped = []
+        for offset, raw in enumerate(values):
+            try:
+                addr = RegisterAddress(address + offset + 1)
+            except ValueError:
+                clamped.append(raw)
+                continue
+
+            if addr in SETPOINT_LIMITS:
+                low, high = SETPOINT_LIMITS[addr]
+                raw = min(max(raw, low), high)
+            if addr in MIRRORED_REGISTERS:
+                self.set_raw(MIRRORED_REGISTERS[addr], raw)
+            clamped.append(raw)
+
+        super().setValues(fc_as_hex, address, clamped)
+
+    def validate(self, fc_as_hex: int, address: int, count: int = 1) -> bool:
+        # An injected failure is refused like an unmapped address, with an exception response
+        if self._random.random() < self.error_rate:
+            return False
+        return super().validate(fc_as_hex, address, count)
+
+    async def _simulate_bus(self) -> None:
+        self.requests += 1
+        self.received.set()
+        if self.hold is not None:
+            await self.hold.wait()
+        if self.response_delay:
+            await asyncio.sleep(self.response_delay)
+
+    async def async_getValues(self, fc_as_hex: int, address: int, count: int = 1) -> list[int]:
+        # A single register write reads the register back for its echo, not a request of its own
+        if fc_as_hex != 6:
+            await self._simulate_bus()
+        return self.getValues(fc_as_hex, address, count)
+
+    async def async_setValues(self, fc_as_hex: int, address: int, values: list[int]) -> None:
+        await self._simulate_bus()
+        self.setValues(fc_as_hex, address, values)
+
+
+class HeatPumpSimulator:
+    """Modbus TCP server exposing one SimulatedRegisters per slave ID, a cascade when given several."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        slave_ids: tuple[int, ...] = (MODBUS_SLAVE_ID,),
+        **register_options,
+    ):
+        self.host = host
+        self.port = port or _free_port()
+        self.units = {slave_id: SimulatedRegisters(**register_options) for slave_id in slave_ids}
+        # Registers of the first heat pump, the only one unless simulating a cascade
+        self.registers = self.units[slave_ids[0]]
+        context = ModbusServerContext(slaves=self.units, single=False)
+        self._server = ModbusTcpServer(context, address=(self.host, self.port))
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start serving and wait until the port accepts connections."""
+        self._task = asyncio.create_task(self._server.serve_forever())
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(0.02)
+                continue
+            writer.close()
+            await writer.wait_closed()
+            return
+
+        raise RuntimeError(f"Simulator did not start on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        await self._server.shutdown()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def __aenter__(self) -> "HeatPumpSimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def summarize_latencies(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """Throughput and latency percentiles in milliseconds for a benchmark run."""
+    ordered = sorted(latencies)
+    if len(ordered) > 1:
+        quantiles = statistics.quantiles(ordered, n=100, method="inclusive")
+    else:
+        quantiles = ordered * 99
+    return {
+        "requests_per_second": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def benchmark(iterations: int = 200, **register_options) -> dict[str, float]:
+    """Time single-register reads through MqttClient against a fresh simulator."""
+    from kronoterm_voice_actions.wyoming.modbus_transport import TcpTransport
+    from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+    async with HeatPumpSimulator(**register_options) as simulator:
+        transport = TcpTransport(simulator.host, simulator.port)
+        client = MqttClient(transport=transport)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            begin = time.perf_counter()
+            await client.read(RegisterAddress.OUTSIDE_TEMP)
+            latencies.append(time.perf_counter() - begin)
+        elapsed = time.perf_counter() - started
+        transport.close()
+
+    return summarize_latencies(latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Modbus client against a simulated heat pump")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated response delay in seconds")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args.iterations, response_delay=args.delay))
+    for name, value in results.items():
+        print(f"{name:>20}: {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
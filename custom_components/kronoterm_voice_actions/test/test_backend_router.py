@@ -0,0 +1,93 @@
+# src/kronoterm_voice_actions/test/test_backend_router.py
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.backend_router import BackendRouter, CloudBackend, ModbusBackend
+from kronoterm_voice_actions.wyoming.error import CloudRefusedError, ModbusTimeoutError
+from kronoterm_voice_actions.wyoming.kronoterm_cloud_api import KronotermCloudApi
+from kronoterm_voice_actions.wyoming.kronoterm_enums import APIEndpoint
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+from .cloud_server import CloudServer
+
+intents = MqttClient.intents
+OUTSIDE = intents.id_of("kakšna je zunanja temperatura")
+SYSTEM_ON = intents.id_of("vklopi sistem")
+
+
+def modbus(*results):
+    client = MagicMock()
+    client.invoke_intent = AsyncMock(side_effect=list(results))
+    return ModbusBackend(client)
+
+
+@pytest.fixture
+async def cloud():
+    async with CloudServer() as server:
+        api = KronotermCloudApi(server.username, server.password, None, base_url=server.url)
+        yield CloudBackend(api), server
+        await api.close()
+
+
+async def test_prefers_the_bus(cloud):
+    """Tests that the faster Modbus backend answers and intents the cloud lacks stay on the bus."""
+    backend, server = cloud
+    router = BackendRouter([backend, modbus("Modbus", "Sistem vklopljen.")])
+
+    assert await router.run(OUTSIDE) == "Modbus"
+    assert await router.run(SYSTEM_ON) == "Sistem vklopljen."
+    assert server.requests[APIEndpoint.BASIC.value] == 0
+
+
+async def test_fails_over_to_the_cloud(cloud):
+    """Tests that a bus timeout is answered by the cloud and the bus is passed over afterwards."""
+    backend, server = cloud
+    bus = modbus(ModbusTimeoutError("no answer"))
+    router = BackendRouter([bus, backend])
+
+    assert await router.run(OUTSIDE) == "Trenutna zunanja temperatura je -3.5 stopinj."
+    assert await router.run(intents.id_of("nastavi temperaturo prostora ena na <temperature> stopinj"), 22) == (
+        "Želena temperatura prostora prvega kroga nastavljena na 22 stopinj."
+    )
+    assert server.pages[APIEndpoint.HEATING_LOOP_1.value]["HeatingCircleData"]["circle_temp"] == "22.0"
+    bus.client.invoke_intent.assert_awaited_once()
+
+
+async def test_last_backend_error_is_raised():
+    """Tests that the error of the last backend is raised when every backend fails, and bad slots are not retried."""
+    router = BackendRouter([modbus(ModbusTimeoutError("no answer"))])
+    with pytest.raises(ModbusTimeoutError):
+        await router.run(OUTSIDE)
+    with pytest.raises(ValueError):
+        await router.run(SYSTEM_ON, 48)
+
+
+async def test_cache_hits_are_not_timed(cloud):
+    """Tests that only calls that reached the cloud count towards the latency of their intent."""
+    backend, server = cloud
+    router = BackendRouter([backend])
+
+    await router.run(OUTSIDE)
+    measured = router.latencies()["cloud"]
+    assert list(measured) == ["get_outside_temp"]
+
+    # The page is cached now, a microsecond answer must not make the cloud look fast
+    await router.run(OUTSIDE)
+    assert server.requests[APIEndpoint.BASIC.value] == 1
+    assert router.latencies()["cloud"] == measured
+
+
+async def test_refused_change_is_not_replayed():
+    """Tests that a change the cloud refused is reported and not written over the bus instead."""
+    cloud = MagicMock(requests=0)
+    cloud.set_heating_loop_target_temperature = AsyncMock(return_value=False)
+    bus = modbus("Modbus")
+    router = BackendRouter([CloudBackend(cloud), bus])
+    router._states[1].failed()
+
+    with pytest.raises(CloudRefusedError):
+        await router.run(intents.id_of("nastavi temperaturo prostora ena na <temperature> stopinj"), 22)
+    bus.client.invoke_intent.assert_not_awaited()
+    assert router._states[0].available
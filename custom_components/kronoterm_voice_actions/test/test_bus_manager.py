@@ -0,0 +1,92 @@
+# src/kronoterm_voice_actions/test/test_bus_manager.py
+
+import time
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.bus_manager import BusManager
+from kronoterm_voice_actions.wyoming.const import (
+    CONF_MODBUS_BUSES,
+    CONF_MODBUS_HOST,
+    CONF_MODBUS_PORT,
+    CONF_MODBUS_TRANSPORT,
+    CONF_SLAVE_IDS,
+    MODBUS_TRANSPORT_TCP,
+)
+from kronoterm_voice_actions.wyoming.error import UnknownHeatPumpError
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_transport import close_transports, get_transport
+
+from .heat_pump_simulator import HeatPumpSimulator
+
+pytestmark = pytest.mark.asyncio
+
+
+def _bus(simulator: HeatPumpSimulator) -> dict:
+    return {
+        CONF_MODBUS_TRANSPORT: MODBUS_TRANSPORT_TCP,
+        CONF_MODBUS_HOST: simulator.host,
+        CONF_MODBUS_PORT: simulator.port,
+        CONF_SLAVE_IDS: list(simulator.units),
+    }
+
+
+async def test_cascade_on_one_bus():
+    """Tests that heat pumps sharing a bus are numbered in order and share one transport."""
+    async with HeatPumpSimulator(slave_ids=(20, 21)) as simulator:
+        simulator.units[21].set_raw(RegisterAddress.CURRENT_HP_LOAD, 80)
+        buses = BusManager.from_config({CONF_MODBUS_BUSES: [_bus(simulator)]})
+
+        loads = await buses.for_each(lambda client: client.read(RegisterAddress.CURRENT_HP_LOAD))
+        close_transports()
+
+    assert loads == {1: 62, 2: 80}
+    assert list(buses.buses.values()) == [[1, 2]]
+    with pytest.raises(UnknownHeatPumpError):
+        buses.client(3)
+
+
+async def test_separate_buses_run_in_parallel():
+    """Tests that a slow bus does not hold back a heat pump on another bus."""
+    async with (
+        HeatPumpSimulator(response_delay=0.3) as first,
+        HeatPumpSimulator(response_delay=0.3) as second,
+    ):
+        buses = BusManager.from_config({CONF_MODBUS_BUSES: [_bus(first), _bus(second)]})
+
+        started = time.perf_counter()
+        await buses.for_each(lambda client: client.read(RegisterAddress.SYSTEM_STATUS))
+        elapsed = time.perf_counter() - started
+        close_transports()
+
+    assert len(buses.buses) == 2
+    assert elapsed < 0.55
+
+
+async def test_close_keeps_shared_transports():
+    """Tests that closing one entry's buses leaves a transport another entry still uses open."""
+    async with HeatPumpSimulator() as simulator:
+        first = BusManager.from_config(_bus(simulator))
+        second = BusManager.from_config(_bus(simulator))
+        transport = first.client().transport
+        assert second.client().transport is transport
+        assert await first.client().read(RegisterAddress.SYSTEM_STATUS) == 1
+
+        first.close()
+        assert transport.client.connected
+        second.close()
+        assert not transport.client.connected
+        assert get_transport(MODBUS_TRANSPORT_TCP, simulator.host, simulator.port) is not transport
+        close_transports()
+
+
+async def test_shared_transport_keeps_its_policy():
+    """Tests that a second user of a bus does not change the timeout and retries of the first."""
+    first = get_transport(MODBUS_TRANSPORT_TCP, "192.0.2.1", timeout=1.0, retries=2)
+    client = first.client
+    second = get_transport(MODBUS_TRANSPORT_TCP, "192.0.2.1", timeout=5.0, retries=0)
+
+    assert second is first
+    assert (first.timeout, first.retries) == (1.0, 2)
+    assert first.client is client
+    close_transports()
@@ -0,0 +1,265 @@
+# src/kronoterm_voice_actions/test/test_cloud_api.py
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiohttp import ClientResponseError
+
+from kronoterm_voice_actions.wyoming.error import CloudAuthError
+from kronoterm_voice_actions.wyoming.kronoterm_cloud_api import CLOUD_CONCURRENCY, KronotermCloudApi
+from kronoterm_voice_actions.wyoming.kronoterm_enums import (
+    APIEndpoint,
+    HeatingLoop,
+    HeatingLoopMode,
+    HeatingLoopStatus,
+    WorkingFunction,
+)
+
+from .cloud_server import CloudServer
+
+BASIC_PAGE = {
+    "TemperaturesAndConfig": {
+        "outside_temp": "-3.5",
+        "heating_circle_2_temp": "21.5",
+        "reservoir_temp": "34.0",
+        "tap_water_temp": "46.3",
+        "working_function": 0,
+        "main_mode": 0,
+    }
+}
+
+PAGES = {
+    APIEndpoint.INITIAL.value: {"hp_id": "42", "Location": "Hiša", "CircleNames": "Pritličje;Nadstropje", "ActiveErrorsCnt": "0"},
+    APIEndpoint.BASIC.value: BASIC_PAGE,
+    APIEndpoint.SYSTEM_REVIEW.value: {"CurrentFunctionData": [{"dv_temp": "35.6"}]},
+    APIEndpoint.HEATING_LOOP_1.value: {"HeatingCircleData": {"circle_temp": "21.5", "circle_status": 1, "circle_mode": 1}},
+    APIEndpoint.HEATING_LOOP_2.value: {"HeatingCircleData": {"circle_temp": "20.0", "circle_status": 2, "circle_mode": 2}},
+    APIEndpoint.TAP_WATER.value: {"HeatingCircleData": {"circle_temp": "48.0", "circle_status": 0, "circle_mode": 0}},
+    APIEndpoint.ALARMS.value: {"AlarmsData": []},
+}
+
+
+def make_response(status=200, content_type="application/json", data=None, cookies=None):
+    resp = MagicMock(status=status, content_type=content_type, cookies=cookies or {})
+    resp.json = AsyncMock(return_value=data)
+    return resp
+
+
+def make_session(*responses):
+    """Session that accepts every login and answers page requests in order."""
+    session = MagicMock()
+    session.post = AsyncMock(return_value=make_response())
+    session.request = AsyncMock(side_effect=list(responses))
+    return session
+
+
+async def test_page_reads_share_one_request():
+    """Tests that questions answered from the same page cost one request, concurrent or not."""
+    api = KronotermCloudApi("user", "password", None)
+
+    async def slow_get(url, **kwargs):
+        await asyncio.sleep(0.01)
+        return BASIC_PAGE
+
+    with patch.object(api, "_get", AsyncMock(side_effect=slow_get)) as get:
+        results = await asyncio.gather(
+            api.get_outside_temperature(),
+            api.get_room_temp(),
+            api.get_reservoir_temp(),
+        )
+        await api.get_sanitary_water_temp()
+        await api.get_working_function()
+
+    assert results == [-3.5, 21.5, 34.0]
+    get.assert_awaited_once()
+
+
+async def test_page_is_parsed_once_per_fetch():
+    """Tests that getters reading one page share a single parsed view until the page is fetched again."""
+    api = KronotermCloudApi("user", "password", None)
+    with patch.object(api, "_get", AsyncMock(return_value=BASIC_PAGE)):
+        view = await api.get_basic_view()
+        assert await api.get_basic_view() is view
+        assert view.outside_temperature == await api.get_outside_temperature()
+
+        api.invalidate()
+        assert await api.get_basic_view() is not view
+
+
+async def test_changes_invalidate_the_cache():
+    """Tests that a successful write is followed by a fresh read."""
+    api = KronotermCloudApi("user", "password", None)
+    with (
+        patch.object(api, "_get", AsyncMock(return_value=BASIC_PAGE)) as get,
+        patch.object(api, "post_raw", AsyncMock(return_value={"result": "success"})),
+    ):
+        await api.get_outside_temperature()
+        assert await api.set_heating_loop_target_temperature(HeatingLoop.HEATING_LOOP_1, 22)
+        await api.get_outside_temperature()
+
+    assert get.await_count == 2
+
+
+async def test_read_in_flight_during_change_is_not_cached():
+    """Tests that a page read before a change is neither cached nor joined after the change."""
+    api = KronotermCloudApi("user", "password", None)
+    old_page = {"TemperaturesAndConfig": dict(BASIC_PAGE["TemperaturesAndConfig"], outside_temp="-5.0")}
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def get(url, **kwargs):
+        if not started.is_set():
+            started.set()
+            await release.wait()
+            return old_page
+        return BASIC_PAGE
+
+    with patch.object(api, "_get", AsyncMock(side_effect=get)) as mock_get:
+        stale = asyncio.create_task(api.get_outside_temperature())
+        await started.wait()
+        api.invalidate()
+        assert await api.get_outside_temperature() == -3.5
+
+        release.set()
+        assert await stale == -5.0
+        assert await api.get_outside_temperature() == -3.5
+
+    assert mock_get.await_count == 2
+
+
+async def test_expired_session_logs_in_again():
+    """Tests that a redirect to the login page is followed by one login and a retry."""
+    api = KronotermCloudApi("user", "password", None)
+    api.session = make_session(make_response(status=302), make_response(data=BASIC_PAGE))
+
+    assert await api.get_outside_temperature() == -3.5
+    assert api.session.post.await_count == 2
+    assert api.session.request.await_count == 2
+
+
+async def test_concurrent_logins_are_serialized():
+    """Tests that requests racing to log in share a single login."""
+    api = KronotermCloudApi("user", "password", None)
+    api.session = make_session(*(make_response(data={}) for _ in range(3)))
+
+    await asyncio.gather(api.get_basic_data(), api.get_alarms_data(), api.get_initial_data())
+    api.session.post.assert_awaited_once()
+
+
+async def test_rejected_login_raises():
+    """Tests that an AuthReason cookie fails the request instead of continuing without a session."""
+    api = KronotermCloudApi("user", "password", None)
+    api.session = make_session()
+    api.session.post.return_value = make_response(cookies={"AuthReason": SimpleNamespace(value="bad password")})
+
+    with pytest.raises(CloudAuthError):
+        await api.get_basic_data()
+    api.session.request.assert_not_awaited()
+
+
+async def test_owned_session_is_closed():
+    """Tests the tuned session the client creates for itself and that closing it forgets the login."""
+    api = KronotermCloudApi("user", "password", None)
+    api.session = session = api._create_session()
+    api._logged_in = True
+
+    assert session.timeout.total == 30
+    assert session.connector.limit_per_host == 4
+
+    await api.close()
+    assert session.closed
+    assert api.session is None
+    assert not api._logged_in
+
+
+async def test_full_state():
+    """Tests that every page is read concurrently, within the limit, into one snapshot."""
+    api = KronotermCloudApi("user", "password", None)
+    in_flight, most = 0, 0
+
+    async def get(url, **kwargs):
+        nonlocal in_flight, most
+        in_flight += 1
+        most = max(most, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return PAGES[url]
+
+    with patch.object(api, "_get", AsyncMock(side_effect=get)) as get_page:
+        state = await api.get_full_state()
+
+    assert get_page.await_count == len(PAGES)
+    assert 1 < most <= CLOUD_CONCURRENCY
+    assert state.outside_temperature == -3.5
+    assert state.outlet_temperature == 35.6
+    assert state.working_function == WorkingFunction.HP_FUNCTION_HEATING
+    assert state.loops[HeatingLoop.HEATING_LOOP_2].status == HeatingLoopStatus.CIRCUIT_STATUS_ECO
+    assert state.loops[HeatingLoop.TAP_WATER].mode == HeatingLoopMode.OFF
+    assert state.location_name == "Hiša"
+
+
+@pytest.fixture
+async def cloud_server():
+    async with CloudServer() as server:
+        yield server
+
+
+@pytest.fixture
+async def cloud(cloud_server):
+    api = KronotermCloudApi(cloud_server.username, cloud_server.password, None, base_url=cloud_server.url)
+    yield api
+    await api.close()
+
+
+async def test_against_cloud_server(cloud, cloud_server):
+    """Tests login, concurrent reads and a setpoint change end to end against the stand-in server."""
+    state = await cloud.get_full_state()
+    assert state.outside_temperature == -3.5
+    assert state.loops[HeatingLoop.TAP_WATER].target_temperature == 48.0
+    assert cloud_server.logins == 1
+
+    await asyncio.gather(cloud.get_outside_temperature(), cloud.get_room_temp())
+    assert cloud_server.requests[APIEndpoint.BASIC.value] == 1
+
+    assert await cloud.set_heating_loop_target_temperature(HeatingLoop.TAP_WATER, 52)
+    assert await cloud.get_heating_loop_target_temperature(HeatingLoop.TAP_WATER) == 52.0
+
+
+async def test_cloud_server_session_expiry(cloud, cloud_server):
+    """Tests that a session the server forgot is replaced by one login shared by concurrent reads."""
+    await cloud.get_basic_data()
+    cloud_server.expire_sessions()
+    cloud.invalidate()
+
+    await asyncio.gather(cloud.get_basic_data(), cloud.get_alarms_data(), cloud.get_initial_data())
+    assert cloud_server.logins == 2
+
+
+async def test_cloud_server_rejects_login(cloud_server):
+    """Tests that wrong credentials are reported as an authentication error."""
+    api = KronotermCloudApi(cloud_server.username, "wrong", None, base_url=cloud_server.url)
+    with pytest.raises(CloudAuthError):
+        await api.get_basic_data()
+    await api.close()
+
+
+async def test_cloud_server_error_is_not_an_expired_session(cloud, cloud_server):
+    """Tests that a server error is raised as such and does not cost a login."""
+    await cloud.get_initial_data()
+    cloud_server.error_rate = 1
+
+    with pytest.raises(ClientResponseError) as err:
+        await cloud.get_basic_data()
+    assert err.value.status == 500
+    assert cloud_server.logins == 1
+
+
+async def test_cloud_server_consumption_trend(cloud):
+    """Tests that theoretical use is parsed into arrays per consumer."""
+    trend = await cloud.get_consumption_trend()
+    assert trend.heating.shape == (24,)
+    assert trend.total[-1] == pytest.approx(0.75)
+
+    consumption = await cloud.get_theoretical_power_consumption()
+    assert consumption.all == pytest.approx(0.75)
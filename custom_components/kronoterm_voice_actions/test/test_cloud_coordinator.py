@@ -0,0 +1,90 @@
+# src/kronoterm_voice_actions/test/test_cloud_coordinator.py
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.components.climate import HVACMode
+from homeassistant.exceptions import HomeAssistantError
+
+from kronoterm_voice_actions.wyoming.climate import KronotermLoopClimate
+from kronoterm_voice_actions.wyoming.cloud_coordinator import backoff_interval
+from kronoterm_voice_actions.wyoming.kronoterm_enums import (
+    HeatingLoop,
+    HeatingLoopMode,
+    HeatingLoopStatus,
+    HeatPumpOperatingMode,
+    WorkingFunction,
+)
+from kronoterm_voice_actions.wyoming.kronoterm_models import CloudState, LoopView
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.water_heater import KronotermTapWaterHeater
+
+
+def make_state(active_errors_count=0):
+    loop = LoopView(21.0, HeatingLoopStatus.CIRCUIT_STATUS_NORMAL, HeatingLoopMode.ON)
+    return CloudState(
+        timestamp=datetime.now(timezone.utc),
+        hp_id="42",
+        location_name="Hiša",
+        loop_names=None,
+        active_errors_count=active_errors_count,
+        outside_temperature=-3.5,
+        room_temperature=21.5,
+        reservoir_temperature=34.0,
+        sanitary_water_temperature=46.3,
+        outlet_temperature=35.6,
+        working_function=WorkingFunction.HP_FUNCTION_HEATING,
+        operating_mode=HeatPumpOperatingMode.AUTO,
+        loops={loop_id: loop for loop_id in HeatingLoop},
+        alarms=[],
+    )
+
+
+def test_backoff_interval():
+    """Tests that failed polls double the interval up to the maximum."""
+    minute = timedelta(minutes=1)
+    assert backoff_interval(minute, 0) == minute
+    assert backoff_interval(minute, 3) == timedelta(minutes=8)
+    assert backoff_interval(minute, 10) == timedelta(minutes=15)
+    assert backoff_interval(timedelta(hours=1), 2) == timedelta(hours=1)
+
+
+@patch('kronoterm_voice_actions.wyoming.modbus_transport.pymodbus.client.ModbusSerialClient')
+async def test_voice_answer_from_cloud_state(MockModbusClient):
+    """Tests that cloud questions are answered from the polled state without a request of their own."""
+    client = MqttClient()
+    assert await client.get_active_alarms() == "Podatki iz oblaka niso na voljo."
+
+    client.cloud = SimpleNamespace(data=make_state())
+    assert await client.get_active_alarms() == "Toplotna črpalka nima aktivnih alarmov."
+    client.cloud.data = make_state(active_errors_count=3)
+    assert await client.invoke_kronoterm_action("koliko alarmov je aktivnih", None) == (
+        "Toplotna črpalka ima 3 aktivne alarme."
+    )
+    MockModbusClient.return_value.connect.assert_not_called()
+
+
+async def test_refused_change_raises():
+    """Tests that entities report a change the cloud refused instead of ignoring it."""
+    coordinator = MagicMock(
+        async_set_target_temperature=AsyncMock(return_value=False),
+        async_set_loop_mode=AsyncMock(return_value=False),
+    )
+    config_entry = MagicMock(entry_id="entry")
+    climate = KronotermLoopClimate(coordinator, config_entry, HeatingLoop.HEATING_LOOP_1)
+    heater = KronotermTapWaterHeater(coordinator, config_entry)
+
+    with pytest.raises(HomeAssistantError):
+        await climate.async_set_temperature(temperature=22)
+    with pytest.raises(HomeAssistantError):
+        await climate.async_set_hvac_mode(HVACMode.OFF)
+    with pytest.raises(HomeAssistantError):
+        await heater.async_set_temperature(temperature=50)
+    with pytest.raises(HomeAssistantError):
+        await heater.async_set_operation_mode("auto")
+
+    coordinator.async_set_target_temperature.return_value = True
+    await climate.async_set_temperature(temperature=22)
+    coordinator.async_set_target_temperature.assert_awaited_with(HeatingLoop.HEATING_LOOP_1, 22)
@@ -0,0 +1,66 @@
+# src/kronoterm_voice_actions/test/test_consumption_history.py
+
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.consumption_history import ConsumptionHistory, period_starts
+from kronoterm_voice_actions.wyoming.kronoterm_enums import ConsumptionPeriod
+from kronoterm_voice_actions.wyoming.kronoterm_models import ConsumptionTrend
+
+
+def test_period_starts():
+    """Tests that a range is split into the calendar periods that overlap it."""
+    assert list(period_starts(ConsumptionPeriod.WEEK, date(2025, 5, 1), date(2025, 5, 12))) == [
+        date(2025, 4, 28), date(2025, 5, 5), date(2025, 5, 12),
+    ]
+    assert list(period_starts(ConsumptionPeriod.MONTH, date(2024, 12, 31), date(2025, 2, 1))) == [
+        date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1),
+    ]
+
+
+@patch('kronoterm_voice_actions.wyoming.consumption_history._ConsumptionStore')
+async def test_finished_periods_are_fetched_once(MockStore):
+    """Tests that settled periods come from the disk cache and recent ones are fetched again."""
+    MockStore.return_value.async_load = AsyncMock(return_value=None)
+    cloud = MagicMock()
+    cloud.get_consumption_trend = AsyncMock(
+        side_effect=lambda period, day: ConsumptionTrend.parse({"CompHeating": [day.day]})
+    )
+    history = ConsumptionHistory(MagicMock(), cloud, "entry")
+    today = date.today()
+
+    series = await history.async_series(ConsumptionPeriod.DAY, today - timedelta(days=4))
+    assert [entry.start for entry in series] == [today - timedelta(days=d) for d in (4, 3, 2, 1, 0)]
+    assert series[0].trend.heating.tolist() == [(today - timedelta(days=4)).day]
+    assert series[0].trend.pumps.tolist() == [0.0]
+    assert cloud.get_consumption_trend.await_count == 5
+    MockStore.return_value.async_delay_save.assert_called_once()
+
+    # Only the days that ended at least two days ago are cached
+    cloud.get_consumption_trend.reset_mock()
+    again = await history.async_series(ConsumptionPeriod.DAY, today - timedelta(days=4))
+    assert [entry.as_dict() for entry in again] == [entry.as_dict() for entry in series]
+    assert [call.args[1] for call in cloud.get_consumption_trend.await_args_list] == [
+        today - timedelta(days=d) for d in (2, 1, 0)
+    ]
+
+    with pytest.raises(ValueError):
+        await history.async_series(ConsumptionPeriod.DAY, today + timedelta(days=1))
+
+
+@patch('kronoterm_voice_actions.wyoming.consumption_history._ConsumptionStore')
+async def test_longer_periods_are_not_cached(MockStore):
+    """Tests that weeks are fetched on every request and never written to disk."""
+    MockStore.return_value.async_load = AsyncMock(return_value=None)
+    cloud = MagicMock()
+    cloud.get_consumption_trend = AsyncMock(return_value=ConsumptionTrend.parse({"CompHeating": [1.0]}))
+    history = ConsumptionHistory(MagicMock(), cloud, "entry")
+    since = date.today() - timedelta(weeks=4)
+
+    await history.async_series(ConsumptionPeriod.WEEK, since)
+    await history.async_series(ConsumptionPeriod.WEEK, since)
+
+    assert cloud.get_consumption_trend.await_count == 10
+    MockStore.return_value.async_delay_save.assert_not_called()
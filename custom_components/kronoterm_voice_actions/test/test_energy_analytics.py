@@ -0,0 +1,49 @@
+# src/kronoterm_voice_actions/test/test_energy_analytics.py
+
+import time
+
+import numpy as np
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+from kronoterm_voice_actions.wyoming.energy_analytics import EnergyAnalytics, daily_energy
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.snapshot_history import SnapshotHistory
+
+
+def test_daily_energy():
+    """Tests that counter increases are booked per day and counter resets add nothing."""
+    times = np.array([0.0, 50.0, 90.0, 110.0, 150.0, 190.0])
+    values = np.array([
+        [100.0, 300.0],
+        [102.0, np.nan],
+        [105.0, 312.0],
+        [107.0, 318.0],
+        [1.0, 320.0],
+        [3.0, 326.0],
+    ])
+
+    today, yesterday = daily_energy(times, values, np.array([0.0, 100.0, 200.0]))[::-1]
+    assert (yesterday.electric, yesterday.heat) == (5.0, 12.0)
+    assert (today.electric, today.heat) == (4.0, 14.0)
+    assert today.cop == pytest.approx(3.5)
+
+
+@patch('kronoterm_voice_actions.wyoming.modbus_transport.pymodbus.client.ModbusSerialClient')
+async def test_voice_energy_query(MockModbusClient):
+    """Tests that energy questions are answered from the history without touching the bus."""
+    client = MqttClient()
+    assert await client.get_energy_used_today() == "Zgodovina meritev še ni na voljo."
+
+    client.history = SnapshotHistory(interval=timedelta(0))
+    client.analytics = EnergyAnalytics(client.history)
+    now = time.time()
+    for offset, electric, heat in ((2, 1000.0, 3000.0), (1, 1001.0, 3003.0), (0, 1002.0, 3007.0)):
+        client.history.append({"ENERGY_ELECTRIC": electric, "ENERGY_HEAT": heat}, timestamp=now - offset)
+
+    response = await client.get_energy_used_today()
+    assert response == ("Danes je toplotna črpalka porabila dve kilovatni uri električne energije "
+                        "in proizvedla 7 kilovatnih ur toplote.")
+    assert await client.get_cop_week() == "Grelno število v zadnjem tednu je 3.5."
+    MockModbusClient.return_value.connect.assert_not_called()
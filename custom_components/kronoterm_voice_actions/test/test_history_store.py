@@ -0,0 +1,64 @@
+# src/kronoterm_voice_actions/test/test_history_store.py
+
+import time
+
+import numpy as np
+
+from kronoterm_voice_actions.wyoming.history_store import HistorySegment, HistoryStore
+
+KEYS = ["OUTSIDE_TEMP", "CURRENT_HP_LOAD"]
+
+
+def test_append_and_scan(tmp_path):
+    """Tests that appended snapshots come back from a range scan across daily segments."""
+    start = time.time() - 2 * 86400
+    store = HistoryStore(tmp_path, KEYS)
+    for hour in range(48):
+        assert store.append({"OUTSIDE_TEMP": float(hour), "UNKNOWN": 1.0}, timestamp=start + hour * 3600)
+    assert not store.append({"OUTSIDE_TEMP": 0.0}, timestamp=start)
+    store.close()
+
+    assert len(store.segments()) >= 2
+    times, values = store.scan(["OUTSIDE_TEMP", "CURRENT_HP_LOAD", "MISSING"], start + 10 * 3600, start + 30 * 3600)
+    assert len(times) == 21
+    assert np.all(np.diff(times) > 0)
+    assert values[:, 0].tolist() == [float(hour) for hour in range(10, 31)]
+    assert np.isnan(values[:, 1:]).all()
+
+
+def test_recover_torn_tail(tmp_path):
+    """Tests that a partially written record is truncated and appending continues after the last good one."""
+    now = time.time()
+    store = HistoryStore(tmp_path, KEYS)
+    for second in range(10):
+        store.append({"OUTSIDE_TEMP": float(second)}, timestamp=now + second)
+    store.close()
+
+    path = store.segments()[-1].path
+    with path.open("r+b") as file:
+        file.truncate(path.stat().st_size - 5)
+
+    store = HistoryStore(tmp_path, KEYS)
+    assert not store.append({"OUTSIDE_TEMP": 0.0}, timestamp=now + 5)
+    assert store.append({"OUTSIDE_TEMP": 20.0}, timestamp=now + 20)
+    store.close()
+
+    assert len(HistorySegment(path)) == 10
+    times, values = store.scan(KEYS, now, now + 30)
+    assert values[:, 0].tolist() == [*range(9), 20.0]
+
+
+def test_new_columns_start_new_segment(tmp_path):
+    """Tests that a store with other columns never appends to an existing segment."""
+    now = time.time()
+    store = HistoryStore(tmp_path, KEYS)
+    store.append({"OUTSIDE_TEMP": 1.0}, timestamp=now)
+    store.close()
+
+    store = HistoryStore(tmp_path, ["OUTSIDE_TEMP"])
+    store.append({"OUTSIDE_TEMP": 2.0}, timestamp=now + 1)
+    store.close()
+
+    assert [segment.keys for segment in store.segments()] == [KEYS, ["OUTSIDE_TEMP"]]
+    _, values = store.scan(["OUTSIDE_TEMP"], now, now + 1)
+    assert values[:, 0].tolist() == [1.0, 2.0]
@@ -0,0 +1,57 @@
+# src/kronoterm_voice_actions/test/test_intents.py
+
+import pytest
+from unittest.mock import patch
+
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+
+intents = MqttClient.intents
+
+
+def test_one_intent_per_handler():
+    """Tests that every phrasing of a handler compiles to the same dense intent ID."""
+    handlers = set(MqttClient.map_template_to_function.values())
+    assert len(intents) == len(handlers)
+    assert [intent.id for intent in intents.intents] == list(range(len(handlers)))
+
+    on = intents.id_of("vklopi sistem")
+    assert intents.id_of("vklopi toplotno črpalko in ogrevalne kroge") == on
+    assert intents[on].registers == {RegisterAddress.SYSTEM_ON}
+    with pytest.raises(ValueError):
+        intents.id_of("zapoj pesem")
+
+
+def test_slots():
+    """Tests arity and slot validation of prepared intents."""
+    status = intents[intents.id_of("kakšno je stanje sistema")]
+    dhw = intents[intents.id_of("segrej sanitarno vodo na <temperature> stopinj")]
+
+    assert (status.arity, dhw.arity) == (0, 1)
+    assert dhw.arguments(48) == (48.0,)
+    with pytest.raises(ValueError):
+        dhw.arguments(None)
+    with pytest.raises(ValueError):
+        status.arguments(48)
+
+
+def test_match_is_cached():
+    """Tests that utterances match to intent IDs and repeated ones skip the matcher."""
+    with patch("kronoterm_voice_actions.wyoming.intents.match_command", return_value=("vklopi sistem", None)) as match:
+        table = type(intents)(MqttClient.map_template_to_function)
+        assert table.match("vklopi sistem prosim") == (table.id_of("vklopi sistem"), None)
+        assert table.match("vklopi sistem prosim") == (table.id_of("vklopi sistem"), None)
+
+    match.assert_called_once()
+
+
+def test_prefetch_registers():
+    """Tests that the registers of several intents are collected for one read."""
+    ids = [intents.id_of("izklopi vse ogrevalne kroge"), intents.id_of("kakšno je stanje sistema")]
+    assert intents.registers(ids) == {
+        RegisterAddress.LOOP_1_MODE_SELECT,
+        RegisterAddress.LOOP_2_MODE_SELECT,
+        RegisterAddress.LOOP_3_MODE_SELECT,
+        RegisterAddress.LOOP_4_MODE_SELECT,
+        RegisterAddress.SYSTEM_STATUS,
+    }
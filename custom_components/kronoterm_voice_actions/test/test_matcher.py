@@ -167,4 +167,17 @@ def test_match_command_botched():
 
     action, param = matcher.match_command("uklopi sstm", commands)
     assert action == "vklopi sistem"
-    assert param is None
\ No newline at end of file
+    assert param is None
+
+def test_match_heat_pump():
+    number, text = matcher.match_heat_pump("Toplotna črpalka dva, vklopi sistem")
+    assert number == 2
+    assert matcher.match_command(text, commands) == ("vklopi sistem", None)
+
+    number, text = matcher.match_heat_pump("kakšna je trenutna obremenitev toplotne črpalke 3")
+    assert number == 3
+    assert text == "kakšna je trenutna obremenitev toplotne črpalke"
+
+    assert matcher.match_heat_pump("vklopi toplotno črpalko in ogrevalne kroge") == (
+        None, "vklopi toplotno črpalko in ogrevalne kroge"
+    )
@@ -0,0 +1,35 @@
+# src/kronoterm_voice_actions/test/test_modbus_metrics.py
+
+from kronoterm_voice_actions.wyoming.modbus_metrics import (
+    OUTCOME_EXCEPTION,
+    OUTCOME_TIMEOUT,
+    ModbusMetrics,
+)
+
+
+def test_latency_percentiles():
+    """Tests that percentiles are estimated from the histogram and slow outliers from the maximum."""
+    metrics = ModbusMetrics()
+    for _ in range(98):
+        metrics.record(0.004, 1)
+    metrics.record(0.040, 10, OUTCOME_EXCEPTION)
+    metrics.record(4.0, 1, OUTCOME_TIMEOUT)
+
+    assert metrics.latency_percentile(50) == 5
+    assert metrics.latency_percentile(99) == 50
+    assert metrics.latency_percentile(100) == 4000
+    assert metrics.registers_per_request == 1.09
+    assert metrics.timeouts == 1
+    assert metrics.exception_responses == 1
+
+
+def test_queue_depth():
+    """Tests that the deepest queue is remembered after it drains."""
+    metrics = ModbusMetrics()
+    metrics.waiting(1)
+    metrics.waiting(1)
+    metrics.waiting(-1)
+    metrics.waiting(-1)
+
+    assert metrics.queue_depth == 0
+    assert metrics.max_queue_depth == 2
@@ -0,0 +1,95 @@
+# src/kronoterm_voice_actions/test/test_register_decoder.py
+
+import json
+
+import numpy as np
+import pytest
+
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.read_planner import MAX_REGISTERS_PER_READ, plan_reads
+from kronoterm_voice_actions.wyoming.register_decoder import REGISTER_SPECS, BlockDecoder, load_register_specs
+
+
+def make_block(decoder: BlockDecoder, values: dict[RegisterAddress, int]) -> list[int]:
+    raw = [0] * decoder.count
+    for addr, value in values.items():
+        raw[addr.to_int() - decoder.start] = value & 0xFFFF
+    return raw
+
+
+def test_decode_block():
+    """Tests signedness, scale, 32-bit pairing and bitmask fields in one block."""
+    addrs = [
+        RegisterAddress.DHW_TEMP,
+        RegisterAddress.OUTSIDE_TEMP,
+        RegisterAddress.CURRENT_HP_LOAD,
+        RegisterAddress.COMPRESSOR_STATUS,
+        RegisterAddress.ENERGY_ELECTRIC_HIGH,
+        RegisterAddress.COP,
+    ]
+    decoder = BlockDecoder(2102, 271, [REGISTER_SPECS[addr] for addr in addrs])
+    raw = make_block(decoder, {
+        RegisterAddress.DHW_TEMP: 463,
+        RegisterAddress.OUTSIDE_TEMP: -35,
+        RegisterAddress.CURRENT_HP_LOAD: 62,
+        RegisterAddress.COMPRESSOR_STATUS: 0b10,
+        RegisterAddress.ENERGY_ELECTRIC_HIGH: 1,
+        RegisterAddress.ENERGY_ELECTRIC_LOW: 5,
+        RegisterAddress.COP: 412,
+    })
+
+    values = decoder.decode(raw)
+
+    assert values["DHW_TEMP"] == 46.3
+    assert values["OUTSIDE_TEMP"] == -3.5
+    assert values["CURRENT_HP_LOAD"] == 62
+    assert isinstance(values["CURRENT_HP_LOAD"], int)
+    assert values["ENERGY_ELECTRIC"] == 65541
+    assert values["COP"] == 4.12
+    assert values["COMPRESSOR_STATUS.compressor_1"] is False
+    assert values["COMPRESSOR_STATUS.compressor_2"] is True
+
+
+def test_decode_array_matches_keys():
+    decoder = BlockDecoder(2101, 3, REGISTER_SPECS.values())
+    array = decoder.decode_array(np.array([312, 463, 65501], dtype=np.uint16))
+
+    assert decoder.keys == ["HP_INLET_TEMP", "DHW_TEMP", "OUTSIDE_TEMP"]
+    np.testing.assert_allclose(array, [31.2, 46.3, -3.5])
+
+
+def test_plan_covers_every_spec():
+    """Tests that the planner keeps blocks within protocol limits and loses no registers."""
+    plan = plan_reads(REGISTER_SPECS.values())
+
+    assert all(block.count <= MAX_REGISTERS_PER_READ for block in plan)
+    assert sum(len(block.specs) for block in plan) == len(REGISTER_SPECS)
+
+
+def test_plan_keeps_pairs_together():
+    specs = [REGISTER_SPECS[RegisterAddress.ENERGY_HEAT_HIGH], REGISTER_SPECS[RegisterAddress.COP]]
+    plan = plan_reads(specs, max_gap=0)
+
+    assert [(block.start, block.count) for block in plan] == [(2363, 2), (2371, 1)]
+
+
+def test_load_register_specs(tmp_path):
+    """Tests that entries are merged over their type defaults and invalid entries are rejected."""
+    types = {"word": {}, "temperature": {"signed": True, "scale": 0.1, "unit": "°C", "group": "settings"}}
+    path = tmp_path / "registers.json"
+    path.write_text(json.dumps({"types": types, "registers": {
+        "DHW_TARGET_TEMP": {"type": "temperature", "access": "rw", "min": 10, "max": 75},
+        "LOOP_1_MODE_SELECT": {"options": {"0": "Izklopljeno", "1": "Normalno"}},
+    }}))
+
+    specs = load_register_specs(path)
+    dhw = specs[RegisterAddress.DHW_TARGET_TEMP]
+    assert (dhw.signed, dhw.scale, dhw.group, dhw.writable, dhw.maximum) == (True, 0.1, "settings", True, 75)
+    assert specs[RegisterAddress.LOOP_1_MODE_SELECT].option(1) == "Normalno"
+
+    path = tmp_path / "read_only.json"
+    path.write_text(json.dumps({"types": types, "registers": {
+        "OUTSIDE_TEMP": {"voice": {"set": {"0": {"phrases": ["izklopi"], "answer": "Izklopljeno."}}}},
+    }}))
+    with pytest.raises(ValueError):
+        load_register_specs(path)
@@ -0,0 +1,104 @@
+# src/kronoterm_voice_actions/test/test_register_poller.py
+
+import asyncio
+
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from kronoterm_voice_actions.wyoming.const import EVENT_REGISTERS_CHANGED, SIGNAL_REGISTERS_UPDATED
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.register_decoder import GROUP_ENERGY, GROUP_POWER, GROUP_SETTINGS
+from kronoterm_voice_actions.wyoming.register_poller import POLL_GROUPS, RegisterPoller, diff_snapshot
+
+pytestmark = pytest.mark.asyncio
+
+
+def test_diff_snapshot_deadband():
+    """Tests that changes within a register's deadband are suppressed."""
+    previous = {"OUTSIDE_TEMP": -3.5, "SYSTEM_STATUS": 1, "COMPRESSOR_STATUS.compressor_1": False}
+    current = {"OUTSIDE_TEMP": -3.4, "SYSTEM_STATUS": 1, "COMPRESSOR_STATUS.compressor_1": True}
+    deadbands = {"OUTSIDE_TEMP": 0.2}
+
+    assert diff_snapshot(previous, current, deadbands) == {"COMPRESSOR_STATUS.compressor_1": True}
+    assert diff_snapshot(previous, {"OUTSIDE_TEMP": -3.8}, deadbands) == {"OUTSIDE_TEMP": -3.8}
+    assert diff_snapshot({}, {"SYSTEM_STATUS": 0}, deadbands) == {"SYSTEM_STATUS": 0}
+
+
+@patch('kronoterm_voice_actions.wyoming.register_poller.async_dispatcher_send')
+async def test_poll_emits_only_changes(mock_send):
+    """Tests that a poll without changes emits nothing and slow drift is measured from the last report."""
+    hass = MagicMock()
+    client = MagicMock()
+    client.read_registers = AsyncMock(side_effect=[
+        {"OUTSIDE_TEMP": 5.0, "SYSTEM_STATUS": 1},
+        {"OUTSIDE_TEMP": 5.1, "SYSTEM_STATUS": 1},
+        {"OUTSIDE_TEMP": 5.3, "SYSTEM_STATUS": 1},
+    ])
+    poller = RegisterPoller(hass, client)
+
+    assert await poller.async_poll() == {"OUTSIDE_TEMP": 5.0, "SYSTEM_STATUS": 1}
+    assert await poller.async_poll() == {}
+    assert await poller.async_poll() == {"OUTSIDE_TEMP": 5.3}
+
+    assert mock_send.call_count == 2
+    mock_send.assert_called_with(hass, SIGNAL_REGISTERS_UPDATED, {"OUTSIDE_TEMP": 5.3})
+    hass.bus.async_fire.assert_called_with(EVENT_REGISTERS_CHANGED, {"changes": {"OUTSIDE_TEMP": 5.3}})
+
+
+async def test_group_intervals_adapt_to_volatility():
+    """Tests that a group whose values keep changing is polled faster and a quiet group slower."""
+    hass = MagicMock()
+    client = MagicMock()
+    client.read_registers = AsyncMock(side_effect=[{"CURRENT_HP_LOAD": load} for load in range(10)])
+    poller = RegisterPoller(hass, client)
+    initial = poller.group_intervals()
+
+    with patch('kronoterm_voice_actions.wyoming.register_poller.async_dispatcher_send'):
+        for _ in range(10):
+            await poller.async_poll([GROUP_POWER, GROUP_SETTINGS])
+
+    intervals = poller.group_intervals()
+    assert intervals[GROUP_POWER] < initial[GROUP_POWER]
+    assert intervals[GROUP_POWER] >= POLL_GROUPS[GROUP_POWER].min_interval.total_seconds()
+    assert intervals[GROUP_SETTINGS] > initial[GROUP_SETTINGS]
+    assert intervals[GROUP_SETTINGS] <= POLL_GROUPS[GROUP_SETTINGS].max_interval.total_seconds()
+    assert intervals[GROUP_ENERGY] == initial[GROUP_ENERGY]
+
+    requested = client.read_registers.call_args.args[0]
+    assert RegisterAddress.CURRENT_HP_LOAD in requested
+    assert RegisterAddress.OUTSIDE_TEMP not in requested
+
+
+async def test_shutdown_waits_for_poll_in_progress():
+    """Tests that shutting down stops polling and waits for the poll in progress to store its snapshot."""
+    hass = MagicMock()
+    read = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_read(addrs):
+        read.set()
+        await release.wait()
+        return {"OUTSIDE_TEMP": 5.0}
+
+    client = MagicMock()
+    client.read_registers = AsyncMock(side_effect=slow_read)
+    store = MagicMock()
+    hass.async_add_executor_job = AsyncMock()
+    poller = RegisterPoller(hass, client, store=store)
+
+    with (
+        patch('kronoterm_voice_actions.wyoming.register_poller.async_dispatcher_send'),
+        patch('kronoterm_voice_actions.wyoming.register_poller.async_call_later') as call_later,
+    ):
+        tick = asyncio.create_task(poller._async_tick())
+        await read.wait()
+        shutdown = asyncio.create_task(poller.async_shutdown())
+        await asyncio.sleep(0)
+        assert not shutdown.done()
+
+        release.set()
+        await shutdown
+        await tick
+
+    hass.async_add_executor_job.assert_awaited_once_with(store.append, {"OUTSIDE_TEMP": 5.0})
+    call_later.assert_not_called()
@@ -0,0 +1,112 @@
+# src/kronoterm_voice_actions/test/test_setpoint_coalescer.py
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from kronoterm_voice_actions.wyoming import _setpoint_confirmer
+from kronoterm_voice_actions.wyoming.backend_router import BackendRouter, ModbusBackend
+from kronoterm_voice_actions.wyoming.error import ModbusTimeoutError, SetpointRangeError
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.setpoint_coalescer import SetpointCoalescer
+
+DHW = MqttClient.intents.id_of("segrej sanitarno vodo na <temperature> stopinj")
+
+
+async def test_burst_is_written_once():
+    """Tests that a burst of changes to one setpoint writes only the final value and confirms it."""
+    confirm = MagicMock()
+    coalescer = SetpointCoalescer(confirm, window=0.05)
+    write = AsyncMock(side_effect=lambda value: f"Nastavljeno na {value:g}.")
+
+    for value in (50, 51, 52):
+        coalescer.submit("dhw", value, write, origin="kitchen")
+        await asyncio.sleep(0.01)
+    coalescer.submit("loop", 21, write)
+    assert coalescer.pending == {"dhw": 52, "loop": 21}
+
+    await asyncio.sleep(0.1)
+    assert [call.args for call in write.await_args_list] == [(52,), (21,)]
+    confirm.assert_any_call("dhw", 52, "Nastavljeno na 52.", None, "kitchen")
+    assert coalescer.pending == {}
+
+
+async def test_changing_setpoint_is_written_by_the_deadline():
+    """Tests that a setpoint changed more often than the window is still written after the maximum delay."""
+    coalescer = SetpointCoalescer(window=0.05, max_delay=0.1)
+    write = AsyncMock(return_value="")
+
+    for value in range(8):
+        coalescer.submit("dhw", value, write)
+        await asyncio.sleep(0.03)
+
+    assert write.await_count >= 1
+    await coalescer.flush()
+    assert write.await_args.args == (7,)
+
+
+async def test_router_acknowledges_bursts_immediately():
+    """Tests that a single setpoint change gets the written answer and a burst behind it is acknowledged."""
+    client = MagicMock()
+    client.invoke_intent = AsyncMock(
+        side_effect=lambda intent_id, value: f"Želena temperatura sanitarne vode nastavljena na {value:g} stopinj."
+    )
+    confirm = MagicMock()
+    router = BackendRouter([ModbusBackend(client)], coalescer=SetpointCoalescer(confirm, window=0.05))
+
+    assert await router.run(DHW, 50) == "Želena temperatura sanitarne vode nastavljena na 50 stopinj."
+    assert await router.run(DHW, 51, "kitchen") == "V redu, nastavljam na 51 stopinj."
+    assert await router.run(DHW, 52, "kitchen") == "V redu, nastavljam na 52 stopinj."
+    client.invoke_intent.assert_awaited_once_with(DHW, 50)
+    confirm.assert_not_called()
+
+    await router.coalescer.flush()
+    client.invoke_intent.assert_awaited_with(DHW, 52)
+    assert client.invoke_intent.await_count == 2
+    confirm.assert_called_once_with(
+        DHW, 52, "Želena temperatura sanitarne vode nastavljena na 52 stopinj.", None, "kitchen"
+    )
+
+    # Once the window has passed, a change is a single one again
+    await asyncio.sleep(0.06)
+    assert await router.run(DHW, 48) == "Želena temperatura sanitarne vode nastavljena na 48 stopinj."
+
+
+async def test_router_refuses_setpoints_out_of_range():
+    """Tests that an out of range setpoint is refused before it is acknowledged or queued."""
+    client = MagicMock()
+    client.invoke_intent = AsyncMock()
+    router = BackendRouter([ModbusBackend(client)], coalescer=SetpointCoalescer(MagicMock(), window=0.05))
+
+    with pytest.raises(SetpointRangeError) as err:
+        await router.run(DHW, 90)
+    assert (err.value.minimum, err.value.maximum) == (10, 75)
+
+    await router.coalescer.flush()
+    client.invoke_intent.assert_not_awaited()
+
+
+@patch('kronoterm_voice_actions.wyoming.persistent_notification')
+@patch('kronoterm_voice_actions.wyoming.er')
+async def test_failed_write_is_told_to_the_user(mock_er, mock_notification):
+    """Tests that a failed coalesced write is announced on the satellite and raises a notification."""
+    mock_er.async_entries_for_device.return_value = [
+        SimpleNamespace(entity_id="assist_satellite.kuhinja", domain="assist_satellite"),
+        SimpleNamespace(entity_id="switch.kuhinja_mute", domain="switch"),
+    ]
+    hass = MagicMock()
+    confirm = _setpoint_confirmer(hass)
+
+    confirm(DHW, 52, None, ModbusTimeoutError("no answer"), "kitchen")
+
+    mock_notification.async_create.assert_called_once()
+    hass.bus.async_fire.assert_called_once()
+    assert hass.bus.async_fire.call_args.args[1]["success"] is False
+    hass.services.async_call.assert_called_once_with(
+        "assist_satellite",
+        "announce",
+        {"entity_id": ["assist_satellite.kuhinja"], "message": "Nastavitev temperature na 52 stopinj ni uspela."},
+    )
+    hass.async_create_task.assert_called_once()
@@ -0,0 +1,178 @@
+# src/kronoterm_voice_actions/test/test_simulator.py
+
+import asyncio
+
+import pytest
+
+from kronoterm_voice_actions.wyoming.error import ModbusTimeoutError, ModbusTransactionError, SetpointRangeError
+from kronoterm_voice_actions.wyoming.kronoterm_models import RegisterAddress
+from kronoterm_voice_actions.wyoming.modbus_transport import TcpTransport
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.const import MODBUS_SLAVE_ID
+
+from .heat_pump_simulator import HeatPumpSimulator, benchmark
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def simulator():
+    async with HeatPumpSimulator(seed=1) as sim:
+        yield sim
+
+
+@pytest.fixture
+async def client(simulator):
+    transport = TcpTransport(simulator.host, simulator.port)
+    yield MqttClient(transport=transport)
+    transport.close()
+
+
+async def test_read_over_bus(client):
+    """Tests reading signed temperatures through a real Modbus TCP connection."""
+    assert await client.read(RegisterAddress.SYSTEM_STATUS) == 1
+    assert await client.read_temperature(RegisterAddress.OUTSIDE_TEMP) == -3.5
+
+
+async def test_setpoint_is_clamped(client, simulator):
+    """Tests that the simulated controller clamps setpoints and the client reports the clamped value."""
+    actual = await client.set_temperature(RegisterAddress.DHW_TARGET_TEMP, 80.0)
+
+    assert actual == 65.0
+    assert client.supports_read_write is True
+    assert simulator.registers.get_raw(RegisterAddress.DHW_CURRENT_TARGET_TEMP) == 650
+
+
+async def test_write_many(client, simulator):
+    """Tests that a batch write merges consecutive registers and is verified with one bulk read."""
+    before = simulator.registers.requests
+    actual = await client.write_many([
+        (RegisterAddress.LOOP_1_MODE_SELECT, 2),
+        (RegisterAddress.LOOP_3_ECO_OFFSET, -15),
+        (RegisterAddress.LOOP_3_COMFORT_OFFSET, 10),
+        (RegisterAddress.LOOP_2_TARGET_ROOM_TEMP, 400),
+    ])
+
+    assert actual == {
+        RegisterAddress.LOOP_1_MODE_SELECT: 2,
+        RegisterAddress.LOOP_3_ECO_OFFSET: -15,
+        RegisterAddress.LOOP_3_COMFORT_OFFSET: 10,
+        RegisterAddress.LOOP_2_TARGET_ROOM_TEMP: 350,  # Clamped by the controller
+    }
+    # One read of the previous values, three writes with the offsets in a single request, one verifying read
+    assert simulator.registers.requests - before == 5
+
+
+async def test_all_loops_schedule(client, simulator):
+    """Tests the voice action that switches every loop to schedule mode at once."""
+    response = await client.set_all_loops_operating_mode_schedule()
+
+    assert response == "Delovanje vseh ogrevalnih krogov nastavljeno na delovanje po urniku."
+    assert simulator.registers.get_raw(RegisterAddress.LOOP_4_MODE_SELECT) == 2
+
+
+async def test_generated_voice_handlers(client, simulator):
+    """Tests reads and writes generated from the register spec against the simulator."""
+    handlers = client.map_template_to_function
+
+    response = await handlers["kakšna je temperatura ogrevalnega kroga ena"](client)
+    assert response == "Trenutna temperatura prvega ogrevalnega kroga: 34.1 stopinj."
+    response = await handlers["kakšen je status delovanja drugega ogrevalnega kroga"](client)
+    assert response == "Trenutni status delovanja drugega kroga po urniku: Normalno."
+
+    response = await handlers["nastavi temperaturo prostora ena na <temperature> stopinj"](client, 22.5)
+    assert response == "Želena temperatura prostora prvega kroga nastavljena na 22.5 stopinj."
+    assert simulator.registers.get_raw(RegisterAddress.LOOP_1_TARGET_ROOM_TEMP) == 225
+
+    with pytest.raises(SetpointRangeError):
+        await handlers["nastavi temperaturo prostora ena na <temperature> stopinj"](client, 45)
+    assert simulator.registers.get_raw(RegisterAddress.LOOP_1_TARGET_ROOM_TEMP) == 225
+
+    assert await handlers["izklopi ogrevalni krog tri"](client) == "Tretji ogrevalni krog izklopljen."
+    assert simulator.registers.get_raw(RegisterAddress.LOOP_3_MODE_SELECT) == 0
+
+
+async def test_connection_is_reused(client, simulator):
+    """Tests that the TCP transport keeps one connection across transactions."""
+    await client.read(RegisterAddress.SYSTEM_STATUS)
+    socket_before = client.modbus_client.socket
+    await client.read(RegisterAddress.SYSTEM_STATUS)
+
+    assert client.modbus_client.socket is socket_before
+    assert simulator.registers.requests == 2
+
+
+async def test_error_injection(simulator):
+    """Tests that injected failures come back as Modbus exception responses and are counted."""
+    simulator.registers.error_rate = 1.0
+    transport = TcpTransport(simulator.host, simulator.port)
+    async with transport.session() as modbus_client:
+        rr = await transport.transact(
+            modbus_client.read_holding_registers,
+            RegisterAddress.SYSTEM_STATUS.to_int() - 1,
+            count=1,
+            slave=MODBUS_SLAVE_ID
+        )
+    transport.close()
+
+    assert rr.isError()
+    assert transport.metrics.exception_responses == 1
+
+
+async def test_exception_response_is_a_bus_error(client, simulator):
+    """Tests that an exception response to a read is raised as a transaction error, not a decode error."""
+    simulator.registers.error_rate = 1.0
+
+    with pytest.raises(ModbusTransactionError):
+        await client.read_registers([RegisterAddress.OUTSIDE_TEMP, RegisterAddress.SYSTEM_STATUS])
+    with pytest.raises(ModbusTransactionError):
+        await client.read(RegisterAddress.SYSTEM_STATUS)
+
+
+async def test_slow_slave_times_out(simulator):
+    """Tests that a slave slower than the deadline raises a typed timeout after the retries."""
+    simulator.registers.response_delay = 0.5
+    transport = TcpTransport(simulator.host, simulator.port, timeout=0.1, retries=1)
+    client = MqttClient(transport=transport)
+
+    with pytest.raises(ModbusTimeoutError):
+        await client.read(RegisterAddress.SYSTEM_STATUS)
+    transport.close()
+
+    assert transport.metrics.timeouts == 2
+
+
+async def test_cancel_abandons_transaction(client, simulator):
+    """Tests that cancelling a pending read drops the connection and frees the bus."""
+    simulator.registers.hold = asyncio.Event()
+    task = asyncio.create_task(client.read(RegisterAddress.SYSTEM_STATUS))
+    await simulator.registers.received.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert not client.modbus_client.connected
+    simulator.registers.hold.set()
+    assert await client.read(RegisterAddress.SYSTEM_STATUS) == 1
+
+
+async def test_bus_metrics(client):
+    """Tests that every transaction is counted with the number of registers it moved."""
+    await client.read(RegisterAddress.SYSTEM_STATUS)
+    # A 32-bit counter, one request moving both of its registers
+    await client.read_registers([RegisterAddress.ENERGY_HEAT_HIGH])
+
+    metrics = client.transport.metrics.as_dict()
+    assert metrics["requests"] == 2
+    assert metrics["registers_per_request"] == 1.5
+    assert metrics["requests_per_second"] > 0
+    assert sum(metrics["latency_histogram"]) == 2
+    assert metrics["timeouts"] == metrics["exception_responses"] == metrics["errors"] == 0
+    assert metrics["queue_depth"] == 0
+
+
+async def test_benchmark_reports_percentiles():
+    results = await benchmark(iterations=20)
+
+    assert results["requests_per_second"] > 0
+    assert results["p50_ms"] <= results["p99_ms"] <= results["max_ms"]
@@ -0,0 +1,51 @@
+# src/kronoterm_voice_actions/test/test_snapshot_history.py
+
+import time
+
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+from kronoterm_voice_actions.wyoming.mqtt_client import MqttClient
+from kronoterm_voice_actions.wyoming.snapshot_history import SnapshotHistory
+
+
+def test_ring_buffer_overwrites_oldest():
+    """Tests that a full buffer keeps only the most recent snapshots."""
+    history = SnapshotHistory(["OUTSIDE_TEMP"], capacity=4, interval=timedelta(seconds=30))
+    for minute in range(6):
+        history.append({"OUTSIDE_TEMP": float(minute)}, timestamp=minute * 60)
+
+    assert len(history) == 4
+    assert sorted(history.window("OUTSIDE_TEMP", since=0)) == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_aggregate_window():
+    """Tests aggregates over a time window, sampling throttling and unknown values."""
+    history = SnapshotHistory(["OUTSIDE_TEMP", "CURRENT_HP_LOAD"], capacity=100)
+    for second in range(0, 600, 30):
+        history.append({"OUTSIDE_TEMP": second / 60}, timestamp=second)
+    assert not history.append({"OUTSIDE_TEMP": 100.0}, timestamp=590)
+
+    stats = history.aggregate("OUTSIDE_TEMP", since=300)
+    assert stats["count"] == 10
+    assert stats["min"] == 5.0
+    assert stats["max"] == 9.5
+    assert stats["mean"] == pytest.approx(7.25)
+    assert history.aggregate("CURRENT_HP_LOAD", since=0) is None
+
+
+@patch('kronoterm_voice_actions.wyoming.modbus_transport.pymodbus.client.ModbusSerialClient')
+async def test_voice_history_query(MockModbusClient):
+    """Tests that questions about the past are answered from the history without touching the bus."""
+    client = MqttClient()
+    assert await client.get_outside_temp_average_last_hour() == "Zgodovina meritev še ni na voljo."
+
+    client.history = SnapshotHistory()
+    now = time.time()
+    for offset, temp in ((1800, -2.0), (1200, -1.0), (600, 0.0)):
+        client.history.append({"OUTSIDE_TEMP": temp}, timestamp=now - offset)
+
+    response = await client.get_outside_temp_average_last_hour()
+    assert response == "Povprečna zunanja temperatura v zadnji uri je bila -1 stopinj."
+    MockModbusClient.return_value.connect.assert_not_called()
@@ -5,13 +5,18 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+from homeassistant.components import persistent_notification
 from homeassistant.config_entries import ConfigEntry
 
 #
-from homeassistant.const import Platform, CONF_HOST, CONF_PORT
+from homeassistant.const import Platform, CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
 from homeassistant.helpers.typing import ConfigType
 
 from .config_flow import (
@@ -20,10 +25,29 @@ from .config_flow import (
     ENTRY_TYPE_REMOTE,
 )
 
-from .const import ATTR_SPEAKER, DOMAIN
+from .backend_router import BackendRouter, CloudBackend, ModbusBackend
+from .bus_manager import BusManager
+from .cloud_coordinator import KronotermCloudCoordinator
+from .consumption_history import ConsumptionHistory
+from .const import (
+    ATTR_SPEAKER,
+    CONF_HISTORY_RETENTION_DAYS,
+    CONF_HISTORY_STORE,
+    DOMAIN,
+    EVENT_SETPOINT_WRITTEN,
+    HISTORY_STORE_DIRECTORY,
+)
 from .data import WyomingService
 from .devices import SatelliteDevice
+from .energy_analytics import EnergyAnalytics
+from .history_store import DEFAULT_RETENTION_DAYS, HistoryStore
+from .kronoterm_cloud_api import KronotermCloudApi
+from .mqtt_client import MqttClient, deg_tozilnik
 from .models import DomainDataItem
+from .register_poller import RegisterPoller
+from .services import async_register_services
+from .setpoint_coalescer import SetpointCoalescer
+from .snapshot_history import SnapshotHistory
 from .websocket_api import async_register_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,6 +55,13 @@ _LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = cv.empty_config_schema(DOMAIN)
 
+CUSTOM_AGENT_PLATFORMS = [
+    Platform.CLIMATE,
+    Platform.CONVERSATION,
+    Platform.SENSOR,
+    Platform.WATER_HEATER,
+]
+
 SATELLITE_PLATFORMS = [
     Platform.ASSIST_SATELLITE,
     Platform.BINARY_SENSOR,
@@ -51,6 +82,7 @@ __all__ = [
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Wyoming integration."""
     async_register_websocket_api(hass)
+    async_register_services(hass)
     return True
 
 
@@ -66,13 +98,55 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.entry_id,
         )
 
-        item = DomainDataItem(entry_data=entry.data)
+        buses = BusManager.from_config(entry.data)
+        client = buses.client()
+        client.history = SnapshotHistory()
+        store = None
+        if entry.data.get(CONF_HISTORY_STORE):
+            store = HistoryStore(
+                hass.config.path(HISTORY_STORE_DIRECTORY),
+                retention_days=entry.data.get(
+                    CONF_HISTORY_RETENTION_DAYS, DEFAULT_RETENTION_DAYS
+                ),
+            )
+        client.analytics = EnergyAnalytics(client.history, store)
+        poller = RegisterPoller(hass, client, history=client.history, store=store)
+        cloud = None
+        coordinator = None
+        consumption = None
+        backends = [ModbusBackend(client)]
+        if entry.data.get(CONF_USERNAME):
+            cloud = KronotermCloudApi(
+                entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], hass
+            )
+            coordinator = KronotermCloudCoordinator(hass, cloud, entry)
+            # An unreachable cloud leaves its entities unavailable, the Modbus agent still works
+            await coordinator.async_refresh()
+            client.cloud = coordinator
+            consumption = ConsumptionHistory(hass, cloud, entry.entry_id)
+            backends.append(CloudBackend(cloud))
+        item = DomainDataItem(
+            entry_data=entry.data,
+            buses=buses,
+            client=client,
+            poller=poller,
+            store=store,
+            cloud=cloud,
+            coordinator=coordinator,
+            consumption=consumption,
+            router=BackendRouter(
+                backends, coalescer=SetpointCoalescer(_setpoint_confirmer(hass))
+            ),
+        )
         hass.data[DOMAIN][entry.entry_id] = item
 
         await hass.config_entries.async_forward_entry_setups(
-            entry, [Platform.CONVERSATION]
+            entry, CUSTOM_AGENT_PLATFORMS
         )
 
+        poller.async_start()
+        entry.async_on_unload(poller.async_stop)
+
         return True
 
     elif entry_type == ENTRY_TYPE_REMOTE:
@@ -139,6 +213,61 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         return False
 
 
+def _setpoint_confirmer(hass: HomeAssistant):
+    """Tell the user how a coalesced setpoint write went.
+
+    The answer is announced on the satellite the last change was spoken to and fired on
+    the event bus, a failed write also raises a persistent notification.
+    """
+
+    def confirm(
+        intent_id: int,
+        value: float,
+        answer: str | None,
+        error: Exception | None,
+        device_id: str | None,
+    ) -> None:
+        name = MqttClient.intents[intent_id].name
+        if error is not None:
+            answer = f"Nastavitev temperature na {deg_tozilnik(value)} ni uspela."
+            persistent_notification.async_create(
+                hass,
+                f"{answer} ({name}: {error})",
+                title="Kronoterm",
+                notification_id=f"{DOMAIN}_setpoint_{name}",
+            )
+
+        hass.bus.async_fire(
+            EVENT_SETPOINT_WRITTEN,
+            {
+                "intent": name,
+                "value": value,
+                "success": error is None,
+                "answer": answer,
+                "device_id": device_id,
+            },
+        )
+
+        if device_id is None:
+            return
+        satellites = [
+            entity.entity_id
+            for entity in er.async_entries_for_device(er.async_get(hass), device_id)
+            if entity.domain == Platform.ASSIST_SATELLITE
+        ]
+        if satellites:
+            hass.async_create_task(
+                hass.services.async_call(
+                    Platform.ASSIST_SATELLITE,
+                    "announce",
+                    {"entity_id": satellites, "message": answer},
+                ),
+                "announce kronoterm setpoint",
+            )
+
+    return confirm
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update (currently only relevant for remote services)."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -161,7 +290,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.entry_id,
         )
 
-        platforms_to_unload = {Platform.CONVERSATION}
+        platforms_to_unload = set(CUSTOM_AGENT_PLATFORMS)
 
     elif entry_type == ENTRY_TYPE_REMOTE:
 
@@ -204,6 +333,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         unload_ok = True
 
     if unload_ok:
+        if entry_type == ENTRY_TYPE_CUSTOM:
+            item = hass.data[DOMAIN][entry.entry_id]
+            # Setpoints still waiting are written while the bus and cloud are open
+            if item.router is not None and item.router.coalescer is not None:
+                await item.router.coalescer.flush()
+            # A poll in progress still reads the bus and appends to the store
+            await item.poller.async_shutdown()
+            if item.store is not None:
+                await hass.async_add_executor_job(item.store.close)
+            if item.coordinator is not None:
+                await item.coordinator.async_shutdown()
+            if item.cloud is not None:
+                await item.cloud.close()
+            item.buses.close()
+
         del hass.data[DOMAIN][entry.entry_id]
         if not hass.data[DOMAIN]:
             del hass.data[DOMAIN]
@@ -0,0 +1,273 @@
+"""One interface over the Modbus bus and the Kronoterm cloud, with a router picking between them."""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Sequence
+from functools import partial
+
+from aiohttp import ClientError
+
+from .error import CloudAuthError, CloudRefusedError, ModbusTransactionError
+from .intents import Intent, IntentTable
+from .kronoterm_cloud_api import KronotermCloudApi
+from .kronoterm_enums import HeatingLoop, HeatingLoopMode
+from .kronoterm_models import RegisterAddress
+from .mqtt_client import MqttClient, check_setpoint, deg_imenovalnik, deg_tozilnik, spoken_value
+from .register_decoder import REGISTER_SPECS
+from .setpoint_coalescer import SetpointCoalescer
+
+log = logging.getLogger(__name__)
+
+# Failures that say nothing about the request, only about the path it took
+BACKEND_ERRORS = (ModbusTransactionError, CloudAuthError, ClientError, asyncio.TimeoutError, OSError)
+
+# Weight of the latest call in the latency estimate, higher adapts faster
+LATENCY_WEIGHT = 0.3
+# A failed backend is passed over for this many seconds unless nothing else is left
+RETRY_AFTER = 30.0
+
+CloudHandler = Callable[..., Awaitable[str]]
+
+
+class Backend(ABC):
+    """A way to run intents on the heat pump."""
+
+    name = "backend"
+    # Latency assumed in seconds until the first call is measured
+    typical_latency = 1.0
+
+    @property
+    @abstractmethod
+    def requests(self) -> int:
+        """Requests sent so far, a call that sent none was answered from a cache."""
+
+    @abstractmethod
+    def supports(self, intent: Intent) -> bool:
+        """Whether the backend can run an intent."""
+
+    @abstractmethod
+    async def run(self, intent: Intent, parameter: float | None) -> str:
+        """Run an intent and return the spoken answer."""
+
+
+class ModbusBackend(Backend):
+    """The heat pump on its local bus, every intent is written for it."""
+
+    name = "modbus"
+    typical_latency = 0.1
+
+    def __init__(self, client: MqttClient):
+        self.client = client
+
+    @property
+    def requests(self) -> int:
+        return self.client.transport.metrics.requests
+
+    def supports(self, intent: Intent) -> bool:
+        return True
+
+    async def run(self, intent: Intent, parameter: float | None) -> str:
+        return await self.client.invoke_intent(intent.id, parameter)
+
+
+def _cloud_read(addr: RegisterAddress, getter: Callable[[KronotermCloudApi], Awaitable[float]]) -> CloudHandler:
+    spec = REGISTER_SPECS[addr]
+
+    async def handler(cloud: KronotermCloudApi) -> str:
+        return spec.voice.read_answer.format(value=spoken_value(spec, await getter(cloud)))
+
+    return handler
+
+
+def _cloud_write(addr: RegisterAddress, loop: HeatingLoop, answer: str | None = None) -> CloudHandler:
+    spec = REGISTER_SPECS[addr]
+    answer = answer or spec.voice.write_answer
+
+    async def handler(cloud: KronotermCloudApi, temperature: float) -> str:
+        check_setpoint(spec, temperature)
+        if not await cloud.set_heating_loop_target_temperature(loop, temperature):
+            raise CloudRefusedError(f"Cloud refused the target temperature of {loop.name}")
+        return answer.format(value=spoken_value(spec, temperature, deg_tozilnik))
+
+    return handler
+
+
+def _cloud_mode(addr: RegisterAddress, loop: HeatingLoop, mode: HeatingLoopMode) -> CloudHandler:
+    # Mode select registers and cloud loop modes share their values, off, normal and schedule
+    answer = next(setting.answer for setting in REGISTER_SPECS[addr].voice.settings if setting.raw == mode.value)
+
+    async def handler(cloud: KronotermCloudApi) -> str:
+        if not await cloud.set_heating_loop_mode(loop, mode):
+            raise CloudRefusedError(f"Cloud refused the mode of {loop.name}")
+        return answer
+
+    return handler
+
+
+def _cloud_target(loop: HeatingLoop, answer: str) -> CloudHandler:
+    async def handler(cloud: KronotermCloudApi) -> str:
+        return answer.format(value=deg_imenovalnik(await cloud.get_heating_loop_target_temperature(loop)))
+
+    return handler
+
+
+def cloud_handlers() -> dict[str, CloudHandler]:
+    """Cloud equivalents of the Modbus intents the cloud can answer, by intent name"""
+    handlers = {
+        "get_outside_temp": _cloud_read(RegisterAddress.OUTSIDE_TEMP, KronotermCloudApi.get_outside_temperature),
+        "get_dhw_temp": _cloud_read(RegisterAddress.DHW_TEMP, KronotermCloudApi.get_sanitary_water_temp),
+        "set_loop_1_target_room_temp": _cloud_write(RegisterAddress.LOOP_1_TARGET_ROOM_TEMP, HeatingLoop.HEATING_LOOP_1),
+        "set_loop_2_target_room_temp": _cloud_write(RegisterAddress.LOOP_2_TARGET_ROOM_TEMP, HeatingLoop.HEATING_LOOP_2),
+        "set_dhw_target_temperature": _cloud_write(
+            RegisterAddress.DHW_TARGET_TEMP, HeatingLoop.TAP_WATER, "Želena temperatura sanitarne vode nastavljena na {value}."
+        ),
+        "get_dhw_target_temperature": _cloud_target(
+            HeatingLoop.TAP_WATER, "Trenutna želena temperatura sanitarne vode je {value}."
+        ),
+        "get_loop1_room_target_temp": _cloud_target(
+            HeatingLoop.HEATING_LOOP_1, "Trenutna želena temperatura prostora prvega ogrevalnega kroga je {value}."
+        ),
+        "get_loop2_room_target_temp": _cloud_target(
+            HeatingLoop.HEATING_LOOP_2, "Trenutna želena temperatura prostora drugega ogrevalnega kroga je {value}."
+        ),
+    }
+    for addr, loop in (
+        (RegisterAddress.LOOP_1_MODE_SELECT, HeatingLoop.HEATING_LOOP_1),
+        (RegisterAddress.LOOP_2_MODE_SELECT, HeatingLoop.HEATING_LOOP_2),
+        (RegisterAddress.DHW_MODE_SELECT, HeatingLoop.TAP_WATER),
+    ):
+        for mode in HeatingLoopMode:
+            handlers[f"set_{REGISTER_SPECS[addr].key.lower()}_{mode.value}"] = _cloud_mode(addr, loop, mode)
+
+    return handlers
+
+
+class CloudBackend(Backend):
+    """The heat pump through cloud.kronoterm.com, for the intents the cloud exposes."""
+
+    name = "cloud"
+    typical_latency = 0.5
+
+    handlers = cloud_handlers()
+
+    def __init__(self, cloud: KronotermCloudApi):
+        self.cloud = cloud
+
+    @property
+    def requests(self) -> int:
+        return self.cloud.requests
+
+    def supports(self, intent: Intent) -> bool:
+        return intent.name in self.handlers
+
+    async def run(self, intent: Intent, parameter: float | None) -> str:
+        return await self.handlers[intent.name](self.cloud, *intent.arguments(parameter))
+
+
+class _BackendState:
+    """Measured latency of every intent and failures of one backend."""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        # Intents cost very different round trips, e.g. one register against several cloud pages
+        self.latencies: dict[str, float] = {}
+        self.failed_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.failed_until
+
+    def latency(self, intent: Intent) -> float:
+        return self.latencies.get(intent.name, self.backend.typical_latency)
+
+    def succeeded(self, intent: Intent, elapsed: float | None) -> None:
+        """Record a successful call, elapsed is None when it was answered without a round trip."""
+        self.failed_until = 0.0
+        if elapsed is None:
+            return
+        latency = self.latencies.get(intent.name)
+        self.latencies[intent.name] = elapsed if latency is None else latency + LATENCY_WEIGHT * (elapsed - latency)
+
+    def failed(self) -> None:
+        self.failed_until = time.monotonic() + RETRY_AFTER
+
+
+class BackendRouter:
+    """Runs every intent on the fastest available backend that supports it, failing over to the next.
+
+    Backends are ranked by their measured latency for the intent, only calls that went
+    out to the heat pump or the cloud are timed, so a local bus answers reads while
+    an installation reached only through the cloud still works. A backend that fails
+    with a transport error is passed over for RETRY_AFTER seconds and the intent is
+    retried on the next one. Errors of the request itself, e.g. a missing slot or a
+    change the cloud refused, are not retried.
+
+    With a coalescer, a single setpoint change is written at once and answered with the
+    value read back. Changes that follow it in a burst are acknowledged right away and
+    written once the user stops, the confirm callback of the coalescer reports the result.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        intents: IntentTable = MqttClient.intents,
+        coalescer: SetpointCoalescer | None = None,
+    ):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.intents = intents
+        self.coalescer = coalescer
+        self._states = [_BackendState(backend) for backend in backends]
+
+    def latencies(self) -> dict[str, dict[str, float]]:
+        """Measured latency in seconds of every backend by intent name."""
+        return {state.backend.name: dict(state.latencies) for state in self._states}
+
+    def _candidates(self, intent: Intent) -> list[_BackendState]:
+        states = [state for state in self._states if state.backend.supports(intent)]
+        if not states:
+            raise ValueError(f"No backend supports intent {intent.name}")
+        # Backends that failed recently come last rather than not at all
+        return sorted(states, key=lambda state: (not state.available, state.latency(intent)))
+
+    async def run(self, intent_id: int, parameter: float | None = None, device_id: str | None = None) -> str:
+        """Run a compiled intent and return the spoken answer.
+        :param device_id: device the command came from, told the result of a coalesced write
+        :raises ValueError: if the parameter does not fit the intent's slots
+        :raises SetpointRangeError: if the setpoint is outside the range of its register
+        """
+        intent = self.intents[intent_id]
+        intent.arguments(parameter)
+
+        # Every intent with a slot sets a temperature, its range is checked before it is acknowledged
+        if intent.arity:
+            for addr in intent.registers:
+                check_setpoint(REGISTER_SPECS[addr], parameter)
+            if self.coalescer is not None:
+                write = partial(self._dispatch, intent)
+                if not self.coalescer.busy(intent.id):
+                    return await self.coalescer.write_now(intent.id, parameter, write)
+                self.coalescer.submit(intent.id, parameter, write, device_id)
+                return f"V redu, nastavljam na {deg_tozilnik(parameter)}."
+
+        return await self._dispatch(intent, parameter)
+
+    async def _dispatch(self, intent: Intent, parameter: float | None) -> str:
+        candidates = self._candidates(intent)
+        for attempt, state in enumerate(candidates):
+            started, requests = time.monotonic(), state.backend.requests
+            try:
+                answer = await state.backend.run(intent, parameter)
+            except BACKEND_ERRORS as e:
+                state.failed()
+                if attempt == len(candidates) - 1:
+                    raise
+                log.warning(f"{intent.name} failed on {state.backend.name}, failing over: {e}")
+                continue
+
+            # A cached answer says nothing about how fast the backend is
+            elapsed = time.monotonic() - started if state.backend.requests != requests else None
+            state.succeeded(intent, elapsed)
+            return answer
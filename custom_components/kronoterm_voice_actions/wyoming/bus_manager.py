@@ -0,0 +1,75 @@
+"""Heat pumps reachable by the custom agent, grouped by the Modbus bus they share."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, TypeVar
+
+from .const import CONF_MODBUS_BUSES, CONF_SLAVE_IDS, MODBUS_SLAVE_ID
+from .error import UnknownHeatPumpError
+from .modbus_transport import ModbusTransport, release_transport, transport_from_config
+from .mqtt_client import MqttClient
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BusManager:
+    """Numbered heat pumps, several slave IDs per bus and any number of buses.
+
+    Heat pumps are numbered from 1 in configuration order, which is how voice commands
+    address them ("toplotna črpalka dva"). Each physical bus has one pooled transport
+    whose lock serializes its transactions, so heat pumps on the same bus take turns
+    while separate buses work in parallel.
+    """
+
+    def __init__(self, heat_pumps: Mapping[int, MqttClient]):
+        if not heat_pumps:
+            raise ValueError("At least one heat pump is required")
+        self.heat_pumps = dict(heat_pumps)
+
+    @classmethod
+    def from_config(cls, data: Mapping[str, Any]) -> "BusManager":
+        """Create clients for every bus and slave ID in config entry data.
+
+        Entries without a bus list describe a single bus in their top level keys.
+        """
+        heat_pumps = {}
+        for bus in data.get(CONF_MODBUS_BUSES) or [data]:
+            transport = transport_from_config(bus)
+            for slave_id in bus.get(CONF_SLAVE_IDS) or [MODBUS_SLAVE_ID]:
+                number = len(heat_pumps) + 1
+                heat_pumps[number] = MqttClient(transport=transport, slave_id=slave_id)
+                log.debug(f"Heat pump {number} is slave {slave_id} on {type(transport).__name__}")
+
+        return cls(heat_pumps)
+
+    def client(self, number: int = 1) -> MqttClient:
+        """Return the client of a heat pump by its number.
+        :raises UnknownHeatPumpError: if no heat pump has that number
+        """
+        try:
+            return self.heat_pumps[number]
+        except KeyError:
+            raise UnknownHeatPumpError(number) from None
+
+    @property
+    def buses(self) -> dict[ModbusTransport, list[int]]:
+        """Heat pump numbers on every physical bus."""
+        buses: dict[ModbusTransport, list[int]] = {}
+        for number, client in self.heat_pumps.items():
+            buses.setdefault(client.transport, []).append(number)
+        return buses
+
+    def close(self) -> None:
+        """Release the transport of every bus, closing those no other entry shares."""
+        for transport in self.buses:
+            release_transport(transport)
+
+    async def for_each(self, func: Callable[[MqttClient], Awaitable[T]]) -> dict[int, T]:
+        """Run func for every heat pump, concurrently across buses.
+        :return: results keyed by heat pump number
+        """
+        results = await asyncio.gather(*(func(client) for client in self.heat_pumps.values()))
+        return dict(zip(self.heat_pumps, results))
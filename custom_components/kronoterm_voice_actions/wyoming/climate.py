@@ -0,0 +1,124 @@
+"""Climate entities for the heating loops, backed by the cloud coordinator."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.climate import (
+    ClimateEntity,
+    ClimateEntityFeature,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .cloud_coordinator import KronotermCloudCoordinator
+from .const import DOMAIN
+from .entity import KronotermCloudEntity
+from .kronoterm_enums import HeatingLoop, HeatingLoopMode
+from .kronoterm_models import LoopView
+
+if TYPE_CHECKING:
+    from .models import DomainDataItem
+
+_HVAC_MODES: dict[HeatingLoopMode, HVACMode] = {
+    HeatingLoopMode.OFF: HVACMode.OFF,
+    HeatingLoopMode.ON: HVACMode.HEAT,
+    HeatingLoopMode.AUTO: HVACMode.AUTO,
+}
+_LOOP_MODES = {hvac_mode: mode for mode, hvac_mode in _HVAC_MODES.items()}
+
+_LOOP_NAMES = {
+    HeatingLoop.HEATING_LOOP_1: "Heating loop 1",
+    HeatingLoop.HEATING_LOOP_2: "Heating loop 2",
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up heating loop climate entities."""
+    item: DomainDataItem = hass.data[DOMAIN][config_entry.entry_id]
+
+    # The loops are only reachable through the cloud
+    if item.coordinator is None:
+        return
+
+    async_add_entities(
+        KronotermLoopClimate(item.coordinator, config_entry, loop) for loop in _LOOP_NAMES
+    )
+
+
+class KronotermLoopClimate(KronotermCloudEntity, ClimateEntity):
+    """Target temperature and mode of one heating loop."""
+
+    _attr_hvac_modes = list(_HVAC_MODES.values())
+    _attr_supported_features = (
+        ClimateEntityFeature.TARGET_TEMPERATURE
+        | ClimateEntityFeature.TURN_ON
+        | ClimateEntityFeature.TURN_OFF
+    )
+    _attr_target_temperature_step = 0.5
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+
+    def __init__(
+        self,
+        coordinator: KronotermCloudCoordinator,
+        config_entry: ConfigEntry,
+        loop: HeatingLoop,
+    ) -> None:
+        """Initialize entity."""
+        super().__init__(coordinator, config_entry, f"climate-{loop.value}")
+        self._loop = loop
+        self._attr_name = _LOOP_NAMES[loop]
+
+    @property
+    def _state(self) -> LoopView | None:
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.loops[self._loop]
+
+    @property
+    def current_temperature(self) -> float | None:
+        """Return the room temperature, the cloud only reports it for the second loop."""
+        if self.coordinator.data is None or self._loop != HeatingLoop.HEATING_LOOP_2:
+            return None
+        return self.coordinator.data.room_temperature
+
+    @property
+    def target_temperature(self) -> float | None:
+        """Return the target temperature of the loop."""
+        state = self._state
+        return None if state is None else state.target_temperature
+
+    @property
+    def hvac_mode(self) -> HVACMode | None:
+        """Return the mode of the loop."""
+        state = self._state
+        return None if state is None else _HVAC_MODES[state.mode]
+
+    async def async_set_temperature(self, **kwargs: Any) -> None:
+        """Set a new target temperature."""
+        if (temperature := kwargs.get(ATTR_TEMPERATURE)) is not None:
+            if not await self.coordinator.async_set_target_temperature(self._loop, temperature):
+                raise HomeAssistantError(
+                    f"Kronoterm cloud refused target temperature {temperature} for {self._loop.name}"
+                )
+
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        """Set a new mode."""
+        if not await self.coordinator.async_set_loop_mode(self._loop, _LOOP_MODES[hvac_mode]):
+            raise HomeAssistantError(f"Kronoterm cloud refused mode {hvac_mode} for {self._loop.name}")
+
+    async def async_turn_on(self) -> None:
+        """Turn the loop on."""
+        await self.async_set_hvac_mode(HVACMode.HEAT)
+
+    async def async_turn_off(self) -> None:
+        """Turn the loop off."""
+        await self.async_set_hvac_mode(HVACMode.OFF)
@@ -0,0 +1,84 @@
+"""Periodic polling of the full Kronoterm cloud state."""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from aiohttp import ClientError
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import CLOUD_MAX_POLL_INTERVAL, CLOUD_POLL_INTERVAL
+from .error import CloudAuthError
+from .kronoterm_cloud_api import KronotermCloudApi
+from .kronoterm_enums import HeatingLoop, HeatingLoopMode
+from .kronoterm_models import CloudState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def backoff_interval(
+    interval: timedelta,
+    failures: int,
+    maximum: timedelta = CLOUD_MAX_POLL_INTERVAL,
+) -> timedelta:
+    """Poll interval after a number of consecutive failed polls, doubled per failure."""
+    return min(interval * 2 ** failures, max(interval, maximum))
+
+
+class KronotermCloudCoordinator(DataUpdateCoordinator[CloudState]):
+    """Polls the full cloud state, the one source of cloud data for entities and voice answers.
+
+    Entities and the conversation agent read the last state instead of asking the
+    cloud themselves. Every failed poll doubles the interval up to
+    CLOUD_MAX_POLL_INTERVAL, the first successful one restores it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        cloud: KronotermCloudApi,
+        config_entry: ConfigEntry | None = None,
+        interval: timedelta = CLOUD_POLL_INTERVAL,
+    ):
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name="Kronoterm cloud",
+            update_interval=interval,
+        )
+        self.cloud = cloud
+        self.interval = interval
+        self.failures = 0
+
+    async def _async_update_data(self) -> CloudState:
+        try:
+            state = await self.cloud.get_full_state()
+        except (CloudAuthError, ClientError, asyncio.TimeoutError, KeyError, ValueError) as err:
+            self.failures += 1
+            self.update_interval = backoff_interval(self.interval, self.failures)
+            raise UpdateFailed(f"Reading the Kronoterm cloud failed: {err}") from err
+
+        if self.failures:
+            _LOGGER.debug("Cloud reachable again after %d failed polls", self.failures)
+        self.failures = 0
+        self.update_interval = self.interval
+        return state
+
+    async def async_set_target_temperature(self, loop: HeatingLoop, temperature: float) -> bool:
+        """Change the target temperature of a loop and read the state back.
+        :return: True if the cloud accepted the change
+        """
+        success = await self.cloud.set_heating_loop_target_temperature(loop, temperature)
+        await self.async_request_refresh()
+        return success
+
+    async def async_set_loop_mode(self, loop: HeatingLoop, mode: HeatingLoopMode) -> bool:
+        """Change the mode of a loop and read the state back.
+        :return: True if the cloud accepted the change
+        """
+        success = await self.cloud.set_heating_loop_mode(loop, mode)
+        await self.async_request_refresh()
+        return success
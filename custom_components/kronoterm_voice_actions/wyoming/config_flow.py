@@ -15,8 +15,29 @@ from homeassistant.helpers import selector
 from homeassistant.helpers.service_info.hassio import HassioServiceInfo
 from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 
-from .const import DOMAIN
+from .const import (
+    CONF_ADD_BUS,
+    CONF_HISTORY_RETENTION_DAYS,
+    CONF_HISTORY_STORE,
+    CONF_MODBUS_BUSES,
+    CONF_MODBUS_HOST,
+    CONF_MODBUS_PORT,
+    CONF_MODBUS_RETRIES,
+    CONF_MODBUS_TIMEOUT,
+    CONF_MODBUS_TRANSPORT,
+    CONF_SLAVE_IDS,
+    CONF_USB_PORT,
+    DEFAULT_MODBUS_RETRIES,
+    DEFAULT_MODBUS_TCP_PORT,
+    DEFAULT_MODBUS_TIMEOUT,
+    DOMAIN,
+    MODBUS_SLAVE_ID,
+    MODBUS_TRANSPORT_RTU_OVER_TCP,
+    MODBUS_TRANSPORT_SERIAL,
+    MODBUS_TRANSPORT_TCP,
+)
 from .data import WyomingService
+from .history_store import DEFAULT_RETENTION_DAYS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -77,6 +98,52 @@ STEP_CUSTOM_AGENT_AUTH_SCHEMA = vol.Schema(
     }
 )
 
+STEP_CUSTOM_AGENT_MODBUS_SCHEMA = vol.Schema(
+    {
+        vol.Required(
+            CONF_MODBUS_TRANSPORT, default=MODBUS_TRANSPORT_SERIAL
+        ): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=[
+                    selector.SelectOptionDict(
+                        value=MODBUS_TRANSPORT_SERIAL,
+                        label="Local RS-485 USB adapter",
+                    ),
+                    selector.SelectOptionDict(
+                        value=MODBUS_TRANSPORT_TCP,
+                        label="Modbus TCP gateway",
+                    ),
+                    selector.SelectOptionDict(
+                        value=MODBUS_TRANSPORT_RTU_OVER_TCP,
+                        label="RTU over TCP (transparent RS-485-to-Ethernet gateway)",
+                    ),
+                ],
+                mode=selector.SelectSelectorMode.LIST,
+            )
+        ),
+        vol.Optional(CONF_USB_PORT, default=0): int,
+        vol.Optional(CONF_MODBUS_HOST): str,
+        vol.Optional(CONF_MODBUS_PORT, default=DEFAULT_MODBUS_TCP_PORT): int,
+        vol.Optional(CONF_MODBUS_TIMEOUT, default=DEFAULT_MODBUS_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=30)
+        ),
+        vol.Optional(CONF_MODBUS_RETRIES, default=DEFAULT_MODBUS_RETRIES): vol.All(
+            int, vol.Range(min=0, max=10)
+        ),
+        vol.Optional(CONF_SLAVE_IDS, default=str(MODBUS_SLAVE_ID)): str,
+        vol.Optional(CONF_ADD_BUS, default=False): bool,
+    }
+)
+
+STEP_CUSTOM_AGENT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_HISTORY_STORE, default=False): bool,
+        vol.Optional(CONF_HISTORY_RETENTION_DAYS, default=DEFAULT_RETENTION_DAYS): vol.All(
+            int, vol.Range(min=1, max=3650)
+        ),
+    }
+)
+
 STEP_CONFIRM_SCHEMA = vol.Schema({})
 
 
@@ -94,6 +161,21 @@ async def _validate_remote_connection(
     return None, name
 
 
+def _parse_slave_ids(value: str) -> list[int] | None:
+    """Parse a comma separated list of Modbus slave IDs, None if it is not valid."""
+    try:
+        slave_ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        return None
+
+    if not slave_ids or len(set(slave_ids)) != len(slave_ids):
+        return None
+    if not all(1 <= slave_id <= 247 for slave_id in slave_ids):
+        return None
+
+    return slave_ids
+
+
 class WyomingConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Wyoming integration."""
 
@@ -103,6 +185,9 @@ class WyomingConfigFlow(ConfigFlow, domain=DOMAIN):
     _host: str | None = None
     _port: int | None = None
     _discovered_name: str | None = None
+    _username: str | None = None
+    _password: str | None = None
+    _buses: list[dict[str, Any]]
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -181,30 +266,99 @@ class WyomingConfigFlow(ConfigFlow, domain=DOMAIN):
         description_placeholders = {"name": "Kronoterm Conversation Agent"}
 
         if user_input is not None:
-            username = user_input[CONF_USERNAME]
-            password = user_input[CONF_PASSWORD]
+            self._username = user_input[CONF_USERNAME]
+            self._password = user_input[CONF_PASSWORD]
+            self._buses = []
+            return await self.async_step_custom_agent_modbus()
+
+        return self.async_show_form(
+            step_id="custom_agent_auth",
+            data_schema=STEP_CUSTOM_AGENT_AUTH_SCHEMA,
+            description_placeholders=description_placeholders,
+            errors=errors,
+        )
+
+    async def async_step_custom_agent_modbus(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the Modbus transport selection for the custom agent, once per bus."""
+        errors: dict[str, str] = {}
+        description_placeholders = {
+            "name": "Kronoterm Conversation Agent",
+            "bus": str(len(self._buses) + 1),
+        }
+
+        if user_input is not None:
+            transport = user_input[CONF_MODBUS_TRANSPORT]
+            if transport != MODBUS_TRANSPORT_SERIAL and not user_input.get(CONF_MODBUS_HOST):
+                errors[CONF_MODBUS_HOST] = "host_required"
+
+            slave_ids = _parse_slave_ids(user_input.get(CONF_SLAVE_IDS, str(MODBUS_SLAVE_ID)))
+            if slave_ids is None:
+                errors[CONF_SLAVE_IDS] = "invalid_slave_ids"
 
             if not errors:
-                _LOGGER.debug(
-                    "Creating custom agent entry. Title: '%s'",
-                    description_placeholders["name"],
-                )
-                return self.async_create_entry(
-                    title=description_placeholders["name"],
-                    data={
-                        CONF_USERNAME: username,
-                        CONF_PASSWORD: password,
-                        CONF_TYPE: ENTRY_TYPE_CUSTOM,
-                    },
+                self._buses.append(
+                    {
+                        CONF_MODBUS_TRANSPORT: transport,
+                        CONF_USB_PORT: user_input.get(CONF_USB_PORT, 0),
+                        CONF_MODBUS_HOST: user_input.get(CONF_MODBUS_HOST),
+                        CONF_MODBUS_PORT: user_input.get(
+                            CONF_MODBUS_PORT, DEFAULT_MODBUS_TCP_PORT
+                        ),
+                        CONF_MODBUS_TIMEOUT: user_input.get(
+                            CONF_MODBUS_TIMEOUT, DEFAULT_MODBUS_TIMEOUT
+                        ),
+                        CONF_MODBUS_RETRIES: user_input.get(
+                            CONF_MODBUS_RETRIES, DEFAULT_MODBUS_RETRIES
+                        ),
+                        CONF_SLAVE_IDS: slave_ids,
+                    }
                 )
+                if user_input.get(CONF_ADD_BUS):
+                    return await self.async_step_custom_agent_modbus()
+
+                return await self.async_step_custom_agent_history()
 
         return self.async_show_form(
-            step_id="custom_agent_auth",
-            data_schema=STEP_CUSTOM_AGENT_AUTH_SCHEMA,
+            step_id="custom_agent_modbus",
+            data_schema=STEP_CUSTOM_AGENT_MODBUS_SCHEMA,
             description_placeholders=description_placeholders,
             errors=errors,
         )
 
+    async def async_step_custom_agent_history(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the optional on-disk register history for the custom agent."""
+        description_placeholders = {"name": "Kronoterm Conversation Agent"}
+
+        if user_input is not None:
+            _LOGGER.debug(
+                "Creating custom agent entry. Title: '%s', buses: %s",
+                description_placeholders["name"],
+                self._buses,
+            )
+            return self.async_create_entry(
+                title=description_placeholders["name"],
+                data={
+                    CONF_USERNAME: self._username,
+                    CONF_PASSWORD: self._password,
+                    CONF_TYPE: ENTRY_TYPE_CUSTOM,
+                    CONF_MODBUS_BUSES: self._buses,
+                    CONF_HISTORY_STORE: user_input.get(CONF_HISTORY_STORE, False),
+                    CONF_HISTORY_RETENTION_DAYS: user_input.get(
+                        CONF_HISTORY_RETENTION_DAYS, DEFAULT_RETENTION_DAYS
+                    ),
+                },
+            )
+
+        return self.async_show_form(
+            step_id="custom_agent_history",
+            data_schema=STEP_CUSTOM_AGENT_HISTORY_SCHEMA,
+            description_placeholders=description_placeholders,
+        )
+
     async def async_step_hassio(
         self, discovery_info: HassioServiceInfo
     ) -> ConfigFlowResult:
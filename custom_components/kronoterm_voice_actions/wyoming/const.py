@@ -1,5 +1,7 @@
 """Constants for the integration."""
 
+from datetime import timedelta
+
 DOMAIN = "wyoming"
 
 SAMPLE_RATE = 16000
@@ -9,4 +11,44 @@ SAMPLE_CHANNELS = 1
 # For multi-speaker voices, this is the name of the selected speaker.
 ATTR_SPEAKER = "speaker"
 
-MODBUS_SLAVE_ID = 20
\ No newline at end of file
+MODBUS_SLAVE_ID = 20
+
+# Several buses, each with one or more heat pumps addressed by slave ID
+CONF_MODBUS_BUSES = "modbus_buses"
+CONF_SLAVE_IDS = "slave_ids"
+CONF_ADD_BUS = "add_bus"
+
+# Modbus transport selection for the custom agent
+CONF_MODBUS_TRANSPORT = "modbus_transport"
+CONF_MODBUS_HOST = "modbus_host"
+CONF_MODBUS_PORT = "modbus_port"
+CONF_USB_PORT = "usb_port"
+
+MODBUS_TRANSPORT_SERIAL = "serial"
+MODBUS_TRANSPORT_TCP = "tcp"
+MODBUS_TRANSPORT_RTU_OVER_TCP = "rtu_over_tcp"
+
+DEFAULT_MODBUS_TCP_PORT = 502
+
+# Per-transaction deadline in seconds and retries after a failed attempt
+CONF_MODBUS_TIMEOUT = "modbus_timeout"
+CONF_MODBUS_RETRIES = "modbus_retries"
+DEFAULT_MODBUS_TIMEOUT = 2.0
+DEFAULT_MODBUS_RETRIES = 2
+
+# Optional on-disk history of every poll, kept in the config directory
+CONF_HISTORY_STORE = "history_store"
+CONF_HISTORY_RETENTION_DAYS = "history_retention_days"
+HISTORY_STORE_DIRECTORY = "kronoterm_history"
+
+# Register polling
+DEFAULT_POLL_INTERVAL = timedelta(seconds=30)
+SIGNAL_REGISTERS_UPDATED = "wyoming_kronoterm_registers_updated"
+EVENT_REGISTERS_CHANGED = "wyoming_kronoterm_registers_changed"
+# Fired when a coalesced setpoint write lands or fails, with its spoken confirmation and the
+# device the change was spoken to
+EVENT_SETPOINT_WRITTEN = "wyoming_kronoterm_setpoint_written"
+
+# Cloud polling, failed polls back off up to the maximum interval
+CLOUD_POLL_INTERVAL = timedelta(minutes=1)
+CLOUD_MAX_POLL_INTERVAL = timedelta(minutes=15)
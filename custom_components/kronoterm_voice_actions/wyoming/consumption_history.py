@@ -0,0 +1,171 @@
+"""Theoretical use series of the Kronoterm cloud, with finished days cached on disk."""
+
+import asyncio
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .kronoterm_cloud_api import CLOUD_CONCURRENCY, KronotermCloudApi
+from .kronoterm_enums import ConsumptionPeriod
+from .kronoterm_models import ConsumptionTrend
+
+_LOGGER = logging.getLogger(__name__)
+
+# Version 1 cached periods the moment they ended and version 2 cached weeks, months and years,
+# their entries are dropped rather than trusted. Bump whenever the period to d1 mapping of
+# get_theoretical_use_data changes for a cached period.
+STORAGE_VERSION = 3
+# Fetched periods are written out together rather than once per period
+STORAGE_SAVE_DELAY = 30
+
+# Longest range one request for series may span, in periods
+MAX_PERIODS = 400
+
+# A period is cached only this long after it ended, the cloud keeps filling in late readings
+# and its day boundary need not match the local one
+CACHE_GRACE = timedelta(days=2)
+
+# Periods kept on disk. The d1 the cloud expects for weeks, months and years is not verified
+# yet, so those are always fetched rather than risk keeping a wrong answer for good.
+CACHED_PERIODS = frozenset({ConsumptionPeriod.DAY})
+
+def period_start(period: ConsumptionPeriod, day: date) -> date:
+    """First day of the period that contains a day, weeks start on Monday."""
+    match period:
+        case ConsumptionPeriod.DAY:
+            return day
+        case ConsumptionPeriod.WEEK:
+            return day - timedelta(days=day.weekday())
+        case ConsumptionPeriod.MONTH:
+            return day.replace(day=1)
+        case ConsumptionPeriod.YEAR:
+            return day.replace(month=1, day=1)
+
+
+def next_period(period: ConsumptionPeriod, start: date) -> date:
+    """First day of the period after the one starting on start."""
+    match period:
+        case ConsumptionPeriod.DAY:
+            return start + timedelta(days=1)
+        case ConsumptionPeriod.WEEK:
+            return start + timedelta(weeks=1)
+        case ConsumptionPeriod.MONTH:
+            return (start + timedelta(days=32)).replace(day=1)
+        case ConsumptionPeriod.YEAR:
+            return start.replace(year=start.year + 1)
+
+
+def is_settled(period: ConsumptionPeriod, start: date, today: date) -> bool:
+    """Whether the period starting on start ended at least CACHE_GRACE before today."""
+    return next_period(period, start) + CACHE_GRACE <= today
+
+
+def period_starts(period: ConsumptionPeriod, since: date, until: date) -> Iterator[date]:
+    """Starts of the periods that overlap [since, until] in order."""
+    start = period_start(period, since)
+    while start <= until:
+        yield start
+        start = next_period(period, start)
+
+
+@dataclass(frozen=True)
+class ConsumptionSeries:
+    """Theoretical use of one period, an array of values per consumer as the cloud graphs them."""
+
+    period: ConsumptionPeriod
+    start: date
+    trend: ConsumptionTrend
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"period": self.period.value, "start": self.start.isoformat(), "trend": self.trend.as_dict()}
+
+
+class _ConsumptionStore(Store[dict[str, dict[str, list[float]]]]):
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict
+    ) -> dict[str, dict[str, list[float]]]:
+        # The cache can always be fetched again, older layouts are not worth converting
+        return {}
+
+
+class ConsumptionHistory:
+    """Theoretical use series across ranges of days, weeks, months or years.
+
+    A day that ended more than CACHE_GRACE ago no longer changes, so it is fetched once
+    and kept in a Home Assistant Store. Later days and every longer period are fetched
+    again on every request.
+    """
+
+    def __init__(self, hass: HomeAssistant, cloud: KronotermCloudApi, key: str):
+        self.hass = hass
+        self.cloud = cloud
+        self._store = _ConsumptionStore(hass, STORAGE_VERSION, f"{DOMAIN}.consumption.{key}")
+        # Cached trends keyed by period and start, loaded and parsed on first use
+        self._periods: dict[str, ConsumptionTrend] | None = None
+        self._load_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(CLOUD_CONCURRENCY)
+
+    @staticmethod
+    def _key(period: ConsumptionPeriod, start: date) -> str:
+        return f"{period.value}/{start.isoformat()}"
+
+    async def _async_periods(self) -> dict[str, ConsumptionTrend]:
+        async with self._load_lock:
+            if self._periods is None:
+                stored = await self._store.async_load() or {}
+                self._periods = {key: ConsumptionTrend.parse(trend) for key, trend in stored.items()}
+            return self._periods
+
+    async def _async_fetch(self, period: ConsumptionPeriod, start: date) -> ConsumptionTrend:
+        async with self._semaphore:
+            return await self.cloud.get_consumption_trend(period, start)
+
+    async def async_series(
+        self, period: ConsumptionPeriod, since: date, until: date | None = None
+    ) -> list[ConsumptionSeries]:
+        """Series of every period overlapping [since, until], until defaults to today.
+        :raises ValueError: if the range is empty or spans more than MAX_PERIODS periods
+        """
+        today = date.today()
+        until = min(until or today, today)
+        starts = list(period_starts(period, since, until))
+        if not starts:
+            raise ValueError("Empty range")
+        if len(starts) > MAX_PERIODS:
+            raise ValueError(f"Range spans more than {MAX_PERIODS} periods")
+
+        periods = await self._async_periods()
+        cached = period in CACHED_PERIODS
+        missing = [
+            start for start in starts
+            if not cached or self._key(period, start) not in periods or not is_settled(period, start, today)
+        ]
+        trends = await asyncio.gather(*(self._async_fetch(period, start) for start in missing))
+
+        settled = 0
+        for start, trend in zip(missing, trends):
+            # Recent periods may still change and are never kept
+            if cached and is_settled(period, start, today):
+                periods[self._key(period, start)] = trend
+                settled += 1
+        if settled:
+            _LOGGER.debug("Caching %d settled %s periods", settled, period.value)
+            self._store.async_delay_save(
+                lambda: {key: trend.as_dict() for key, trend in periods.items()}, STORAGE_SAVE_DELAY
+            )
+
+        fetched = dict(zip(missing, trends))
+        return [
+            ConsumptionSeries(
+                period,
+                start,
+                fetched[start] if start in fetched else periods[self._key(period, start)],
+            )
+            for start in starts
+        ]
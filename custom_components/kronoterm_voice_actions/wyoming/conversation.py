@@ -10,8 +10,19 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers import intent
 from homeassistant.util import ulid as ulid_util
 
-from .mqtt_client import MqttClient
-from .matcher import match_command
+from .backend_router import BackendRouter
+from .bus_manager import BusManager
+from .const import DOMAIN
+from .error import (
+    CloudAuthError,
+    CloudRefusedError,
+    ModbusTimeoutError,
+    ModbusTransactionError,
+    SetpointRangeError,
+    UnknownHeatPumpError,
+)
+from .mqtt_client import MqttClient, deg_imenovalnik
+from .matcher import match_heat_pump
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,6 +67,9 @@ class WyomingConversationEntity(
 
         self._attr_unique_id = f"{config_entry.entry_id}-conversation"
 
+        self.buses: BusManager = hass.data[DOMAIN][config_entry.entry_id].buses
+        self.router: BackendRouter | None = hass.data[DOMAIN][config_entry.entry_id].router
+
         _LOGGER.debug(
             "Initialized custom conversation agent: %s (ID: %s)",
             self._attr_name,
@@ -76,11 +90,50 @@ class WyomingConversationEntity(
         intent_response = intent.IntentResponse(language=user_input.language)
 
         try:
-            response = await execute_command(user_input.text)
+            response = await execute_command(
+                user_input.text, self.buses, self.router, user_input.device_id
+            )
             intent_response.async_set_speech(response)
         except ValueError:
             intent_response.async_set_speech("Oprostite, tega nisem razumel.")
 
+        except UnknownHeatPumpError as e:
+            intent_response.async_set_speech(f"Toplotna črpalka {e.number} ni nastavljena.")
+
+        except SetpointRangeError as e:
+            intent_response.async_set_speech(
+                f"Izbrana temperatura {deg_imenovalnik(e.value)} ni v podprtem območju "
+                f"od {e.minimum:g} do {e.maximum:g} stopinj."
+            )
+
+        except ModbusTimeoutError as e:
+            _LOGGER.warning("Heat pump did not respond: %s", e)
+            intent_response.async_set_speech("Toplotna črpalka se ne odziva.")
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.FAILED_TO_HANDLE, str(e)
+            )
+
+        except ModbusTransactionError as e:
+            _LOGGER.warning("Heat pump communication failed: %s", e)
+            intent_response.async_set_speech("Povezava s toplotno črpalko ni uspela.")
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.FAILED_TO_HANDLE, str(e)
+            )
+
+        except CloudAuthError as e:
+            _LOGGER.warning("Kronoterm cloud login failed: %s", e)
+            intent_response.async_set_speech("Prijava v oblak Kronoterm ni uspela.")
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.FAILED_TO_HANDLE, str(e)
+            )
+
+        except CloudRefusedError as e:
+            _LOGGER.warning("Kronoterm cloud refused the change: %s", e)
+            intent_response.async_set_speech("Oblak Kronoterm spremembe ni sprejel.")
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.FAILED_TO_HANDLE, str(e)
+            )
+
         except Exception as e:
             _LOGGER.exception("Error during command execution" + str(e))
             intent_response.async_set_speech("Pri izvajanju je prišlo do napake")
@@ -96,8 +149,16 @@ class WyomingConversationEntity(
         )
 
 
-async def execute_command(text: str) -> str:
-    client = MqttClient()
-    commands = client.map_template_to_function.keys()
-    action, parameter = match_command(text, commands)
-    return await client.invoke_kronoterm_action(action, parameter)
\ No newline at end of file
+async def execute_command(
+    text: str,
+    buses: BusManager | None = None,
+    router: BackendRouter | None = None,
+    device_id: str | None = None,
+) -> str:
+    number, text = match_heat_pump(text)
+    client = MqttClient() if buses is None else buses.client(number or 1)
+    intent_id, parameter = client.intents.match(text)
+    # The router reaches the first heat pump, the one a cloud account belongs to
+    if router is not None and (number or 1) == 1:
+        return await router.run(intent_id, parameter, device_id)
+    return await client.invoke_intent(intent_id, parameter)
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Energy use and effective COP from the cumulative energy counters of the heat pump."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from .history_store import HistoryStore
+from .kronoterm_models import RegisterAddress
+from .register_decoder import REGISTER_SPECS
+from .snapshot_history import SnapshotHistory
+
+ELECTRIC_KEY = REGISTER_SPECS[RegisterAddress.ENERGY_ELECTRIC_HIGH].key
+HEAT_KEY = REGISTER_SPECS[RegisterAddress.ENERGY_HEAT_HIGH].key
+ENERGY_KEYS = (ELECTRIC_KEY, HEAT_KEY)
+
+WEEK_DAYS = 7
+# Readings before the first day still count, the first increment of the day spans midnight
+LOOKBACK = 3600
+# Sensors and voice answers share one computation for this long
+CACHE_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class EnergyPeriod:
+    """Electric energy used and heat produced over a period in kWh."""
+
+    electric: float
+    heat: float
+
+    @property
+    def cop(self) -> float | None:
+        """Effective coefficient of performance, None if no electric energy was used."""
+        if self.electric <= 0:
+            return None
+        return self.heat / self.electric
+
+    def __add__(self, other: "EnergyPeriod") -> "EnergyPeriod":
+        return EnergyPeriod(self.electric + other.electric, self.heat + other.heat)
+
+
+def daily_energy(times: np.ndarray, values: np.ndarray, edges: np.ndarray) -> list[EnergyPeriod]:
+    """Counter increases between consecutive day edges.
+
+    Each increase between two known readings is booked on the day of the later one.
+    Readings that go down, after a counter reset or a replaced controller, add nothing.
+    :param times: sample timestamps in time order
+    :param values: one column of electric and one of heat counter readings, NaN where unknown
+    :param edges: ascending day boundaries, one more than the number of days
+    """
+    totals = []
+    for column in range(len(ENERGY_KEYS)):
+        known = ~np.isnan(values[:, column])
+        readings = values[known, column].astype(np.float64)
+        increments = np.clip(np.diff(readings), 0.0, None)
+        days = np.searchsorted(edges, times[known][1:], side="right") - 1
+        inside = (days >= 0) & (days < len(edges) - 1)
+        totals.append(np.bincount(days[inside], weights=increments[inside], minlength=len(edges) - 1))
+
+    return [EnergyPeriod(float(electric), float(heat)) for electric, heat in zip(*totals)]
+
+
+def _day_edges(days: int) -> list[float]:
+    # Local midnights through date arithmetic, so days around DST changes keep their real length
+    today = date.today()
+    edges = [
+        datetime.combine(today - timedelta(days=offset), datetime.min.time()).timestamp()
+        for offset in range(days - 1, -1, -1)
+    ]
+    return [*edges, time.time()]
+
+
+class EnergyAnalytics:
+    """Daily and weekly energy over the sampled snapshots, without reading the bus.
+
+    Windows the in-memory history still covers are computed from it, longer ones
+    from the on-disk store when one is configured.
+    """
+
+    def __init__(self, history: SnapshotHistory, store: HistoryStore | None = None):
+        self.history = history
+        self.store = store
+        self._lock = asyncio.Lock()
+        self._days: list[EnergyPeriod] | None = None
+        self._expires = 0.0
+
+    async def async_days(self) -> list[EnergyPeriod] | None:
+        """Energy of the last WEEK_DAYS local calendar days, today last.
+        :return: None until at least two readings of the counters are known
+        """
+        async with self._lock:
+            if time.monotonic() >= self._expires:
+                self._days = await self._async_compute()
+                self._expires = time.monotonic() + CACHE_SECONDS
+            return self._days
+
+    async def async_today(self) -> EnergyPeriod | None:
+        days = await self.async_days()
+        return None if days is None else days[-1]
+
+    async def async_week(self) -> EnergyPeriod | None:
+        days = await self.async_days()
+        return None if days is None else sum(days[1:], days[0])
+
+    async def _async_compute(self) -> list[EnergyPeriod] | None:
+        edges = _day_edges(WEEK_DAYS)
+        since = edges[0] - LOOKBACK
+        oldest = self.history.oldest
+        if self.store is not None and (oldest is None or since < oldest):
+            times, values = await asyncio.to_thread(self.store.scan, ENERGY_KEYS, since, edges[-1])
+        else:
+            times, values = self.history.series(ENERGY_KEYS, since, edges[-1])
+
+        if np.count_nonzero(~np.isnan(values[:, 0])) < 2:
+            return None
+        return daily_energy(times, values, np.array(edges))
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import entity
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .cloud_coordinator import KronotermCloudCoordinator
 from .const import DOMAIN
 from .devices import SatelliteDevice
 
@@ -23,3 +26,35 @@ class WyomingSatelliteEntity(entity.Entity):
             identifiers={(DOMAIN, device.satellite_id)},
             entry_type=DeviceEntryType.SERVICE,
         )
+
+
+class KronotermHeatPumpEntity(entity.Entity):
+    """Entity of the heat pump reached by the custom Kronoterm agent."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, config_entry: ConfigEntry, key: str) -> None:
+        """Initialize entity."""
+        self._attr_unique_id = f"{config_entry.entry_id}-{key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{config_entry.entry_id}-heat-pump")},
+            manufacturer="Kronoterm",
+            name="Kronoterm heat pump",
+        )
+
+
+class KronotermCloudEntity(
+    CoordinatorEntity[KronotermCloudCoordinator], KronotermHeatPumpEntity
+):
+    """Entity of the heat pump backed by the state the cloud coordinator polled last."""
+
+    def __init__(
+        self,
+        coordinator: KronotermCloudCoordinator,
+        config_entry: ConfigEntry,
+        key: str,
+    ) -> None:
+        """Initialize entity."""
+        CoordinatorEntity.__init__(self, coordinator)
+        KronotermHeatPumpEntity.__init__(self, config_entry, f"cloud-{key}")
@@ -5,3 +5,37 @@ from homeassistant.exceptions import HomeAssistantError
 
 class WyomingError(HomeAssistantError):
     """Base class for Wyoming errors."""
+
+
+class ModbusTransactionError(WyomingError):
+    """A Modbus transaction with the heat pump failed after all retries."""
+
+
+class ModbusTimeoutError(ModbusTransactionError):
+    """The heat pump did not answer a Modbus transaction in time."""
+
+
+class UnknownHeatPumpError(WyomingError):
+    """A voice command addressed a heat pump that is not configured."""
+
+    def __init__(self, number: int):
+        super().__init__(f"Heat pump {number} is not configured")
+        self.number = number
+
+
+class SetpointRangeError(WyomingError):
+    """A voice command asked for a setpoint outside the range its register accepts."""
+
+    def __init__(self, value: float, minimum: float, maximum: float):
+        super().__init__(f"Setpoint {value} is outside of {minimum:g} to {maximum:g}")
+        self.value = value
+        self.minimum = minimum
+        self.maximum = maximum
+
+
+class CloudAuthError(WyomingError):
+    """The Kronoterm cloud rejected the login or the session right after logging in."""
+
+
+class CloudRefusedError(WyomingError):
+    """The Kronoterm cloud answered a change but did not apply it."""
@@ -0,0 +1,240 @@
+"""Append-only on-disk history of register snapshots in daily segment files.
+
+Every segment starts with a header naming its columns, followed by fixed-width
+records of a timestamp, one float32 per value and a CRC32 of the record. Files
+are only ever appended to and read through memory maps, so range scans cost a
+binary search plus a slice. After a power loss a torn or partially written tail
+is truncated when the segment is opened again.
+
+All methods block on file I/O and are meant to run in an executor.
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from .snapshot_history import history_keys
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"KVAH"
+VERSION = 1
+
+# Magic, version, column count and the length of the JSON column list that follows
+_HEADER = struct.Struct("<4sHHI")
+
+# Records written between two fsyncs, at most this many are lost on power loss
+DEFAULT_SYNC_EVERY = 12
+DEFAULT_RETENTION_DAYS = 30
+
+
+def record_dtype(columns: int) -> np.dtype:
+    """Layout of one record with the given number of value columns."""
+    return np.dtype([("time", "<f8"), ("values", "<f4", (columns,)), ("crc", "<u4")])
+
+
+def _day(timestamp: float) -> str:
+    # Segments rotate at UTC midnight so DST changes never reorder records
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def _crc(record: np.ndarray) -> int:
+    return zlib.crc32(record.tobytes()[:-4])
+
+
+class HistorySegment:
+    """Read-only view of one segment file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as file:
+            magic, version, columns, keys_length = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a history segment")
+            self.keys: list[str] = json.loads(file.read(keys_length))
+
+        # Records start 8-byte aligned after the header
+        self.offset = -(-(_HEADER.size + keys_length) // 8) * 8
+        self.dtype = record_dtype(columns)
+
+    @staticmethod
+    def header(keys: Sequence[str]) -> bytes:
+        encoded = json.dumps(list(keys)).encode()
+        header = _HEADER.pack(MAGIC, VERSION, len(keys), len(encoded)) + encoded
+        return header + b"\0" * (-len(header) % 8)
+
+    def __len__(self) -> int:
+        return max(self.path.stat().st_size - self.offset, 0) // self.dtype.itemsize
+
+    def records(self) -> np.ndarray:
+        """Memory-mapped records, empty when the segment has none yet."""
+        count = len(self)
+        if not count:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset, shape=(count,))
+
+    def recover(self) -> int:
+        """Truncate a partial or torn tail left by a power loss.
+        :return: number of bytes removed
+        """
+        size = self.path.stat().st_size
+        count = len(self)
+        records = self.records()
+        while count and _crc(records[count - 1]) != int(records[count - 1]["crc"]):
+            count -= 1
+        del records
+
+        valid = self.offset + count * self.dtype.itemsize
+        if valid < size:
+            with self.path.open("r+b") as file:
+                file.truncate(valid)
+                os.fsync(file.fileno())
+            log.warning(f"Truncated {size - valid} bytes of torn history records in {self.path.name}")
+        return size - valid
+
+
+class HistoryStore:
+    """Appends decoded snapshots to daily segments and scans time ranges across them."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        keys: Iterable[str] | None = None,
+        retention_days: int = DEFAULT_RETENTION_DAYS,
+        sync_every: int = DEFAULT_SYNC_EVERY,
+    ):
+        self.directory = Path(directory)
+        self.keys = list(history_keys() if keys is None else keys)
+        self.retention_days = retention_days
+        self.sync_every = sync_every
+        self._columns = {key: index for index, key in enumerate(self.keys)}
+        self._dtype = record_dtype(len(self.keys))
+        self._file: BinaryIO | None = None
+        self._day: str | None = None
+        self._last_time = float("-inf")
+        self._unsynced = 0
+
+    def append(self, snapshot: Mapping[str, float | int | bool], timestamp: float | None = None) -> bool:
+        """Append one snapshot, values without a column are ignored and missing ones stored as NaN.
+        :return: False if the timestamp is not after the last record, which would break range scans
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._day != _day(timestamp):
+            self._rotate(_day(timestamp))
+        if timestamp <= self._last_time:
+            log.debug(f"Dropping history record at {timestamp}, not after {self._last_time}")
+            return False
+
+        record = np.zeros(1, dtype=self._dtype)
+        record["time"] = timestamp
+        values = np.full(len(self.keys), np.nan, dtype="<f4")
+        for key, value in snapshot.items():
+            column = self._columns.get(key)
+            if column is not None:
+                values[column] = value
+        record["values"] = values
+        record["crc"] = _crc(record[0])
+
+        self._file.write(record.tobytes())
+        self._file.flush()
+        self._last_time = timestamp
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+        return True
+
+    def sync(self) -> None:
+        """Flush appended records to the storage medium."""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """Sync and close the open segment."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def _rotate(self, day: str) -> None:
+        self.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # A segment written with other columns is left alone, records continue in a new one
+        path = self.directory / f"{day}.bin"
+        suffix = 0
+        while path.exists():
+            segment = HistorySegment(path)
+            if segment.keys == self.keys:
+                segment.recover()
+                records = segment.records()
+                if len(records):
+                    self._last_time = max(self._last_time, float(records[-1]["time"]))
+                break
+            suffix += 1
+            path = self.directory / f"{day}.{suffix}.bin"
+        else:
+            with path.open("wb") as file:
+                file.write(HistorySegment.header(self.keys))
+                os.fsync(file.fileno())
+
+        self._file = path.open("ab")
+        self._day = day
+        self.prune()
+
+    def segments(self) -> list[HistorySegment]:
+        """All segments in time order."""
+        paths = sorted(
+            self.directory.glob("*.bin"),
+            key=lambda path: (path.name.split(".")[0], len(path.suffixes), path.name),
+        )
+        return [HistorySegment(path) for path in paths]
+
+    def prune(self) -> None:
+        """Delete segments older than the retention period."""
+        if not self.retention_days:
+            return
+
+        oldest = _day(time.time() - self.retention_days * 86400)
+        for path in self.directory.glob("*.bin"):
+            if path.name.split(".")[0] < oldest:
+                path.unlink()
+                log.debug(f"Deleted expired history segment {path.name}")
+
+    def scan(self, keys: Sequence[str], start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """Records with start <= time <= end across segments.
+        :return: timestamps and a matrix with one column per requested key, NaN where unknown
+        """
+        first, last = _day(start), _day(end)
+        times, values = [], []
+        for segment in self.segments():
+            day = segment.path.name.split(".")[0]
+            if not first <= day <= last:
+                continue
+
+            records = segment.records()
+            low = np.searchsorted(records["time"], start, side="left")
+            high = np.searchsorted(records["time"], end, side="right")
+            if low >= high:
+                continue
+
+            chunk = records[low:high]
+            columns = np.full((len(chunk), len(keys)), np.nan, dtype="<f4")
+            for index, key in enumerate(keys):
+                if key in segment.keys:
+                    columns[:, index] = chunk["values"][:, segment.keys.index(key)]
+            times.append(np.array(chunk["time"]))
+            values.append(columns)
+
+        if not times:
+            return np.empty(0), np.empty((0, len(keys)), dtype="<f4")
+        return np.concatenate(times), np.concatenate(values)
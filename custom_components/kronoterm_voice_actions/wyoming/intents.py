@@ -0,0 +1,118 @@
+"""Voice templates compiled to integer intent IDs and a dense dispatch table."""
+
+import inspect
+import math
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TypeVar
+
+from .kronoterm_models import RegisterAddress
+from .matcher import match_command
+
+Handler = Callable[..., Awaitable[str]]
+H = TypeVar("H", bound=Handler)
+
+# Recently matched utterances, voice commands repeat a lot
+MATCH_CACHE_SIZE = 256
+
+
+def touches(*addrs: RegisterAddress) -> Callable[[H], H]:
+    """Declare the registers a voice handler reads or writes."""
+
+    def decorator(handler: H) -> H:
+        handler.registers = frozenset(addrs)
+        return handler
+
+    return decorator
+
+
+def temperature_slot(value: float | None) -> float:
+    """Validate a spoken temperature.
+    :raises ValueError: if no usable number was heard
+    """
+    if value is None or not math.isfinite(value):
+        raise ValueError("Missing temperature")
+    return float(value)
+
+
+@dataclass(frozen=True)
+class Intent:
+    """Everything needed to run one intent, prepared once when the table is compiled."""
+
+    id: int
+    name: str
+    handler: Handler
+    # Slot validators, one per argument the handler takes after the client
+    slots: tuple[Callable[[float | None], float], ...]
+    registers: frozenset[RegisterAddress]
+
+    @property
+    def arity(self) -> int:
+        return len(self.slots)
+
+    def arguments(self, parameter: float | None) -> tuple[float, ...]:
+        """Validated handler arguments for a matched parameter.
+        :raises ValueError: if a slot is missing or the template takes no parameter but one was heard
+        """
+        if not self.slots:
+            if parameter is not None:
+                raise ValueError(f"Intent {self.name} takes no parameter")
+            return ()
+        return tuple(validate(parameter) for validate in self.slots)
+
+
+class IntentTable:
+    """Templates grouped into intents, one per distinct handler, numbered from 0.
+
+    Intent IDs index the dense ``intents`` list, so dispatch is a list index instead
+    of a string lookup, and matching, caching and prefetching can all key on the ID.
+    """
+
+    def __init__(self, templates: Mapping[str, Handler]):
+        self.intents: list[Intent] = []
+        self.template_ids: dict[str, int] = {}
+        ids: dict[Handler, int] = {}
+        for template, handler in templates.items():
+            if handler not in ids:
+                ids[handler] = len(self.intents)
+                self.intents.append(self._prepare(ids[handler], handler))
+            self.template_ids[template] = ids[handler]
+
+        self.templates = list(self.template_ids)
+        self.match = lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match)
+
+    @staticmethod
+    def _prepare(intent_id: int, handler: Handler) -> Intent:
+        # Every parameter after the client is a spoken temperature
+        parameters = list(inspect.signature(handler).parameters)[1:]
+        return Intent(
+            id=intent_id,
+            name=handler.__name__,
+            handler=handler,
+            slots=tuple(temperature_slot for _ in parameters),
+            registers=getattr(handler, "registers", frozenset()),
+        )
+
+    def __len__(self) -> int:
+        return len(self.intents)
+
+    def __getitem__(self, intent_id: int) -> Intent:
+        return self.intents[intent_id]
+
+    def id_of(self, template: str) -> int:
+        """Intent ID of a template.
+        :raises ValueError: if the template is unknown
+        """
+        try:
+            return self.template_ids[template]
+        except KeyError:
+            raise ValueError(f"Action '{template}' not supported") from None
+
+    def _match(self, text: str) -> tuple[int, float | None]:
+        template, parameter = match_command(text, self.templates)
+        return self.template_ids[template], parameter
+
+    def registers(self, intent_ids: Iterable[int]) -> frozenset[RegisterAddress]:
+        """Registers touched by any of the given intents, e.g. to prefetch them in one read."""
+        return frozenset().union(*(self.intents[intent_id].registers for intent_id in intent_ids))
@@ -1,48 +1,127 @@
-﻿import logging
+﻿import asyncio
+import logging
+import time
 
-from aiohttp import ClientSession
+from aiohttp import ClientResponse, ClientSession, ClientTimeout, TCPConnector
 
 from collections import namedtuple
-from datetime import datetime
-from typing import Any
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, TypeVar
 
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from httpcore import URL
 
+from .error import CloudAuthError
 from .kronoterm_enums import (
     APIEndpoint,
+    ConsumptionPeriod,
     HeatingLoop,
     HeatingLoopMode,
     HeatingLoopStatus,
     HeatPumpOperatingMode,
     WorkingFunction,
 )
-from .kronoterm_models import KronotermAction
+from .kronoterm_models import (
+    AlarmList,
+    BasicView,
+    CloudState,
+    ConsumptionTrend,
+    InitialView,
+    KronotermAction,
+    LoopView,
+    SystemReviewView,
+)
+
+try:
+    # Optional, decodes the larger pages several times faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 log = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.DEBUG, format="%(asctime)s [%(levelname)-8s] %(module)s:%(funcName)s:%(lineno)d - %(message)s"
 )
 
+V = TypeVar("V")
+
+CLOUD_BASE_URL = "https://cloud.kronoterm.com"
+
+# Every request, the login included, gives up after these many seconds
+CLOUD_TIMEOUT = ClientTimeout(total=30, connect=10)
+# Connections to cloud.kronoterm.com are kept open between voice commands
+CLOUD_KEEPALIVE = 60
+CLOUD_CONNECTIONS = 4
+CLOUD_DNS_CACHE_TTL = 300
+
+# Page requests of one full state read in flight at once, matches the connection limit
+CLOUD_CONCURRENCY = CLOUD_CONNECTIONS
+
+# Pages that together make up the full state
+FULL_STATE_ENDPOINTS = (
+    APIEndpoint.INITIAL,
+    APIEndpoint.BASIC,
+    APIEndpoint.SYSTEM_REVIEW,
+    APIEndpoint.HEATING_LOOP_1,
+    APIEndpoint.HEATING_LOOP_2,
+    APIEndpoint.TAP_WATER,
+    APIEndpoint.ALARMS,
+)
+LOOP_ENDPOINTS = {
+    HeatingLoop.HEATING_LOOP_1: APIEndpoint.HEATING_LOOP_1,
+    HeatingLoop.HEATING_LOOP_2: APIEndpoint.HEATING_LOOP_2,
+    HeatingLoop.TAP_WATER: APIEndpoint.TAP_WATER,
+}
+
+# How long a page read is served from the cache, slowly changing pages are kept longer
+DEFAULT_CACHE_TTL = timedelta(seconds=30)
+ENDPOINT_CACHE_TTL: dict[str, timedelta] = {
+    APIEndpoint.INITIAL.value: timedelta(minutes=10),
+    APIEndpoint.BASIC.value: timedelta(seconds=30),
+    APIEndpoint.SYSTEM_REVIEW.value: timedelta(seconds=30),
+    APIEndpoint.SHORTCUTS.value: timedelta(minutes=1),
+    APIEndpoint.HEATING_LOOP_1.value: timedelta(minutes=1),
+    APIEndpoint.HEATING_LOOP_2.value: timedelta(minutes=1),
+    APIEndpoint.TAP_WATER.value: timedelta(minutes=1),
+    APIEndpoint.ALARMS.value: timedelta(seconds=30),
+}
+
 
 class KronotermCloudApi:
 
-    def __init__(self, username: str, password: str, hass: HomeAssistant):
+    def __init__(self, username: str, password: str, hass: HomeAssistant, base_url: str = CLOUD_BASE_URL):
         """Kronoterm heat pump cloud API.
         :param username: Kronoterm cloud username
         :param password: Kronoterm cloud password
+        :param base_url: Cloud to talk to, e.g. a local stand-in server in tests
         """
         self.username = username
         self.password = password
         self.hass = hass
 
-        self._base_api_url = "https://cloud.kronoterm.com/jsoncgi.php?"
-        self._login_url: URL = URL("https://cloud.kronoterm.com/?login=1")
+        self.base_url = base_url.rstrip("/")
+        self._base_api_url = f"{self.base_url}/jsoncgi.php?"
+        self._login_url = f"{self.base_url}/?login=1"
         self.headers = None
         self.session_id = None
         self.session: ClientSession | None = None
 
+        # Bumped on every login, a request knows whether the session it failed with was already replaced
+        self._session_generation = 0
+        self._logged_in = False
+        self._login_lock = asyncio.Lock()
+
+        # Page reads by URL with their expiry, and reads still waiting for a response
+        self._cache: dict[str, tuple[float, dict]] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+        # Bumped by every invalidate, a read started before a change is not cached after it
+        self._generation = 0
+        # Parsed view of every cached page, valid while the page it was parsed from is cached
+        self._views: dict[str, tuple[dict, Any]] = {}
+        self._semaphore = asyncio.Semaphore(CLOUD_CONCURRENCY)
+        # Requests sent to the cloud, reads answered from the cache or joined are not counted
+        self.requests = 0
+
         # Heat pump information
         self.hp_id: str | None = None
         self.user_level: str | None = None
@@ -62,61 +141,179 @@ class KronotermCloudApi:
 
 
     async def login(self) -> None:
-        if self.session is None:
-            self.session = async_get_clientsession(self.hass)
+        """Log in unless a session is already established.
+        :raises CloudAuthError: if the cloud rejects the credentials
+        """
+        async with self._login_lock:
+            if not self._logged_in:
+                await self._login()
+
+
+    async def _relogin(self, generation: int) -> None:
+        """Replace a session a request found expired, unless a concurrent request already did."""
+        async with self._login_lock:
+            if generation == self._session_generation:
+                log.debug("Session expired, logging in again")
+                self._logged_in = False
+                await self._login()
+
+
+    def _create_session(self) -> ClientSession:
+        """Session owned by this client, tuned to reuse TLS connections to the cloud."""
+        connector = TCPConnector(
+            limit_per_host=CLOUD_CONNECTIONS,
+            keepalive_timeout=CLOUD_KEEPALIVE,
+            ttl_dns_cache=CLOUD_DNS_CACHE_TTL,
+            enable_cleanup_closed=True,
+        )
+        return ClientSession(
+            connector=connector,
+            timeout=CLOUD_TIMEOUT,
+            headers={"Accept-Encoding": "gzip, deflate"},
+        )
 
-        # Check if already logged in by looking at stored cookies
-        if self.session.cookie_jar.filter_cookies(self._login_url).get("PHPSESSID"):
-            log.debug("Already logged in, using existing session.")
-            return
+
+    async def close(self) -> None:
+        """Close the session and its connections, the next request logs in again."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self._logged_in = False
+        self.invalidate()
+
+
+    async def _login(self) -> None:
+        if self.session is None:
+            self.session = self._create_session()
 
         login_data = {"username": self.username, "password": self.password}
-        resp = await self.session.post(
-            self._login_url,
-            data=login_data,
-            timeout=30
-        )
+        resp = await self.session.post(self._login_url, data=login_data)
         resp.raise_for_status()
 
         reason = resp.cookies.get("AuthReason")
         if reason:
-            log.error("Login failed: %s", reason.value)
-            return
+            raise CloudAuthError(f"Login failed: {reason.value}")
 
+        self._logged_in = True
+        self._session_generation += 1
         log.debug("Login successful. Cookies: %s", resp.cookies)
 
 
-    async def get_raw(self, url: str, **kwargs) -> dict:
-        await self.login()
-        if self.session is None:
-            raise RuntimeError("Session not initialized after login")
+    @staticmethod
+    def _is_auth_failure(resp: ClientResponse) -> bool:
+        # An expired PHP session is answered with a redirect or the HTML login page instead of JSON,
+        # server errors are left to raise_for_status
+        return (
+            resp.status in (401, 403)
+            or 300 <= resp.status < 400
+            or (resp.status == 200 and resp.content_type == "text/html")
+        )
+
 
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        """Send a request, logging in first and once more if the session turns out to be expired.
+        :raises CloudAuthError: if the request is rejected right after a fresh login
+        """
+        await self.login()
         full_url = self._base_api_url + url
-        resp = await self.session.get(full_url, **kwargs)
-        resp.raise_for_status()
-        return await resp.json()
+        for attempt in range(2):
+            generation = self._session_generation
+            self.requests += 1
+            resp = await self.session.request(method, full_url, allow_redirects=False, **kwargs)
+            if not self._is_auth_failure(resp):
+                resp.raise_for_status()
+                return await resp.json(loads=json_loads)
 
+            resp.release()
+            if attempt == 0:
+                await self._relogin(generation)
 
-    async def post_raw(self, url: str, **kwargs) -> dict:
-        await self.login()
-        if self.session is None:
-            raise RuntimeError("Session not initialized after login")
+        self._logged_in = False
+        raise CloudAuthError(f"Not authorized for {url} after logging in again")
 
-        full_url = self._base_api_url + url
-        resp = await self.session.post(full_url, **kwargs)
-        resp.raise_for_status()
-        return await resp.json()
+
+    async def get_raw(self, url: str, **kwargs) -> dict:
+        """GET a page, served from the cache while it is fresh.
+
+        Concurrent reads of the same page share one request. Cached pages are shared
+        between callers and must not be modified. Reads with extra request options
+        always go to the cloud.
+        """
+        if kwargs:
+            return await self._get(url, **kwargs)
+
+        cached = self._cache.get(url)
+        if cached is not None and time.monotonic() < cached[0]:
+            log.debug(f"Cache hit for {url}")
+            return cached[1]
+
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch(url, self._generation))
+            # Retrieve the error even if every waiter was cancelled
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._pending[url] = task
+        else:
+            log.debug(f"Joining pending request for {url}")
+
+        # A cancelled caller must not cancel the request the others wait for
+        return await asyncio.shield(task)
+
+
+    async def _fetch(self, url: str, generation: int) -> dict:
+        try:
+            data = await self._get(url)
+            if generation == self._generation:
+                ttl = ENDPOINT_CACHE_TTL.get(url, DEFAULT_CACHE_TTL)
+                self._cache[url] = (time.monotonic() + ttl.total_seconds(), data)
+            return data
+        finally:
+            # After an invalidate the entry may already belong to a newer read
+            if self._pending.get(url) is asyncio.current_task():
+                del self._pending[url]
+
+
+    async def _get(self, url: str, **kwargs) -> dict:
+        return await self._request("GET", url, **kwargs)
+
+
+    def invalidate(self) -> None:
+        """Drop every cached page, called after a change so the next read sees it.
+
+        Reads still in flight may return the page from before the change to their
+        callers, but are not cached and not joined by later reads.
+        """
+        self._generation += 1
+        self._cache.clear()
+        self._pending.clear()
+        self._views.clear()
+
+
+    async def get_view(self, url: str, parse: Callable[[dict], V]) -> V:
+        """A page parsed into its view, once per fetch however many getters read it."""
+        data = await self.get_raw(url)
+        parsed = self._views.get(url)
+        if parsed is not None and parsed[0] is data:
+            return parsed[1]
+
+        view = parse(data)
+        self._views[url] = (data, view)
+        return view
+
+
+    async def post_raw(self, url: str, **kwargs) -> dict:
+        return await self._request("POST", url, **kwargs)
 
 
     async def update_heat_pump_basic_information(self):
         """Update heat pump information from INITIAL load data."""
 
-        data = await self.get_initial_data()
-        self.hp_id = data.get("hp_id")
-        self.user_level = data.get("user_level")
-        self.location_name = data.get("Location")
-        self.loop_names = data.get("CircleNames")
-        self.active_errors_count = int(data.get("ActiveErrorsCnt"))
+        initial = await self.get_initial_view()
+        self.hp_id = initial.hp_id
+        self.user_level = initial.user_level
+        self.location_name = initial.location_name
+        self.loop_names = initial.loop_names
+        self.active_errors_count = initial.active_errors_count
 
 
     async def get_initial_data(self) -> dict:
@@ -172,6 +369,28 @@ class KronotermCloudApi:
         return data
 
 
+    async def get_initial_view(self) -> InitialView:
+        return await self.get_view(APIEndpoint.INITIAL.value, InitialView.parse)
+
+
+    async def get_basic_view(self) -> BasicView:
+        return await self.get_view(APIEndpoint.BASIC.value, BasicView.parse)
+
+
+    async def get_system_review_view(self) -> SystemReviewView:
+        return await self.get_view(APIEndpoint.SYSTEM_REVIEW.value, SystemReviewView.parse)
+
+
+    async def get_loop_view(self, loop: HeatingLoop) -> LoopView:
+        if loop not in LOOP_ENDPOINTS:
+            raise ValueError(f"Heating loop '{loop.name}' not supported")
+        return await self.get_view(LOOP_ENDPOINTS[loop].value, LoopView.parse)
+
+
+    async def get_alarm_list(self) -> AlarmList:
+        return await self.get_view(APIEndpoint.ALARMS.value, AlarmList.parse)
+
+
     async def get_alarms_data_only(self, alarms_data: dict | None = None) -> list[Any]:
         """Get only AlarmsData (list of alarms) part of the alarm response.
         :param alarms_data: If supplied, it will be parsed for AlarmsData otherwise make an API request
@@ -179,24 +398,36 @@ class KronotermCloudApi:
         """
         if alarms_data is not None:
             return alarms_data.get("AlarmsData", [])
-        data = await self.get_alarms_data()
-        return data.get("AlarmsData", [])
+        return list((await self.get_alarm_list()).alarms)
 
 
-    async def get_theoretical_use_data(self) -> dict:
+    async def get_theoretical_use_data(
+        self, period: ConsumptionPeriod = ConsumptionPeriod.DAY, day: date | None = None
+    ) -> dict:
         """Get theoretical use view data. As displayed in 'Theoretical use histogram'.
+        :param period: length of the period to get the data of
+        :param day: any day of the period, today by default
         :return: Theoretical use data
         """
         url = "TopPage=4&Subpage=4&Action=4"
         # TODO: research dValues[]!!!
 
-        day_of_year = datetime.now().timetuple().tm_yday
-        year = datetime.now().timetuple().tm_year
+        day = day or date.today()
+        year = day.year
+        match period:
+            case ConsumptionPeriod.DAY:
+                d1 = day.timetuple().tm_yday
+            case ConsumptionPeriod.WEEK:
+                year, d1, _ = day.isocalendar()
+            case ConsumptionPeriod.MONTH:
+                d1 = day.month
+            case ConsumptionPeriod.YEAR:
+                d1 = 0
         data = {
             "year": str(year),
-            "d1": str(day_of_year),  # day of the year
+            "d1": str(d1),  # day of the year, week or month of the period
             "d2": "0",  # hour
-            "type": "day",  # # year, month, hour, week, day, hour
+            "type": period.value,  # # year, month, hour, week, day, hour
             "aValues[]": "17",  # # data to graph
             "dValues[]": ["90", "0", "91", "92", "1", "2", "24", "71"],  # # data to graph
         }
@@ -204,68 +435,101 @@ class KronotermCloudApi:
         return data
 
 
+    async def get_consumption_trend(
+        self, period: ConsumptionPeriod = ConsumptionPeriod.DAY, day: date | None = None
+    ) -> ConsumptionTrend:
+        """Theoretical use of a period parsed into arrays per consumer.
+        :param period: length of the period to get the data of
+        :param day: any day of the period, today by default
+        """
+        data = await self.get_theoretical_use_data(period, day)
+        return ConsumptionTrend.parse(data["trend_consumption"])
+
+
+    async def get_full_state(self) -> CloudState:
+        """Read every page of the full state concurrently and parse them into one snapshot.
+        :return: the state with the time the reads started
+        """
+        timestamp = datetime.now(timezone.utc)
+
+        async def read(endpoint: APIEndpoint) -> dict:
+            async with self._semaphore:
+                return await self.get_raw(endpoint.value)
+
+        pages = await asyncio.gather(*(read(endpoint) for endpoint in FULL_STATE_ENDPOINTS))
+        return self.parse_full_state(dict(zip(FULL_STATE_ENDPOINTS, pages)), timestamp)
+
+
+    @staticmethod
+    def parse_full_state(pages: dict[APIEndpoint, dict], timestamp: datetime) -> CloudState:
+        """Parse the pages of FULL_STATE_ENDPOINTS into one snapshot."""
+        initial = InitialView.parse(pages[APIEndpoint.INITIAL])
+        basic = BasicView.parse(pages[APIEndpoint.BASIC])
+        return CloudState(
+            timestamp=timestamp,
+            hp_id=initial.hp_id,
+            location_name=initial.location_name,
+            loop_names=initial.loop_names,
+            active_errors_count=initial.active_errors_count,
+            outside_temperature=basic.outside_temperature,
+            room_temperature=basic.room_temperature,
+            reservoir_temperature=basic.reservoir_temperature,
+            sanitary_water_temperature=basic.sanitary_water_temperature,
+            outlet_temperature=SystemReviewView.parse(pages[APIEndpoint.SYSTEM_REVIEW]).outlet_temperature,
+            working_function=basic.working_function,
+            operating_mode=basic.operating_mode,
+            loops={loop: LoopView.parse(pages[endpoint]) for loop, endpoint in LOOP_ENDPOINTS.items()},
+            alarms=list(AlarmList.parse(pages[APIEndpoint.ALARMS]).alarms),
+        )
+
+
     async def get_outside_temperature(self) -> float:
         """Get the current outside temperature.
         :return: Outside temperature in [C]
         """
-        basic = await self.get_basic_data()
-        data = basic["TemperaturesAndConfig"]["outside_temp"]
-        return float(data)
+        return (await self.get_basic_view()).outside_temperature
 
 
     async def get_working_function(self) -> WorkingFunction:
         """Get currently set HP working function
         :return: WorkingFunction Enum
         """
-        basic = await self.get_basic_data()
-        data = basic["TemperaturesAndConfig"]["working_function"]
-        return WorkingFunction(data)
+        return (await self.get_basic_view()).working_function
 
 
     async def get_room_temp(self) -> float:
         """Get current room temperature.
         :return: Room temperature in [C]
         """
-        # TODO: This could probably be different if kontrol thermostat is connected to different heating loop?
-        basic = await self.get_basic_data()
-        room_temp = basic["TemperaturesAndConfig"]["heating_circle_2_temp"]
-        return float(room_temp)
+        return (await self.get_basic_view()).room_temperature
 
 
     async def get_reservoir_temp(self) -> float:
         """Get current reservoir temperature.
         :return: reservoir temperature in [C]
         """
-        basic = await self.get_basic_data()
-        reservoir_temp = basic["TemperaturesAndConfig"]["reservoir_temp"]
-        return float(reservoir_temp)
+        return (await self.get_basic_view()).reservoir_temperature
 
 
     async def get_outlet_temp(self) -> float:
         """Get current HP outlet temperature.
         :return: HP outlet temperature in [C]
         """
-        review_data = await self.get_system_review_data()
-        dv_temp = review_data["CurrentFunctionData"][0]["dv_temp"]
-        return float(dv_temp)
+        return (await self.get_system_review_view()).outlet_temperature
 
 
     async def get_sanitary_water_temp(self) -> float:
         """Get current sanitary water temperature.
         :return: Sanitary water temperature in [C]
         """
-        basic = await self.get_basic_data()
-        dv_temp = basic["TemperaturesAndConfig"]["tap_water_temp"]
-        return float(dv_temp)
+        return (await self.get_basic_view()).sanitary_water_temperature
 
 
     async def get_heating_loop_target_temperature(self, loop: HeatingLoop) -> float:
         """Get heating loop target temperature.
         :return: The set heating loop target temperature in [C]
         """
-        heating_loop_data = await self.get_heating_loop_data(loop)
-        set_temp = heating_loop_data["HeatingCircleData"]["circle_temp"]
-        return float(set_temp)
+        return (await self.get_loop_view(loop)).target_temperature
 
 
     async def get_heating_loop_status(self, loop: HeatingLoop) -> HeatingLoopStatus:
@@ -277,9 +541,7 @@ class KronotermCloudApi:
            - AUTO
         :return: HP working status
         """
-        heating_loop_data = await self.get_heating_loop_data(loop)
-        status = heating_loop_data["HeatingCircleData"]["circle_status"]
-        return HeatingLoopStatus(status)
+        return (await self.get_loop_view(loop)).status
 
 
     async def get_heating_loop_mode(self, loop: HeatingLoop) -> HeatingLoopMode:
@@ -290,9 +552,7 @@ class KronotermCloudApi:
         :param loop: for which loop to get mode
         :return mode: mode of the loop
         """
-        heating_loop_data = await self.get_heating_loop_data(loop)
-        mode = heating_loop_data["HeatingCircleData"]["circle_mode"]
-        return HeatingLoopMode(mode)
+        return (await self.get_loop_view(loop)).mode
 
 
     async def get_heat_pump_operating_mode(self) -> HeatPumpOperatingMode:
@@ -302,9 +562,7 @@ class KronotermCloudApi:
            - ECO
         :return mode: mode of the heat pump
         """
-        basic = await self.get_basic_data()
-        mode = basic["TemperaturesAndConfig"]["main_mode"]
-        return HeatPumpOperatingMode(mode)
+        return (await self.get_basic_view()).operating_mode
 
 
     async def set_heating_loop_mode(self, loop: HeatingLoop, mode: HeatingLoopMode) -> bool:
@@ -329,6 +587,7 @@ class KronotermCloudApi:
                 raise ValueError(f"Heating loop '{loop.name}' not supported")
         request_data = {"param_name": "circle_status", "param_value": mode.value, "page": page}
         response = await self.post_raw(loop_url, data=request_data, headers=self.headers)
+        self.invalidate()
         return response.get("result", False) == "success"
 
 
@@ -341,6 +600,7 @@ class KronotermCloudApi:
         """
         request_data = {"param_name": "main_mode", "param_value": mode.value, "page": -1}
         response = await self.post_raw(APIEndpoint.ADVANCED_SETTINGS.value, data=request_data, headers=self.headers)
+        self.invalidate()
         return response.get("result", False) == "success"
 
 
@@ -363,6 +623,7 @@ class KronotermCloudApi:
                 raise ValueError(f"Heating loop '{loop.name}' not supported")
         request_data = {"param_name": "circle_temp", "param_value": temperature, "page": page}
         response = await self.post_raw(loop_url, data=request_data, headers=self.headers)
+        self.invalidate()
         return response.get("result", False) == "success"
 
 
@@ -370,12 +631,12 @@ class KronotermCloudApi:
         """Get theoretically calculated power consumption (calculated by HP and/or cloud).
         :return: Named tuple with the latest daily power consumption in [kWh]
         """
-        data = await self.get_theoretical_use_data()
+        trend = await self.get_consumption_trend()
 
-        heating_consumption = data["trend_consumption"]["CompHeating"][-1]
-        cooling_consumption = data["trend_consumption"]["CompActiveCooling"][-1]
-        tap_water_consumption = data["trend_consumption"]["CompTapWater"][-1]
-        pumps_consumption = data["trend_consumption"]["CPLoops"][-1]
+        heating_consumption = float(trend.heating[-1])
+        cooling_consumption = float(trend.cooling[-1])
+        tap_water_consumption = float(trend.tap_water[-1])
+        pumps_consumption = float(trend.pumps[-1])
         all_consumption = heating_consumption + cooling_consumption + tap_water_consumption + pumps_consumption
 
         HPConsumption = namedtuple("HPConsumption", ["heating", "cooling", "tap_water", "pumps", "all"])
@@ -64,3 +64,12 @@ class HeatPumpOperatingMode(Enum):
     AUTO = 0
     ECO = 1
     COMFORT = 2
+
+
+class ConsumptionPeriod(Enum):
+    """Length of the periods of a theoretical use series"""
+
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    YEAR = "year"
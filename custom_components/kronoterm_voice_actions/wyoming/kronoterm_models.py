@@ -1,7 +1,18 @@
 ﻿from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
 from typing import Dict, Any
 
+import numpy as np
+
+from .kronoterm_enums import (
+    HeatingLoop,
+    HeatingLoopMode,
+    HeatingLoopStatus,
+    HeatPumpOperatingMode,
+    WorkingFunction,
+)
+
 
 @dataclass
 class KronotermAction:
@@ -10,6 +21,149 @@ class KronotermAction:
     parameters: Dict[str, Any]
 
 
+@dataclass(frozen=True, slots=True)
+class InitialView:
+    """Heat pump information of the INITIAL page."""
+    hp_id: str | None
+    user_level: str | None
+    location_name: str | None
+    loop_names: str | None
+    active_errors_count: int
+
+    @classmethod
+    def parse(cls, data: dict) -> "InitialView":
+        return cls(
+            hp_id=data.get("hp_id"),
+            user_level=data.get("user_level"),
+            location_name=data.get("Location"),
+            loop_names=data.get("CircleNames"),
+            active_errors_count=int(data.get("ActiveErrorsCnt", 0)),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class BasicView:
+    """Temperatures and configuration of the BASIC page."""
+    outside_temperature: float
+    room_temperature: float
+    reservoir_temperature: float
+    sanitary_water_temperature: float
+    working_function: WorkingFunction
+    operating_mode: HeatPumpOperatingMode
+
+    @classmethod
+    def parse(cls, data: dict) -> "BasicView":
+        config = data["TemperaturesAndConfig"]
+        return cls(
+            outside_temperature=float(config["outside_temp"]),
+            # TODO: This could probably be different if kontrol thermostat is connected to different heating loop?
+            room_temperature=float(config["heating_circle_2_temp"]),
+            reservoir_temperature=float(config["reservoir_temp"]),
+            sanitary_water_temperature=float(config["tap_water_temp"]),
+            working_function=WorkingFunction(config["working_function"]),
+            operating_mode=HeatPumpOperatingMode(config["main_mode"]),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SystemReviewView:
+    """Current function data of the SYSTEM_REVIEW page."""
+    outlet_temperature: float
+
+    @classmethod
+    def parse(cls, data: dict) -> "SystemReviewView":
+        return cls(outlet_temperature=float(data["CurrentFunctionData"][0]["dv_temp"]))
+
+
+@dataclass(frozen=True, slots=True)
+class LoopView:
+    """Settings of one heating loop or the tap water as reported by the cloud."""
+    target_temperature: float
+    status: HeatingLoopStatus
+    mode: HeatingLoopMode
+
+    @classmethod
+    def parse(cls, data: dict) -> "LoopView":
+        circle = data["HeatingCircleData"]
+        return cls(
+            target_temperature=float(circle["circle_temp"]),
+            status=HeatingLoopStatus(circle["circle_status"]),
+            mode=HeatingLoopMode(circle["circle_mode"]),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class AlarmList:
+    """Active alarms of the ALARMS page, as the cloud describes them."""
+    alarms: tuple[Any, ...]
+
+    @classmethod
+    def parse(cls, data: dict) -> "AlarmList":
+        return cls(alarms=tuple(data.get("AlarmsData", [])))
+
+    def __len__(self) -> int:
+        return len(self.alarms)
+
+
+# Cloud names of the consumers of a theoretical use graph
+TREND_KEYS = {
+    "heating": "CompHeating",
+    "cooling": "CompActiveCooling",
+    "tap_water": "CompTapWater",
+    "pumps": "CPLoops",
+}
+
+
+# Arrays have no useful equality, compared by identity
+@dataclass(frozen=True, slots=True, eq=False)
+class ConsumptionTrend:
+    """Theoretical use per consumer of one period in kWh, one value per interval of the graph."""
+    heating: np.ndarray
+    cooling: np.ndarray
+    tap_water: np.ndarray
+    pumps: np.ndarray
+
+    @classmethod
+    def parse(cls, trend: dict[str, list[float]]) -> "ConsumptionTrend":
+        """Parse the trend_consumption part of a response, missing consumers used nothing."""
+        length = max((len(values) for values in trend.values()), default=0)
+        return cls(**{
+            name: np.asarray(trend[key], dtype=np.float64) if key in trend else np.zeros(length)
+            for name, key in TREND_KEYS.items()
+        })
+
+    @property
+    def total(self) -> np.ndarray:
+        """Use of all consumers per interval."""
+        return self.heating + self.cooling + self.tap_water + self.pumps
+
+    def as_dict(self) -> dict[str, list[float]]:
+        """The trend as the cloud sends it."""
+        return {key: getattr(self, name).tolist() for name, key in TREND_KEYS.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class CloudState:
+    """Everything the Kronoterm cloud reports about the heat pump, read at one point in time."""
+    timestamp: datetime
+
+    hp_id: str | None
+    location_name: str | None
+    loop_names: str | None
+    active_errors_count: int
+
+    outside_temperature: float
+    room_temperature: float
+    reservoir_temperature: float
+    sanitary_water_temperature: float
+    outlet_temperature: float
+    working_function: WorkingFunction
+    operating_mode: HeatPumpOperatingMode
+
+    loops: Dict[HeatingLoop, LoopView]
+    alarms: list[Any]
+
+
 class RegisterAddress(Enum):
     """Modbus register addresses"""
 
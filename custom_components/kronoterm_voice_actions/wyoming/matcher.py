@@ -270,6 +270,31 @@ def sanitize_text(text: str) -> str:
 
     return text
 
+heat_pump_pattern = re.compile(
+    r"\b((?:toplotn\w*\s+)?črpalk\w*)\s+(?:številka\s+)?(\w+)\b", re.IGNORECASE
+)
+
+
+def match_heat_pump(text: str) -> tuple[int | None, str]:
+    """
+    Finds the heat pump a command addresses, e.g. "toplotna črpalka dva".
+    Returns its number, or None when not given, and the text without the number.
+    A leading address like "Toplotna črpalka dva, vklopi sistem" is removed entirely.
+    """
+    for match in heat_pump_pattern.finditer(text):
+        number = slovenian_word_to_number_strict(match.group(2).lower())
+        if number is None or not float(number).is_integer() or float(number) < 1:
+            continue
+
+        if not text[:match.start()].strip():
+            text = text[match.end():].lstrip(" ,:")
+        else:
+            text = text[:match.start()] + match.group(1) + text[match.end():]
+        return int(float(number)), text
+
+    return None, text
+
+
 def match_command(text: str, commands: list[str]) -> tuple[str, float | None]:
     temperature = None
     if includes_temperature(text):
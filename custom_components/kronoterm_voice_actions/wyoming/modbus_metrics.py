@@ -0,0 +1,122 @@
+"""Health and throughput counters for one Modbus bus."""
+
+import time
+from collections import deque
+
+# Upper bounds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Requests per second are averaged over this many seconds
+RATE_WINDOW = 60.0
+
+# Outcomes of a transaction besides success
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_EXCEPTION = "exception_response"
+OUTCOME_ERROR = "error"
+
+
+class ModbusMetrics:
+    """Counters and a latency histogram of every transaction on a bus.
+
+    Timeouts include responses pymodbus dropped for a bad CRC, since a corrupt frame
+    looks the same as no answer to the client. Exception responses are valid frames
+    in which the slave rejected the request.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.registers = 0
+        self.timeouts = 0
+        self.exception_responses = 0
+        self.errors = 0
+        self.reconnects = 0
+        # Transactions waiting for the bus right now, and the most seen at once
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self._recent: deque[float] = deque()
+
+    def record(self, latency: float, registers: int, outcome: str | None = None) -> None:
+        """Record one finished transaction.
+        :param latency: seconds from sending the request to the response or failure
+        :param registers: registers read or written by the request
+        :param outcome: None on success, otherwise one of the OUTCOME_* constants
+        """
+        now = time.monotonic()
+        self.requests += 1
+        self.registers += registers
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        self._recent.append(now)
+        self._prune(now)
+
+        latency_ms = latency * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS_MS)
+        self.latency_buckets[index] += 1
+
+        if outcome == OUTCOME_TIMEOUT:
+            self.timeouts += 1
+        elif outcome == OUTCOME_EXCEPTION:
+            self.exception_responses += 1
+        elif outcome == OUTCOME_ERROR:
+            self.errors += 1
+
+    def waiting(self, delta: int) -> None:
+        """Track transactions queued for the bus lock."""
+        self.queue_depth += delta
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def _prune(self, now: float) -> None:
+        while self._recent and self._recent[0] < now - RATE_WINDOW:
+            self._recent.popleft()
+
+    @property
+    def requests_per_second(self) -> float:
+        self._prune(time.monotonic())
+        return len(self._recent) / RATE_WINDOW
+
+    @property
+    def registers_per_request(self) -> float:
+        return self.registers / self.requests if self.requests else 0.0
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """Estimate a latency percentile in milliseconds as the upper bound of its histogram bucket."""
+        if not self.requests:
+            return None
+
+        rank = percentile / 100 * self.requests
+        seen = 0
+        for index, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= rank and count and index < len(LATENCY_BUCKETS_MS):
+                return float(LATENCY_BUCKETS_MS[index])
+
+        # Beyond the last bucket, report the slowest transaction seen
+        return self.latency_max * 1000
+
+    def as_dict(self) -> dict[str, float | int | list[int] | None]:
+        """Snapshot of all metrics, used by the websocket API and diagnostic sensors."""
+        return {
+            "requests": self.requests,
+            "requests_per_second": self.requests_per_second,
+            "registers_per_request": self.registers_per_request,
+            "latency_mean_ms": self.latency_sum / self.requests * 1000 if self.requests else None,
+            "latency_p50_ms": self.latency_percentile(50),
+            "latency_p95_ms": self.latency_percentile(95),
+            "latency_p99_ms": self.latency_percentile(99),
+            "latency_max_ms": self.latency_max * 1000,
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "latency_histogram": list(self.latency_buckets),
+            "timeouts": self.timeouts,
+            "exception_responses": self.exception_responses,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
@@ -0,0 +1,290 @@
+"""Modbus transports used to reach the Kronoterm heat pump."""
+
+import asyncio
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pymodbus.client
+from pymodbus import FramerType
+from pymodbus.exceptions import ModbusException, ModbusIOException
+
+from .const import (
+    CONF_MODBUS_HOST,
+    CONF_MODBUS_PORT,
+    CONF_MODBUS_RETRIES,
+    CONF_MODBUS_TIMEOUT,
+    CONF_MODBUS_TRANSPORT,
+    CONF_USB_PORT,
+    DEFAULT_MODBUS_RETRIES,
+    DEFAULT_MODBUS_TCP_PORT,
+    DEFAULT_MODBUS_TIMEOUT,
+    MODBUS_TRANSPORT_RTU_OVER_TCP,
+    MODBUS_TRANSPORT_SERIAL,
+    MODBUS_TRANSPORT_TCP,
+)
+from .error import ModbusTimeoutError, ModbusTransactionError
+from .modbus_metrics import OUTCOME_ERROR, OUTCOME_EXCEPTION, OUTCOME_TIMEOUT, ModbusMetrics
+
+log = logging.getLogger(__name__)
+
+# First retry waits about this many seconds, doubling with every further attempt
+RETRY_BACKOFF = 0.2
+
+
+class ModbusTransport(ABC):
+    """A pymodbus client together with the lock that serializes transactions on its bus."""
+
+    # Persistent transports keep the connection open between transactions
+    persistent = False
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_MODBUS_TIMEOUT,
+        retries: int = DEFAULT_MODBUS_RETRIES,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.client = self._create_client()
+        self.metrics = ModbusMetrics()
+        self._lock = asyncio.Lock()
+        self._connected_once = False
+        # Worker thread of a request the caller stopped waiting for, it may still use the client
+        self._abandoned: asyncio.Future | None = None
+
+    @abstractmethod
+    def _create_client(self) -> pymodbus.client.ModbusBaseSyncClient:
+        """A client that gives up on a request by itself within the transport timeout.
+
+        Retries are left to transact, a thread that outlives its deadline holds the bus.
+        """
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[pymodbus.client.ModbusBaseSyncClient]:
+        """Hold the bus for one transaction, connecting first if needed."""
+        self.metrics.waiting(1)
+        try:
+            await self._lock.acquire()
+        finally:
+            self.metrics.waiting(-1)
+
+        try:
+            if not self.persistent or not self.client.connected:
+                if self.persistent and self._connected_once:
+                    self.metrics.reconnects += 1
+                await self._connect()
+                self._connected_once = True
+            try:
+                yield self.client
+            except Exception:
+                # Drop a possibly broken socket, the next transaction reconnects
+                self.client.close()
+                raise
+            finally:
+                if not self.persistent:
+                    self.client.close()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        work, self._abandoned = self._abandoned, None
+        if work is None or work.done():
+            self._lock.release()
+        else:
+            # The thread cannot be stopped, the bus stays held until it returns
+            work.add_done_callback(lambda _: self._lock.release())
+
+    async def _settle(self) -> None:
+        # Wait for an abandoned request to return before the client is used again
+        if self._abandoned is not None:
+            await asyncio.wait([self._abandoned])
+            self._abandoned = None
+
+    async def _connect(self) -> None:
+        # Opening a socket or serial port blocks, keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.client.connect)
+
+    async def transact(self, func: Callable[..., Any], *args, registers: int = 1, **kwargs) -> Any:
+        """Run one blocking client request in a worker thread and record it in the bus metrics.
+
+        Every attempt has to finish within the transport timeout. Timeouts and I/O errors
+        are retried with jittered exponential backoff, exception responses are returned as is.
+        Cancelling the caller closes the connection, which abandons the request in the thread.
+        An abandoned request keeps the bus until its thread returns, which the client
+        timeout bounds, so the next transaction never shares the connection with it.
+        :param registers: number of registers the request reads or writes
+        :raises ModbusTimeoutError: when the last attempt got no answer in time
+        :raises ModbusTransactionError: when the last attempt failed otherwise
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await self._settle()
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                if not self.client.connected:
+                    self.metrics.reconnects += 1
+                    await self._connect()
+
+            started = time.perf_counter()
+            work = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+            try:
+                result = await asyncio.wait_for(asyncio.shield(work), self.timeout)
+            except asyncio.CancelledError:
+                self._abandoned = work
+                self.client.close()
+                raise
+            except (TimeoutError, ModbusIOException) as err:
+                if not work.done():
+                    self._abandoned = work
+                self.metrics.record(time.perf_counter() - started, registers, OUTCOME_TIMEOUT)
+                # The worker thread may still be blocked on the port, closing it unblocks the thread
+                self.client.close()
+                error, cause = ModbusTimeoutError(f"No response within {self.timeout} s"), err
+            except (ModbusException, OSError) as err:
+                self.metrics.record(time.perf_counter() - started, registers, OUTCOME_ERROR)
+                self.client.close()
+                error, cause = ModbusTransactionError(f"Modbus transaction failed: {err}"), err
+            else:
+                outcome = None
+                if isinstance(result, ModbusIOException):
+                    outcome = OUTCOME_TIMEOUT
+                elif result is not None and result.isError():
+                    outcome = OUTCOME_EXCEPTION
+                self.metrics.record(time.perf_counter() - started, registers, outcome)
+                if outcome != OUTCOME_TIMEOUT:
+                    return result
+
+                self.client.close()
+                error, cause = ModbusTimeoutError("No response from the heat pump"), None
+
+            log.debug(f"Attempt {attempt + 1} of {self.retries + 1} failed: {error}")
+
+        raise error from cause
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self.client.close()
+
+
+class SerialTransport(ModbusTransport):
+    """RS-485 adapter attached to a local USB port, opened per transaction."""
+
+    def __init__(self, usb_port: int = 0, **options):
+        self.port = "/dev/ttyUSB" + str(usb_port)
+        super().__init__(**options)
+
+    def _create_client(self) -> pymodbus.client.ModbusBaseSyncClient:
+        return pymodbus.client.ModbusSerialClient(
+            self.port, baudrate=115200, timeout=self.timeout, retries=0
+        )
+
+
+class TcpTransport(ModbusTransport):
+    """Modbus TCP gateway with a persistent connection."""
+
+    persistent = True
+    framer = FramerType.SOCKET
+
+    def __init__(self, host: str, port: int = DEFAULT_MODBUS_TCP_PORT, **options):
+        self.host = host
+        self.port = port
+        super().__init__(**options)
+
+    def _create_client(self) -> pymodbus.client.ModbusBaseSyncClient:
+        return pymodbus.client.ModbusTcpClient(
+            self.host, port=self.port, framer=self.framer, timeout=self.timeout, retries=0
+        )
+
+
+class RtuOverTcpTransport(TcpTransport):
+    """Transparent RS-485-to-Ethernet gateway forwarding raw RTU frames over TCP."""
+
+    framer = FramerType.RTU
+
+
+# Shared transports, one per physical bus, so every client reuses the same connection
+_transport_pool: dict[tuple[str, str, int], ModbusTransport] = {}
+# Number of get_transport calls not yet released for every pooled transport
+_transport_users: Counter[ModbusTransport] = Counter()
+
+
+def get_transport(
+    kind: str = MODBUS_TRANSPORT_SERIAL,
+    host: str | None = None,
+    port: int = DEFAULT_MODBUS_TCP_PORT,
+    usb_port: int = 0,
+    timeout: float = DEFAULT_MODBUS_TIMEOUT,
+    retries: int = DEFAULT_MODBUS_RETRIES,
+) -> ModbusTransport:
+    """Return the pooled transport for a bus, creating it on first use.
+
+    An existing transport keeps the timeout and retry policy it was created with, changing
+    it would rebuild the connection under the other users of the bus. Every call is paired with a release_transport once the caller is done with it.
+    """
+    if kind == MODBUS_TRANSPORT_SERIAL:
+        key = (kind, "", usb_port)
+    elif kind in (MODBUS_TRANSPORT_TCP, MODBUS_TRANSPORT_RTU_OVER_TCP):
+        if not host:
+            raise ValueError(f"Transport '{kind}' requires a host")
+        key = (kind, host, port)
+    else:
+        raise ValueError(f"Transport '{kind}' not supported")
+
+    transport = _transport_pool.get(key)
+    if transport is not None:
+        if (transport.timeout, transport.retries) != (timeout, retries):
+            log.warning(
+                f"Transport {key} is shared, keeping its timeout {transport.timeout} s and "
+                f"{transport.retries} retries instead of {timeout} s and {retries} retries"
+            )
+        _transport_users[transport] += 1
+        return transport
+
+    if kind == MODBUS_TRANSPORT_TCP:
+        transport = TcpTransport(host, port, timeout=timeout, retries=retries)
+    elif kind == MODBUS_TRANSPORT_RTU_OVER_TCP:
+        transport = RtuOverTcpTransport(host, port, timeout=timeout, retries=retries)
+    else:
+        transport = SerialTransport(usb_port, timeout=timeout, retries=retries)
+
+    log.debug(f"Created {kind} transport for {key}")
+    _transport_pool[key] = transport
+    _transport_users[transport] += 1
+    return transport
+
+
+def transport_from_config(data: Mapping[str, Any]) -> ModbusTransport:
+    """Return the pooled transport described by config entry data."""
+    return get_transport(
+        data.get(CONF_MODBUS_TRANSPORT, MODBUS_TRANSPORT_SERIAL),
+        host=data.get(CONF_MODBUS_HOST),
+        port=data.get(CONF_MODBUS_PORT, DEFAULT_MODBUS_TCP_PORT),
+        usb_port=data.get(CONF_USB_PORT, 0),
+        timeout=data.get(CONF_MODBUS_TIMEOUT, DEFAULT_MODBUS_TIMEOUT),
+        retries=data.get(CONF_MODBUS_RETRIES, DEFAULT_MODBUS_RETRIES),
+    )
+
+
+def close_transports() -> None:
+    """Close and forget all pooled transports."""
+    for transport in _transport_pool.values():
+        transport.close()
+    _transport_pool.clear()
+    _transport_users.clear()
+
+
+def release_transport(transport: ModbusTransport) -> None:
+    """Give back a transport from get_transport, closing it once nobody else uses it."""
+    _transport_users[transport] -= 1
+    if _transport_users[transport] > 0:
+        return
+
+    del _transport_users[transport]
+    for key, pooled in list(_transport_pool.items()):
+        if pooled is transport:
+            del _transport_pool[key]
+    transport.close()
@@ -1,8 +1,16 @@
 from dataclasses import dataclass
 from typing import Any
 
+from .backend_router import BackendRouter
+from .bus_manager import BusManager
+from .cloud_coordinator import KronotermCloudCoordinator
+from .consumption_history import ConsumptionHistory
 from .data import WyomingService
 from .devices import SatelliteDevice
+from .history_store import HistoryStore
+from .kronoterm_cloud_api import KronotermCloudApi
+from .mqtt_client import MqttClient
+from .register_poller import RegisterPoller
 
 
 @dataclass
@@ -13,3 +21,14 @@ class DomainDataItem:
 
     service: WyomingService | None = None
     device: SatelliteDevice | None = None
+
+    # Custom Kronoterm agent only, client is heat pump one of the bus manager
+    buses: BusManager | None = None
+    client: MqttClient | None = None
+    poller: RegisterPoller | None = None
+    store: HistoryStore | None = None
+    cloud: KronotermCloudApi | None = None
+    coordinator: KronotermCloudCoordinator | None = None
+    consumption: ConsumptionHistory | None = None
+    # Runs the voice intents of heat pump 1 over Modbus or the cloud
+    router: BackendRouter | None = None
@@ -1,15 +1,33 @@
-import asyncio
 import logging
-import pymodbus.client
-from .const import MODBUS_SLAVE_ID
-from .kronoterm_models import RegisterAddress
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from pymodbus.client import ModbusBaseSyncClient
+from pymodbus.pdu import ExceptionResponse
 
+from .const import MODBUS_SLAVE_ID
+from .energy_analytics import EnergyAnalytics, EnergyPeriod
+from .error import ModbusTransactionError, SetpointRangeError
+from .intents import IntentTable, touches
+from .kronoterm_models import CloudState, RegisterAddress
+from .modbus_transport import ModbusTransport, SerialTransport
+from .read_planner import MAX_REGISTERS_PER_READ, plan_reads
+from .register_decoder import REGISTER_SPECS, BlockDecoder, RegisterSpec, VoiceSetting, to_signed
+from .snapshot_history import SnapshotHistory
+
+if TYPE_CHECKING:
+    from .cloud_coordinator import KronotermCloudCoordinator
 
 log = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.DEBUG, format="%(asctime)s [%(levelname)-8s] %(module)s:%(funcName)s:%(lineno)d - %(message)s"
 )
 
+# Exception code of a Modbus function the device does not implement
+ILLEGAL_FUNCTION = 0x01
+
 def deg_imenovalnik(deg: float) -> str:
     if deg == 1:
         return "ena stopinja"
@@ -40,71 +58,406 @@ def deg_tozilnik(deg: float) -> str:
         return f"{deg:.1f} stopinj"
 
 
-class MqttClient:
+def kwh_tozilnik(kwh: float) -> str:
+    kwh = round(kwh, 1)
+    if kwh == 1:
+        return "eno kilovatno uro"
+    if kwh == 2:
+        return "dve kilovatni uri"
+    if kwh == 3:
+        return "tri kilovatne ure"
+    if kwh == 4:
+        return "štiri kilovatne ure"
+    if int(kwh) == kwh:
+        return f"{int(kwh)} kilovatnih ur"
+    else:
+        return f"{kwh:.1f} kilovatnih ur"
+
+
+def _midnight() -> float:
+    """UNIX timestamp of the last local midnight"""
+    now = datetime.now().astimezone()
+    return now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def spoken_value(spec: RegisterSpec, value: float | int, case: Callable[[float], str] = deg_imenovalnik) -> str:
+    """Value as it is read out, enumerations by name and units in words"""
+    if spec.options:
+        return spec.option(int(value)) or "Neznano"
+    if spec.unit == "°C":
+        return case(value)
+    if spec.unit == "%":
+        return f"{round(value)} procentov"
+    if spec.unit is None:
+        return f"{value}"
+    return f"{value} {spec.unit}"
+
+
+def clamp_warning(requested: float, actual: float, subject: str | None = None) -> str:
+    """Warning read out before the answer when the heat pump stored another setpoint than asked"""
+    limit = f"podprta temperatura za {subject}" if subject else "podprta temperatura"
+    if actual < requested:
+        return (f"Izbrana temperatura {deg_imenovalnik(requested)} je previsoka. "
+                f"Najvišja {limit} je {deg_imenovalnik(actual)}.")
+    if actual > requested:
+        return (f"Izbrana temperatura {deg_imenovalnik(requested)} je prenizka. "
+                f"Najnižja {limit} je {deg_imenovalnik(actual)}.")
+    return ""
+
+
+def check_setpoint(spec: RegisterSpec, value: float) -> None:
+    """Reject a value outside the range a writable register accepts.
+    :raises SetpointRangeError: if the register has a range and the value is outside it
+    """
+    if spec.minimum is not None and spec.maximum is not None and not spec.minimum <= value <= spec.maximum:
+        raise SetpointRangeError(value, spec.minimum, spec.maximum)
+
+
+def _read_handler(spec: RegisterSpec) -> Callable[..., Awaitable[str]]:
+    async def handler(self: "MqttClient") -> str:
+        values = await self.read_registers([spec.address])
+        return spec.voice.read_answer.format(value=spoken_value(spec, values[spec.key]))
+
+    handler.__name__ = f"get_{spec.key.lower()}"
+    handler.registers = frozenset({spec.address})
+    handler.__doc__ = f"Preberi {spec.key}"
+    return handler
+
+
+def _write_handler(spec: RegisterSpec) -> Callable[..., Awaitable[str]]:
+    async def handler(self: "MqttClient", temperature: float) -> str:
+        check_setpoint(spec, temperature)
+        raw = round(temperature / spec.scale)
+        stored = await self.write_and_read(spec.address, raw & 0xFFFF, spec.key)
+        actual = stored * spec.scale
+        answer = spec.voice.write_answer.format(value=spoken_value(spec, actual, deg_tozilnik))
+        # Compare raw words, scaled floats of the same setpoint need not be equal
+        if stored == raw:
+            return answer
+        return f"{clamp_warning(raw * spec.scale, actual, spec.voice.write_subject)} {answer}"
+
+    handler.__name__ = f"set_{spec.key.lower()}"
+    handler.registers = frozenset({spec.address})
+    handler.__doc__ = f"Zapiši {spec.key}"
+    return handler
+
+
+def _setting_handler(spec: RegisterSpec, setting: VoiceSetting) -> Callable[..., Awaitable[str]]:
+    async def handler(self: "MqttClient") -> str:
+        await self.write(spec.address, setting.raw)
+        return setting.answer
+
+    handler.__name__ = f"set_{spec.key.lower()}_{setting.raw}"
+    handler.registers = frozenset({spec.address})
+    handler.__doc__ = f"Zapiši {setting.raw} v {spec.key}"
+    return handler
+
+
+def register_templates() -> dict[str, Callable[..., Awaitable[str]]]:
+    """Voice templates and handlers generated from the phrases in the register spec"""
+    templates = {}
+    for spec in REGISTER_SPECS.values():
+        if spec.voice is None:
+            continue
+        if spec.voice.read_phrases:
+            templates.update(dict.fromkeys(spec.voice.read_phrases, _read_handler(spec)))
+        if spec.voice.write_phrases:
+            templates.update(dict.fromkeys(spec.voice.write_phrases, _write_handler(spec)))
+        for setting in spec.voice.settings:
+            templates.update(dict.fromkeys(setting.phrases, _setting_handler(spec, setting)))
+
+    return templates
 
-    def __init__(self, usb_port: int = 0):
-        """Kronoterm heat pump mqtt client."""
-        port = "/dev/ttyUSB" + str(usb_port)
-        self.modbus_client = pymodbus.client.ModbusSerialClient(port, baudrate=115200)
 
-    async def invoke_kronoterm_action(self, action: str, parameter: float | None):
-        """Invokes an action on the Kronoterm heat pump."""
-        handler = self.map_template_to_function.get(action)
-        if handler is None:
-            raise ValueError(f"Action '{action}' not supported")
+class MqttClient:
 
-        if parameter is None:
-            # noinspection PyArgumentList
-            return await handler(self)
+    def __init__(
+        self,
+        usb_port: int = 0,
+        transport: ModbusTransport | None = None,
+        slave_id: int = MODBUS_SLAVE_ID,
+    ):
+        """Kronoterm heat pump mqtt client.
+        :param usb_port: Local USB port of the RS-485 adapter, used when no transport is given
+        :param transport: Transport to reach the heat pump through, e.g. a pooled TCP gateway
+        :param slave_id: Modbus slave ID of the heat pump on its bus
+        """
+        self.transport = transport if transport is not None else SerialTransport(usb_port)
+        self.slave_id = slave_id
+        # None until the first write-and-read, then remembers if the device answers function 23
+        self.supports_read_write: bool | None = None
+        # Read plans keyed by the register set they cover
+        self._plans: dict[frozenset[RegisterAddress], list[BlockDecoder]] = {}
+        # Recent snapshots sampled by the register poller, answers questions about the past
+        self.history: SnapshotHistory | None = None
+        # Energy and COP computed from the history, answers questions about consumption
+        self.analytics: EnergyAnalytics | None = None
+        # Polls the cloud when an account is configured, answers questions only the cloud knows
+        self.cloud: "KronotermCloudCoordinator | None" = None
+
+
+    @property
+    def modbus_client(self) -> ModbusBaseSyncClient:
+        """The pymodbus client of the transport, replaced when its timeout changes."""
+        return self.transport.client
+
+
+    async def invoke_intent(self, intent_id: int, parameter: float | None = None) -> str:
+        """Runs a compiled intent on the Kronoterm heat pump.
+        :raises ValueError: if the parameter does not fit the intent's slots
+        """
+        intent = self.intents[intent_id]
+        return await intent.handler(self, *intent.arguments(parameter))
 
-        # noinspection PyArgumentList
-        return await handler(self, parameter)
+
+    async def invoke_kronoterm_action(self, action: str, parameter: float | None):
+        """Invokes an action on the Kronoterm heat pump by its template."""
+        return await self.invoke_intent(self.intents.id_of(action), parameter)
 
 
     async def read(self, addr: RegisterAddress, desc: str = "") -> int:
-        """Read one Modbus holding register"""
-        self.modbus_client.connect()
-        rr = await asyncio.to_thread(
-            self.modbus_client.read_holding_registers,
-            addr.to_int() - 1,
-            count=1,
-            slave=MODBUS_SLAVE_ID
-        )
-        raw = rr.registers[0]
-        value = raw - (raw >> 15 << 16)
+        """Read one Modbus holding register
+        :raises ModbusTransactionError: if the device answers with an exception response
+        """
+        async with self.transport.session() as client:
+            rr = await self.transport.transact(
+                client.read_holding_registers,
+                addr.to_int() - 1,
+                count=1,
+                slave=self.slave_id
+            )
+        if rr.isError():
+            raise ModbusTransactionError(f"Reading {addr.name} rejected: {rr}")
+        value = to_signed(rr.registers[0])
         log.debug(f"{desc}: {value}")
-        self.modbus_client.close()
         return value
 
 
+    async def read_block(self, start: int, count: int) -> list[int]:
+        """Read a contiguous block of raw holding registers, starting at register address start
+        :raises ModbusTransactionError: if the device answers with an exception response
+        """
+        async with self.transport.session() as client:
+            rr = await self.transport.transact(
+                client.read_holding_registers,
+                start - 1,
+                count=count,
+                registers=count,
+                slave=self.slave_id
+            )
+        if rr.isError():
+            raise ModbusTransactionError(f"Reading {count} registers from address {start} rejected: {rr}")
+        log.debug(f"Read {count} registers from address {start}")
+        return rr.registers
+
+
+    async def read_registers(
+        self, addrs: Iterable[RegisterAddress] | None = None
+    ) -> dict[str, float | int | bool]:
+        """Bulk read and decode registers with a known decode spec, all of them by default.
+        :return: decoded values keyed by RegisterSpec.key
+        """
+        key = frozenset(REGISTER_SPECS if addrs is None else addrs)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = plan_reads(REGISTER_SPECS[addr] for addr in key)
+            self._plans[key] = plan
+
+        values: dict[str, float | int | bool] = {}
+        for block in plan:
+            raw = await self.read_block(block.start, block.count)
+            values.update(block.decode(raw))
+
+        return values
+
+
     async def write(self, addr: RegisterAddress, raw: int):
         """Write a raw 16-bit word to a Modbus holding register."""
-        self.modbus_client.connect()
-        await asyncio.to_thread(
-            self.modbus_client.write_register,
-            addr.to_int() - 1,
-            value=raw,
-            slave=MODBUS_SLAVE_ID
-        )
+        async with self.transport.session() as client:
+            await self.transport.transact(
+                client.write_register,
+                addr.to_int() - 1,
+                value=raw,
+                slave=self.slave_id
+            )
         log.debug(f"Written {raw} to address {addr}")
-        self.modbus_client.close()
+
+
+    async def write_and_read(self, addr: RegisterAddress, raw: int, desc: str = "") -> int:
+        """Write a raw 16-bit word and read back the accepted value over a single connection.
+
+        Uses Modbus function 23 (read/write multiple registers) when the device supports it,
+        otherwise falls back to a write followed by a read without reopening the port. Only an
+        illegal function answer turns function 23 off, other errors are raised.
+        :raises ModbusTransactionError: if the device rejects the write or the read
+        """
+        async with self.transport.session() as client:
+            rr = None
+            if self.supports_read_write is not False:
+                rr = await self.transport.transact(
+                    client.readwrite_registers,
+                    read_address=addr.to_int() - 1,
+                    read_count=1,
+                    write_address=addr.to_int() - 1,
+                    values=[raw],
+                    registers=2,
+                    slave=self.slave_id
+                )
+                if not rr.isError():
+                    self.supports_read_write = True
+                elif isinstance(rr, ExceptionResponse) and rr.exception_code == ILLEGAL_FUNCTION:
+                    log.debug("Function 23 not supported, falling back to write and read")
+                    self.supports_read_write = False
+                else:
+                    raise ModbusTransactionError(f"Writing {raw} to {addr.name} rejected: {rr}")
+
+            if not self.supports_read_write:
+                rr = await self.transport.transact(
+                    client.write_register,
+                    addr.to_int() - 1,
+                    value=raw,
+                    slave=self.slave_id
+                )
+                if rr is not None and rr.isError():
+                    raise ModbusTransactionError(f"Writing {raw} to {addr.name} rejected: {rr}")
+                rr = await self.transport.transact(
+                    client.read_holding_registers,
+                    addr.to_int() - 1,
+                    count=1,
+                    slave=self.slave_id
+                )
+                if rr.isError():
+                    raise ModbusTransactionError(f"Reading back {addr.name} failed: {rr}")
+
+        value = to_signed(rr.registers[0])
+        log.debug(f"{desc}: written and read back {value}")
+        return value
+
+
+    async def write_many(
+        self,
+        writes: Mapping[RegisterAddress, int] | Iterable[tuple[RegisterAddress, int]],
+        desc: str = "",
+    ) -> dict[RegisterAddress, int]:
+        """Write several raw 16-bit words in one session and verify them with a bulk read.
+
+        Writes happen in the given order. Neighbouring entries with consecutive addresses
+        are sent together in one write multiple registers request. The registers are read
+        before writing, and if a request fails the registers of it and every earlier request
+        are restored to those values, so a failed batch leaves the settings as they were.
+        A restore that fails as well is logged and leaves those registers as written.
+        :return: value read back from every written register
+        :raises ModbusTransactionError: if the device rejects one of the writes
+        """
+        items = list(writes.items() if isinstance(writes, Mapping) else writes)
+        if not items:
+            return {}
+
+        runs = self._write_runs(items)
+        verify = plan_reads(
+            (RegisterSpec(addr, signed=True) for addr, _ in items), max_gap=MAX_REGISTERS_PER_READ
+        )
+        async with self.transport.session() as client:
+            before = await self._read_plan(client, verify)
+            written: list[tuple[int, list[int]]] = []
+            try:
+                for start, values in runs:
+                    # A request that timed out may still have been applied, it is restored as well
+                    written.append((start, values))
+                    await self._write_run(client, start, values)
+            except ModbusTransactionError as err:
+                await self._restore_runs(client, written, before, err)
+                raise
+
+            values_read = await self._read_plan(client, verify)
+
+        result = {addr: values_read[addr.name] for addr, _ in items}
+        log.debug(f"{desc}: written {len(items)} registers in {len(runs)} requests, read back {result}")
+        return result
+
+
+    @staticmethod
+    def _write_runs(items: list[tuple[RegisterAddress, int]]) -> list[tuple[int, list[int]]]:
+        """Group writes into runs of consecutive addresses, each sent in one request."""
+        runs: list[tuple[int, list[int]]] = []
+        for addr, raw in items:
+            start, values = runs[-1] if runs else (None, [])
+            if start is not None and addr.to_int() == start + len(values):
+                values.append(raw & 0xFFFF)
+            else:
+                runs.append((addr.to_int(), [raw & 0xFFFF]))
+        return runs
+
+
+    async def _write_run(self, client: ModbusBaseSyncClient, start: int, values: list[int]) -> None:
+        if len(values) == 1:
+            rr = await self.transport.transact(
+                client.write_register,
+                start - 1,
+                value=values[0],
+                slave=self.slave_id
+            )
+        else:
+            rr = await self.transport.transact(
+                client.write_registers,
+                start - 1,
+                values=values,
+                registers=len(values),
+                slave=self.slave_id
+            )
+        if rr is not None and rr.isError():
+            raise ModbusTransactionError(f"Writing {len(values)} registers at {start} rejected: {rr}")
+
+
+    async def _read_plan(self, client: ModbusBaseSyncClient, plan: list[BlockDecoder]) -> dict[str, int]:
+        values: dict[str, int] = {}
+        for block in plan:
+            rr = await self.transport.transact(
+                client.read_holding_registers,
+                block.start - 1,
+                count=block.count,
+                registers=block.count,
+                slave=self.slave_id
+            )
+            if rr.isError():
+                raise ModbusTransactionError(f"Reading {block.count} registers at {block.start} failed: {rr}")
+            values.update(block.decode(rr.registers))
+        return values
+
+
+    async def _restore_runs(
+        self,
+        client: ModbusBaseSyncClient,
+        written: list[tuple[int, list[int]]],
+        before: dict[str, int],
+        cause: ModbusTransactionError,
+    ) -> None:
+        """Write back the values read before the batch, the last written run first."""
+        log.warning(f"Batch write failed, restoring {len(written)} written requests: {cause}")
+        for start, values in reversed(written):
+            previous = [
+                before[RegisterAddress(start + offset).name] & 0xFFFF for offset in range(len(values))
+            ]
+            try:
+                await self._write_run(client, start, previous)
+            except ModbusTransactionError as err:
+                log.error(f"Restoring {len(values)} registers at {start} failed, they keep the new values: {err}")
 
 
     async def read_temperature(self, addr: RegisterAddress, desc: str = "") -> float:
         """Read a temperature from a Modbus holding register, log a formatted value, return float"""
         signed = await self.read(addr, desc)
-        val = signed / 10.0
-        self.modbus_client.close()
-        return val
+        return signed / 10.0
 
 
     async def set_temperature(self, addr: RegisterAddress, temperature: float, desc: str = "") -> float:
         """Attempts to set the specified temperature and returns the actual new value"""
         raw = int(temperature * 10)
-        await self.write(addr, raw)
-        return await self.read_temperature(addr, desc)
+        signed = await self.write_and_read(addr, raw, desc)
+        return signed / 10.0
 
 
+    @touches(RegisterAddress.SYSTEM_STATUS)
     async def get_system_status(self) -> str:
         """Status delovanja celotne regulacije"""
         status = await self.read(RegisterAddress.SYSTEM_STATUS)
@@ -114,6 +467,7 @@ class MqttClient:
         return "Sistem je izklopljen."
 
 
+    @touches(RegisterAddress.OPERATING_MODE)
     async def get_operating_mode(self) -> str:
         """Funkcija delovanja, ki se izvaja"""
         mode_tag = await self.read(RegisterAddress.OPERATING_MODE)
@@ -130,6 +484,7 @@ class MqttClient:
         return f"Funkcija, ki se izvaja: {mode}."
 
 
+    @touches(RegisterAddress.RESERVE_SOURCE)
     async def get_reserve_source_status(self) -> str:
         """Status rezervnega vira"""
         status = await self.read(RegisterAddress.RESERVE_SOURCE)
@@ -139,6 +494,7 @@ class MqttClient:
         return "Rezervni vir je izklopljen."
 
 
+    @touches(RegisterAddress.ALTERNATIVE_SOURCE)
     async def get_alternative_source_status(self) -> str:
         """Status alternativnega vira"""
         status = await self.read(RegisterAddress.ALTERNATIVE_SOURCE)
@@ -148,6 +504,7 @@ class MqttClient:
         return "Alternativni vir je izklopljen."
 
 
+    @touches(RegisterAddress.OPERATING_REGIME)
     async def get_operation_regime_status(self) -> str:
         """Status režima delovanja"""
         status = await self.read(RegisterAddress.OPERATING_REGIME)
@@ -160,6 +517,7 @@ class MqttClient:
         return f"Trenutno aktiven režim: {regime}."
 
 
+    @touches(RegisterAddress.PROGRAM_MODE)
     async def get_program_mode(self) -> str:
         """Dodatni programi delovanja"""
         mode = await self.read(RegisterAddress.PROGRAM_MODE)
@@ -173,6 +531,7 @@ class MqttClient:
         return f"Trenutno aktiven dodaten program delovanja: {program}."
 
 
+    @touches(RegisterAddress.DHW_QUICK_HEAT)
     async def get_dhw_quick_heat_status(self) -> str:
         """Status hitrega segrevanja sanitarne vode"""
         status = await self.read(RegisterAddress.DHW_QUICK_HEAT)
@@ -182,6 +541,7 @@ class MqttClient:
         return "Hitro segrevanje sanitarne vode je izklopljeno."
 
 
+    @touches(RegisterAddress.DEFROST_MODE)
     async def get_defrost_mode_status(self) -> str:
         """Status odtaljevanja"""
         status = await self.read(RegisterAddress.DEFROST_MODE)
@@ -191,68 +551,66 @@ class MqttClient:
         return "Trenutno se odtaljevanje ne izvaja."
 
 
+    @touches(RegisterAddress.SYSTEM_ON)
     async def turn_system_on(self) -> str:
         """Vklop sistema (toplotna črpalka in ogrevalni krogi)"""
         await self.write(RegisterAddress.SYSTEM_ON, 1)
         return "Vklop sistema uspešen."
 
 
+    @touches(RegisterAddress.SYSTEM_ON)
     async def turn_system_off(self) -> str:
         """Izklop sistema (toplotna črpalka in ogrevalni krogi)"""
         await self.write(RegisterAddress.SYSTEM_ON, 0)
         return "Izklop sistema uspešen."
 
 
+    @touches(RegisterAddress.PROGRAM_SELECT)
     async def set_regime_normal(self) -> str:
         """Nastavitev generalnega režima na normalni način"""
         await self.write(RegisterAddress.PROGRAM_SELECT, 0)
         return "Generalni režim nastavljen na normalni način."
 
 
+    @touches(RegisterAddress.PROGRAM_SELECT)
     async def set_regime_eco(self) -> str:
         """Nastavitev generalnega režima na ECO način"""
         await self.write(RegisterAddress.PROGRAM_SELECT, 1)
         return "Generalni režim nastavljen na ECO način."
 
 
+    @touches(RegisterAddress.PROGRAM_SELECT)
     async def set_regime_com(self) -> str:
         """Nastavitev generalnega režima na COM način"""
         await self.write(RegisterAddress.PROGRAM_SELECT, 2)
         return "Generalni režim nastavljen na COM način."
 
 
+    @touches(RegisterAddress.DHW_QUICK_HEAT_ENABLE)
     async def enable_dhw_quick_heating(self) -> str:
         """Vklop hitrega segrevanja sanitarne vode"""
         await self.write(RegisterAddress.DHW_QUICK_HEAT_ENABLE, 1)
         return "Vklopljeno hitro segrevanje sanitarne vode."
 
 
+    @touches(RegisterAddress.DHW_QUICK_HEAT_ENABLE)
     async def disable_dhw_quick_heating(self) -> str:
         """Izklop hitrega segrevanja sanitarne vode"""
         await self.write(RegisterAddress.DHW_QUICK_HEAT_ENABLE, 0)
         return "Izklopljeno hitro segrevanje sanitarne vode."
 
 
-    async def get_heatpump_load(self) -> str:
-        """Trenutna obremenitev toplotne črpalke v procentih"""
-        load = await self.read(RegisterAddress.CURRENT_HP_LOAD)
-        return f"Trenutna obremenjenost toplotne črpalke: {load} procentov."
-
-
+    @touches(RegisterAddress.DHW_TARGET_TEMP)
     async def set_dhw_target_temperature(self, temperature: float) -> str:
         """Želena temperatura sanitarne vode"""
+        check_setpoint(REGISTER_SPECS[RegisterAddress.DHW_TARGET_TEMP], temperature)
         actual = await self.set_temperature(RegisterAddress.DHW_TARGET_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za sanitarno vodo je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za sanitarno vodo je {deg_imenovalnik(actual)}.")
+        warning = clamp_warning(temperature, actual, "sanitarno vodo")
 
         return f"{warning} Želena temperatura sanitarne vode nastavljena na {deg_tozilnik(actual)}."
 
 
+    @touches(RegisterAddress.DHW_CURRENT_TARGET_TEMP)
     async def get_dhw_target_temperature(self) -> str:
         """Trenutna želena temperatura sanitarne vode"""
         temp = await self.read_temperature(RegisterAddress.DHW_CURRENT_TARGET_TEMP)
@@ -262,57 +620,7 @@ class MqttClient:
         return f"Trenutna želena temperatura sanitarne vode je {deg_imenovalnik(temp)}."
 
 
-    async def set_dhw_mode_disabled(self) -> str:
-        """Izklopi delovanje sanitarne vode"""
-        await self.write(RegisterAddress.DHW_MODE_SELECT, 0)
-        return "Delovanje sanitarne vode izklopljeno."
-
-
-    async def set_dhw_mode_normal(self) -> str:
-        """Nastavi delovanje sanitarne vode na normalni režim"""
-        await self.write(RegisterAddress.DHW_MODE_SELECT, 1)
-        return "Nastavljeno delovanje sanitarne vode na normalni režim."
-
-
-    async def set_dhw_mode_schedule(self) -> str:
-        """Nastavi delovanje sanitarne vode na delovanje po urniku"""
-        await self.write(RegisterAddress.DHW_MODE_SELECT, 2)
-        return "Nastavljeno delovanje sanitarne vode na delovanje po urniku."
-
-
-    async def get_dhw_schedule_mode(self) -> str:
-        """Status delovanja sanitarne vode po urniku"""
-        mode_tag = await self.read(RegisterAddress.DHW_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
-
-        return f"Trenuten način delovanja sanitarne vode po urniku: {mode}"
-
-
-    async def get_dhw_temperature(self) -> str:
-        """Temperatura sanitarne vode"""
-        temp = await self.read_temperature(RegisterAddress.DHW_TEMP)
-        return f"Trenutna temperatura sanitarne vode je {deg_imenovalnik(temp)}."
-
-
-    async def set_loop1_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura 1. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_1_TARGET_ROOM_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor prvega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor prvega kroga je {deg_imenovalnik(actual)}.")
-
-        return f"{warning} Želena temperatura prostora prvega kroga nastavljena na {deg_tozilnik(actual)}."
-
-
+    @touches(RegisterAddress.LOOP_1_CURRENT_TARGET_ROOM_TEMP)
     async def get_loop1_room_target_temp(self) -> str:
         """Trenutna želena temperatura 1. kroga"""
         temp = await self.read_temperature(RegisterAddress.LOOP_1_CURRENT_TARGET_ROOM_TEMP)
@@ -322,230 +630,200 @@ class MqttClient:
         return f"Trenutna želena temperatura prostora prvega ogrevalnega kroga je {deg_imenovalnik(temp)}."
 
 
-    async def set_loop1_operating_mode_disabled(self) -> str:
-        """Izklopi 1. krog"""
-        await self.write(RegisterAddress.LOOP_1_MODE_SELECT, 0)
-        return "Prvi ogrevalni krog izklopljen."
-
-
-    async def set_loop1_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 1. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_1_MODE_SELECT, 1)
-        return "Delovanje prvega ogrevalnega kroga nastavljeno na normalni režim."
-
-
-    async def set_loop1_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 1. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_1_MODE_SELECT, 2)
-        return "Delovanje prvega ogrevalnega kroga nastavljeno na delovanje po urniku."
-
-
-    async def get_loop1_operating_mode(self) -> str:
-        """Status delovanja 1. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_1_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
-
-        return f"Trenutni status delovanja prvega kroga po urniku: {mode}."
-
+    @touches(RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP)
+    async def get_loop2_room_target_temp(self) -> str:
+        """Trenutna želena temperatura prostora 2. kroga"""
+        temp = await self.read_temperature(RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP)
+        if temp == 500:
+            return "Drugi ogrevalni krog je izklopljen."
 
-    async def get_loop1_temp(self) -> str:
-        """Temperatura 1. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_1_TEMP_SENSOR, "Loop 1 temperature")
-        return f"Trenutna temperatura prvega ogrevalnega kroga: {deg_imenovalnik(temp)}."
+        return f"Trenutna želena temperatura prostora drugega ogrevalnega je {deg_imenovalnik(temp)}."
 
 
-    async def set_loop2_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura prostora 2. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_2_TARGET_ROOM_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor drugega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor drugega kroga je {deg_imenovalnik(actual)}.")
+    @touches(RegisterAddress.LOOP_3_TARGET_ROOM_TEMP)
+    async def get_loop3_room_target_temp(self) -> str:
+        """Trenutna želena temperatura prostora 3. kroga"""
+        temp = await self.read_temperature(RegisterAddress.LOOP_3_TARGET_ROOM_TEMP)
+        if temp == 500:
+            return "Tretji ogrevalni krog je izklopljen."
 
-        return f"{warning} Želena temperatura prostora drugega kroga nastavljena na {deg_tozilnik(actual)}."
+        return f"Trenutna želena temperatura tretjega ogrevalnega kroga je {deg_imenovalnik(temp)}."
 
 
-    async def get_loop2_room_target_temp(self) -> str:
-        """Trenutna želena temperatura prostora 2. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_2_CURRENT_TARGET_ROOM_TEMP)
+    @touches(RegisterAddress.LOOP_4_TARGET_ROOM_TEMP)
+    async def get_loop4_room_target_temp(self) -> str:
+        """Trenutna želena temperatura prostora 4. kroga"""
+        temp = await self.read_temperature(RegisterAddress.LOOP_4_TARGET_ROOM_TEMP)
         if temp == 500:
-            return "Drugi ogrevalni krog je izklopljen."
+            return "Četrti ogrevalni krog je izklopljen."
 
-        return f"Trenutna želena temperatura prostora drugega ogrevalnega je {deg_imenovalnik(temp)}."
+        return f"Trenutna želena temperatura četrtega ogrevalnega kroga je {deg_imenovalnik(temp)}."
 
 
-    async def set_loop2_operating_mode_disabled(self) -> str:
-        """Izklopi 2. krog"""
-        await self.write(RegisterAddress.LOOP_2_MODE_SELECT, 0)
-        return "Drugi ogrevalni krog izklopljen."
+    async def set_all_loops_operating_mode(self, mode: int) -> bool:
+        """Nastavi delovanje vseh štirih ogrevalnih krogov v eni transakciji, vrne ali je uspelo"""
+        loops = [
+            RegisterAddress.LOOP_1_MODE_SELECT,
+            RegisterAddress.LOOP_2_MODE_SELECT,
+            RegisterAddress.LOOP_3_MODE_SELECT,
+            RegisterAddress.LOOP_4_MODE_SELECT,
+        ]
+        actual = await self.write_many([(loop, mode) for loop in loops], "All loops mode")
+        return all(value == mode for value in actual.values())
 
 
-    async def set_loop2_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 2. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_2_MODE_SELECT, 1)
-        return "Delovanje drugega ogrevalnega kroga nastavljeno na normalni režim."
+    @touches(RegisterAddress.LOOP_1_MODE_SELECT, RegisterAddress.LOOP_2_MODE_SELECT, RegisterAddress.LOOP_3_MODE_SELECT, RegisterAddress.LOOP_4_MODE_SELECT)
+    async def set_all_loops_operating_mode_disabled(self) -> str:
+        """Izklopi vse ogrevalne kroge"""
+        if not await self.set_all_loops_operating_mode(0):
+            return "Nekaterih ogrevalnih krogov ni bilo mogoče izklopiti."
 
+        return "Vsi ogrevalni krogi izklopljeni."
 
-    async def set_loop2_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 2. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_2_MODE_SELECT, 2)
-        return "Delovanje drugega ogrevalnega kroga nastavljeno na delovanje po urniku."
 
+    @touches(RegisterAddress.LOOP_1_MODE_SELECT, RegisterAddress.LOOP_2_MODE_SELECT, RegisterAddress.LOOP_3_MODE_SELECT, RegisterAddress.LOOP_4_MODE_SELECT)
+    async def set_all_loops_operating_mode_normal(self) -> str:
+        """Nastavi delovanje vseh krogov na normalni režim"""
+        if not await self.set_all_loops_operating_mode(1):
+            return "Nekaterih ogrevalnih krogov ni bilo mogoče nastaviti na normalni režim."
 
-    async def get_loop2_operating_mode(self) -> str:
-        """Status delovanja 2. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_2_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
+        return "Delovanje vseh ogrevalnih krogov nastavljeno na normalni režim."
 
-        return f"Trenutni status delovanja drugega kroga po urniku: {mode}."
 
+    @touches(RegisterAddress.LOOP_1_MODE_SELECT, RegisterAddress.LOOP_2_MODE_SELECT, RegisterAddress.LOOP_3_MODE_SELECT, RegisterAddress.LOOP_4_MODE_SELECT)
+    async def set_all_loops_operating_mode_schedule(self) -> str:
+        """Nastavi delovanje vseh krogov na delovanje po urniku"""
+        if not await self.set_all_loops_operating_mode(2):
+            return "Nekaterih ogrevalnih krogov ni bilo mogoče nastaviti na delovanje po urniku."
 
-    async def get_loop2_temp(self) -> str:
-        """Temperatura 2. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_2_TEMP_SENSOR)
-        return f"Trenutna temperatura drugega ogrevalnega kroga: {deg_imenovalnik(temp)}."
+        return "Delovanje vseh ogrevalnih krogov nastavljeno na delovanje po urniku."
 
 
-    async def set_loop3_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura prostora 3. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_3_ROOM_TARGET_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor tretjega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor tretjega kroga je {deg_imenovalnik(actual)}.")
+    def history_aggregate(self, key: str, since: float) -> dict[str, float] | None:
+        """Aggregates of a decoded value since a UNIX timestamp, None without history"""
+        if self.history is None:
+            return None
 
-        return f"{warning} Želena temperatura prostora tretjega kroga nastavljena na {deg_tozilnik(actual)}."
+        return self.history.aggregate(key, since)
 
 
-    async def get_loop3_room_target_temp(self) -> str:
-        """Trenutna želena temperatura prostora 3. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_3_TARGET_ROOM_TEMP)
-        if temp == 500:
-            return "Tretji ogrevalni krog je izklopljen."
+    async def get_outside_temp_average_last_hour(self) -> str:
+        """Povprečna zunanja temperatura v zadnji uri"""
+        stats = self.history_aggregate("OUTSIDE_TEMP", time.time() - 3600)
+        if stats is None:
+            return "Zgodovina meritev še ni na voljo."
 
-        return f"Trenutna želena temperatura tretjega ogrevalnega kroga je {deg_imenovalnik(temp)}."
+        return f"Povprečna zunanja temperatura v zadnji uri je bila {deg_imenovalnik(round(stats['mean'], 1))}."
 
 
-    async def set_loop3_operating_mode_disabled(self) -> str:
-        """Izklopi 3. krog"""
-        await self.write(RegisterAddress.LOOP_3_MODE_SELECT, 0)
-        return "Tretji ogrevalni krog izklopljen."
+    async def get_outside_temp_extremes_today(self) -> str:
+        """Najnižja in najvišja zunanja temperatura danes"""
+        stats = self.history_aggregate("OUTSIDE_TEMP", _midnight())
+        if stats is None:
+            return "Zgodovina meritev še ni na voljo."
 
+        return (f"Danes je bila najnižja zunanja temperatura {deg_imenovalnik(stats['min'])}, "
+                f"najvišja pa {deg_imenovalnik(stats['max'])}.")
 
-    async def set_loop3_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 3. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_3_MODE_SELECT, 1)
-        return "Delovanje tretjega ogrevalnega kroga nastavljeno na normalni režim."
 
+    async def get_heatpump_load_max_today(self) -> str:
+        """Največja obremenitev toplotne črpalke danes"""
+        stats = self.history_aggregate("CURRENT_HP_LOAD", _midnight())
+        if stats is None:
+            return "Zgodovina meritev še ni na voljo."
 
-    async def set_loop3_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 3. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_3_MODE_SELECT, 2)
-        return "Delovanje tretjega ogrevalnega kroga nastavljeno na delovanje po urniku."
+        return f"Največja obremenitev toplotne črpalke danes je bila {int(stats['max'])} procentov."
 
 
-    async def get_loop3_operating_mode(self) -> str:
-        """Status delovanja 3. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_3_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
+    async def get_heatpump_load_average_today(self) -> str:
+        """Povprečna obremenitev toplotne črpalke danes"""
+        stats = self.history_aggregate("CURRENT_HP_LOAD", _midnight())
+        if stats is None:
+            return "Zgodovina meritev še ni na voljo."
 
-        return f"Trenutni status delovanja tretjega kroga po urniku: {mode}."
+        return f"Povprečna obremenitev toplotne črpalke danes je bila {round(stats['mean'])} procentov."
 
 
-    async def get_loop3_temp(self) -> str:
-        """Temperatura 3. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_3_TEMP_SENSOR)
-        return f"Trenutna temperatura tretjega ogrevalnega kroga: {deg_imenovalnik(temp)}."
+    async def energy_period(self, week: bool = False) -> EnergyPeriod | None:
+        """Energy used today or in the last seven days, None without enough history"""
+        if self.analytics is None:
+            return None
 
+        return await (self.analytics.async_week() if week else self.analytics.async_today())
 
-    async def set_loop4_room_target_temp(self, temperature: float) -> str:
-        """Želena temperatura prostora 4. kroga"""
-        actual = await self.set_temperature(RegisterAddress.LOOP_4_ROOM_TARGET_TEMP, temperature)
-        warning = ""
-        if actual < temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je previsoka. Najvišja "
-                       f"podprta temperatura za prostor četrtega kroga je {deg_imenovalnik(actual)}.")
-        elif actual > temperature:
-            warning = (f"Izbrana temperatura {deg_imenovalnik(temperature)} je prenizka. Najnižja "
-                       f"podprta temperatura za prostor četrtega kroga je {deg_imenovalnik(actual)}.")
 
-        return f"{warning} Želena temperatura prostora četrtega kroga nastavljena na {deg_tozilnik(actual)}."
+    async def get_energy_used_today(self) -> str:
+        """Porabljena električna energija danes"""
+        period = await self.energy_period()
+        if period is None:
+            return "Zgodovina meritev še ni na voljo."
 
+        return (f"Danes je toplotna črpalka porabila {kwh_tozilnik(period.electric)} električne energije "
+                f"in proizvedla {kwh_tozilnik(period.heat)} toplote.")
 
-    async def get_loop4_room_target_temp(self) -> str:
-        """Trenutna želena temperatura prostora 4. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_4_TARGET_ROOM_TEMP)
-        if temp == 500:
-            return "Četrti ogrevalni krog je izklopljen."
 
-        return f"Trenutna želena temperatura četrtega ogrevalnega kroga je {deg_imenovalnik(temp)}."
+    async def get_energy_used_week(self) -> str:
+        """Porabljena električna energija v zadnjem tednu"""
+        period = await self.energy_period(week=True)
+        if period is None:
+            return "Zgodovina meritev še ni na voljo."
 
+        return (f"V zadnjem tednu je toplotna črpalka porabila {kwh_tozilnik(period.electric)} električne energije "
+                f"in proizvedla {kwh_tozilnik(period.heat)} toplote.")
 
-    async def set_loop4_operating_mode_disabled(self) -> str:
-        """Izklopi 4. krog"""
-        await self.write(RegisterAddress.LOOP_4_MODE_SELECT, 0)
-        return "Četrti ogrevalni krog izklopljen."
 
+    async def get_cop_today(self) -> str:
+        """Dejansko grelno število danes"""
+        period = await self.energy_period()
+        if period is None:
+            return "Zgodovina meritev še ni na voljo."
+        if period.cop is None:
+            return "Toplotna črpalka danes še ni porabila električne energije."
 
-    async def set_loop4_operating_mode_normal(self) -> str:
-        """Nastavi delovanje 4. kroga na normalni režim"""
-        await self.write(RegisterAddress.LOOP_4_MODE_SELECT, 1)
-        return "Delovanje četrtega ogrevalnega kroga nastavljeno na normalni režim."
+        return f"Današnje grelno število je {period.cop:.1f}."
 
 
-    async def set_loop4_operating_mode_schedule(self) -> str:
-        """Nastavi delovanje 4. kroga na delovanje po urniku"""
-        await self.write(RegisterAddress.LOOP_4_MODE_SELECT, 2)
-        return "Delovanje četrtega ogrevalnega kroga nastavljeno na delovanje po urniku."
+    async def get_cop_week(self) -> str:
+        """Dejansko grelno število v zadnjem tednu"""
+        period = await self.energy_period(week=True)
+        if period is None:
+            return "Zgodovina meritev še ni na voljo."
+        if period.cop is None:
+            return "Toplotna črpalka v zadnjem tednu ni porabila električne energije."
 
+        return f"Grelno število v zadnjem tednu je {period.cop:.1f}."
 
-    async def get_loop4_operating_mode(self) -> str:
-        """Status delovanja 4. kroga po urniku"""
-        mode_tag = await self.read(RegisterAddress.LOOP_4_SCHEDULE_STATUS)
-        mode = "Neznano"
-        match mode_tag:
-            case 0: mode = "Izklopljeno"
-            case 1: mode = "Normalno"
-            case 2: mode = "ECO"
-            case 3: mode = "COM"
 
-        return f"Trenutni status delovanja četrtega kroga po urniku: {mode}."
+    def cloud_state(self) -> CloudState | None:
+        """Cloud state polled last by the coordinator, None without a cloud account or a successful poll"""
+        if self.cloud is None:
+            return None
 
+        return self.cloud.data
 
-    async def get_loop4_temp(self) -> str:
-        """Temperatura 4. kroga"""
-        temp = await self.read_temperature(RegisterAddress.LOOP_4_TEMP_SENSOR)
-        return f"Trenutna temperatura četrtega ogrevalnega kroga: {deg_imenovalnik(temp)}."
 
+    async def get_active_alarms(self) -> str:
+        """Število aktivnih alarmov po podatkih iz oblaka"""
+        state = self.cloud_state()
+        if state is None:
+            return "Podatki iz oblaka niso na voljo."
 
-    async def get_outside_temp(self) -> str:
-        """Zunanja temperatura"""
-        temp = await self.read_temperature(RegisterAddress.OUTSIDE_TEMP, "Outside temperature")
-        return f"Trenutna zunanja temperatura je {deg_imenovalnik(temp)}"
+        count = state.active_errors_count
+        if count == 0:
+            return "Toplotna črpalka nima aktivnih alarmov."
+        if count == 1:
+            return "Toplotna črpalka ima en aktiven alarm."
+        if count == 2:
+            return "Toplotna črpalka ima dva aktivna alarma."
+        if count in (3, 4):
+            return f"Toplotna črpalka ima {count} aktivne alarme."
+        return f"Toplotna črpalka ima {count} aktivnih alarmov."
 
 
     map_template_to_function = {
+        # Reads and writes declared in registers.json, hand written handlers below take precedence
+        **register_templates(),
+
         "ali je sistem vklopljen": get_system_status,
         "ali je sistem izklopljen": get_system_status,
         "kakšno je stanje sistema": get_system_status,
@@ -598,140 +876,72 @@ class MqttClient:
 
         "izklopi hitro segrevanje sanitarne vode": disable_dhw_quick_heating,
 
-        "kakšna je trenutna obremenitev toplotne črpalke": get_heatpump_load,
-
-        "nastavi želeno temperaturo sanitarne vode na <temperature> stopinj": set_dhw_target_temperature,
-        "nastavi temperaturo sanitarne vode na <temperature> stopinj": set_dhw_target_temperature,
-        "segrej sanitarno vodo na <temperature> stopinj": set_dhw_target_temperature,
+        "kolikšna je bila največja obremenitev danes": get_heatpump_load_max_today,
+        "kolikšna je bila največja obremenitev toplotne črpalke danes": get_heatpump_load_max_today,
+        "kolikšna je bila povprečna obremenitev danes": get_heatpump_load_average_today,
 
-        "kakšna je trenutna želena temperatura sanitarne vode": get_dhw_target_temperature,
+        "koliko energije smo porabili danes": get_energy_used_today,
+        "koliko elektrike je danes porabila toplotna črpalka": get_energy_used_today,
+        "koliko energije smo porabili ta teden": get_energy_used_week,
+        "koliko energije smo porabili v zadnjem tednu": get_energy_used_week,
 
-        "izklopi segrevanje sanitarne vode": set_dhw_mode_disabled,
+        "kakšno je bilo grelno število danes": get_cop_today,
+        "kakšen je bil cop danes": get_cop_today,
+        "kakšno je bilo grelno število ta teden": get_cop_week,
+        "kakšen je bil cop ta teden": get_cop_week,
 
-        "nastavi normalen režim sanitarne vode": set_dhw_mode_normal,
-        "nastavi režim sanitarne vode na normalno": set_dhw_mode_normal,
-        "vklopi normalen režim segrevanja sanitarne vode": set_dhw_mode_normal,
+        "ali ima toplotna črpalka kakšen alarm": get_active_alarms,
+        "koliko alarmov je aktivnih": get_active_alarms,
 
-        "nastavi režim sanitarne vode po urniku": set_dhw_mode_schedule,
-        "vklopi režim segrevanja sanitarne vode po urniku": set_dhw_mode_schedule,
+        "kakšna je bila povprečna zunanja temperatura zadnjo uro": get_outside_temp_average_last_hour,
+        "kakšna je bila najnižja in najvišja zunanja temperatura danes": get_outside_temp_extremes_today,
 
-        "kakšen je trenuten način delovanja sanitarne vode po urniku": get_dhw_schedule_mode,
+        "nastavi želeno temperaturo sanitarne vode na <temperature> stopinj": set_dhw_target_temperature,
+        "nastavi temperaturo sanitarne vode na <temperature> stopinj": set_dhw_target_temperature,
+        "segrej sanitarno vodo na <temperature> stopinj": set_dhw_target_temperature,
 
-        "kakšna je temperatura sanitarne vode": get_dhw_temperature,
+        "kakšna je trenutna želena temperatura sanitarne vode": get_dhw_target_temperature,
 
         ####################################################################################################################
         # LOOP 1
         ####################################################################################################################
 
-        "nastavi temperaturo prostora ena na <temperature> stopinj": set_loop1_room_target_temp,
-        "nastavi želeno temperaturo prostora prvega kroga na <temperature> stopinj": set_loop1_room_target_temp,
-
         "kakšna je trenutna želena temperatura prostora prvega kroga": get_loop1_room_target_temp,
         "kakšna je trenutna želena temperatura prostora ena": get_loop1_room_target_temp,
 
-        "izklopi prvi ogrevalni krog": set_loop1_operating_mode_disabled,
-        "izklopi ogrevalni krog ena": set_loop1_operating_mode_disabled,
-
-        "nastavi delovanje prvega ogrevalnega kroga na normalni režim": set_loop1_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga ena na normalni režim": set_loop1_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu ena": set_loop1_operating_mode_normal,
-        "vklopi normalni režim na prvem ogrevalnem krogu": set_loop1_operating_mode_normal,
-
-        "nastavi delovanje prvega ogrevalnega kroga na delovanje po urniku": set_loop1_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga ena na delovanje po urniku": set_loop1_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu ena": set_loop1_operating_mode_schedule,
-        "vklopi delovanje po urniku na prvem ogrevalnem krogu": set_loop1_operating_mode_schedule,
-
-        "kakšen je status delovanja prvega ogrevalnega kroga": get_loop1_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga ena": get_loop1_operating_mode,
-
-        "kakšna je temperatura ogrevalnega kroga ena": get_loop1_temp,
-        "kakšna je temperatura prvega ogrevalnega kroga": get_loop1_temp,
-
         ####################################################################################################################
         # LOOP 2
         ####################################################################################################################
 
-        "nastavi temperaturo prostora dva na <temperature> stopinj": set_loop2_room_target_temp,
-        "nastavi želeno temperaturo prostora drugega kroga na <temperature> stopinj": set_loop2_room_target_temp,
-
         "kakšna je trenutna želena temperatura prostora drugega kroga": get_loop2_room_target_temp,
         "kakšna je trenutna želena temperatura prostora dva": get_loop2_room_target_temp,
 
-        "izklopi drugi ogrevalni krog": set_loop2_operating_mode_disabled,
-        "izklopi ogrevalni krog dva": set_loop2_operating_mode_disabled,
-
-        "nastavi delovanje drugega ogrevalnega kroga na normalni režim": set_loop2_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga dva na normalni režim": set_loop2_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu dva": set_loop2_operating_mode_normal,
-        "vklopi normalni režim na drugem ogrevalnem krogu": set_loop2_operating_mode_normal,
-
-        "nastavi delovanje drugega ogrevalnega kroga na delovanje po urniku": set_loop2_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga dva na delovanje po urniku": set_loop2_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu dva": set_loop2_operating_mode_schedule,
-        "vklopi delovanje po urniku na drugem ogrevalnem krogu": set_loop2_operating_mode_schedule,
-
-        "kakšen je status delovanja drugega ogrevalnega kroga": get_loop2_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga dva": get_loop2_operating_mode,
-
-        "kakšna je temperatura ogrevalnega kroga dva": get_loop2_temp,
-        "kakšna je temperatura drugega ogrevalnega kroga": get_loop2_temp,
-
         ####################################################################################################################
         # LOOP 3
         ####################################################################################################################
 
-        "nastavi temperaturo prostora tri na <temperature> stopinj": set_loop3_room_target_temp,
-        "nastavi želeno temperaturo prostora tretjega kroga na <temperature> stopinj": set_loop3_room_target_temp,
-
         "kakšna je trenutna želena temperatura prostora tretjega kroga": get_loop3_room_target_temp,
         "kakšna je trenutna želena temperatura prostora tri": get_loop3_room_target_temp,
 
-        "izklopi tretji ogrevalni krog": set_loop3_operating_mode_disabled,
-        "izklopi ogrevalni krog tri": set_loop3_operating_mode_disabled,
-
-        "nastavi delovanje tretjega ogrevalnega kroga na normalni režim": set_loop3_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga tri na normalni režim": set_loop3_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu tri": set_loop3_operating_mode_normal,
-        "vklopi normalni režim na tretjem ogrevalnem krogu": set_loop3_operating_mode_normal,
-
-        "nastavi delovanje tretjega ogrevalnega kroga na delovanje po urniku": set_loop3_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga tri na delovanje po urniku": set_loop3_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu tri": set_loop3_operating_mode_schedule,
-        "vklopi delovanje po urniku na tretjem ogrevalnem krogu": set_loop3_operating_mode_schedule,
-
-        "kakšen je status delovanja tretjega ogrevalnega kroga": get_loop3_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga tri": get_loop3_operating_mode,
-
-        "kakšna je temperatura ogrevalnega kroga tri": get_loop3_temp,
-        "kakšna je temperatura tretjega ogrevalnega kroga": get_loop3_temp,
-
         ####################################################################################################################
         # LOOP 4
         ####################################################################################################################
 
-        "nastavi temperaturo prostora štiri na <temperature> stopinj": set_loop4_room_target_temp,
-        "nastavi želeno temperaturo prostora četrtega kroga na <temperature> stopinj": set_loop4_room_target_temp,
-
         "kakšna je trenutna želena temperatura prostora četrtega kroga": get_loop4_room_target_temp,
         "kakšna je trenutna želena temperatura prostora štiri": get_loop4_room_target_temp,
 
-        "izklopi četrti ogrevalni krog": set_loop4_operating_mode_disabled,
-        "izklopi ogrevalni krog štiri": set_loop4_operating_mode_disabled,
-
-        "nastavi delovanje četrtega ogrevalnega kroga na normalni režim": set_loop4_operating_mode_normal,
-        "nastavi delovanje ogrevalnega kroga štiri na normalni režim": set_loop4_operating_mode_normal,
-        "vklopi normalni režim na ogrevalnem krogu štiri": set_loop4_operating_mode_normal,
-        "vklopi normalni režim na četrtem ogrevalnem krogu": set_loop4_operating_mode_normal,
+        ####################################################################################################################
+        # ALL LOOPS
+        ####################################################################################################################
 
-        "nastavi delovanje četrtega ogrevalnega kroga na delovanje po urniku": set_loop4_operating_mode_schedule,
-        "nastavi delovanje ogrevalnega kroga štiri na delovanje po urniku": set_loop4_operating_mode_schedule,
-        "vklopi delovanje po urniku na ogrevalnem krogu štiri": set_loop4_operating_mode_schedule,
-        "vklopi delovanje po urniku na četrtem ogrevalnem krogu": set_loop4_operating_mode_schedule,
+        "izklopi vse ogrevalne kroge": set_all_loops_operating_mode_disabled,
 
-        "kakšen je status delovanja četrtega ogrevalnega kroga": get_loop4_operating_mode,
-        "kakšen je status delovanja ogrevalnega kroga štiri": get_loop4_operating_mode,
+        "nastavi delovanje vseh ogrevalnih krogov na normalni režim": set_all_loops_operating_mode_normal,
+        "vklopi normalni režim na vseh ogrevalnih krogih": set_all_loops_operating_mode_normal,
 
-        "kakšna je temperatura ogrevalnega kroga štiri": get_loop4_temp,
-        "kakšna je temperatura četrtega ogrevalnega kroga": get_loop4_temp,
+        "nastavi delovanje vseh ogrevalnih krogov na delovanje po urniku": set_all_loops_operating_mode_schedule,
+        "vklopi delovanje po urniku na vseh ogrevalnih krogih": set_all_loops_operating_mode_schedule,
     }
+
+    # Templates compiled to intent IDs, dispatch indexes this instead of the dict above
+    intents = IntentTable(map_template_to_function)
@@ -0,0 +1,38 @@
+"""Groups register reads into as few Modbus bulk reads as possible."""
+
+from collections.abc import Iterable
+
+from .register_decoder import BlockDecoder, RegisterSpec
+
+# Protocol limit for a single read holding registers request
+MAX_REGISTERS_PER_READ = 125
+
+# Reading a few unused registers is cheaper than another round-trip on the bus
+DEFAULT_MAX_GAP = 10
+
+
+def plan_reads(
+    specs: Iterable[RegisterSpec],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_count: int = MAX_REGISTERS_PER_READ,
+) -> list[BlockDecoder]:
+    """Split the registers of the given specs into contiguous blocks.
+
+    Neighbouring registers are merged into one block as long as the hole between
+    them is at most ``max_gap`` registers and the block stays within ``max_count``.
+    The two words of a 32-bit pair always end up in the same block.
+    """
+    specs = sorted(set(specs), key=lambda spec: min(spec.addresses))
+    blocks: list[tuple[int, int, list[RegisterSpec]]] = []
+
+    for spec in specs:
+        first, last = min(spec.addresses), max(spec.addresses)
+        if blocks:
+            start, end, members = blocks[-1]
+            if first - end - 1 <= max_gap and max(last, end) - start + 1 <= max_count:
+                blocks[-1] = (start, max(last, end), members + [spec])
+                continue
+
+        blocks.append((first, last, [spec]))
+
+    return [BlockDecoder(start, end - start + 1, members) for start, end, members in blocks]
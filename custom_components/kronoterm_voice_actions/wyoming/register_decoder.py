@@ -0,0 +1,257 @@
+"""Declarative decoding of Kronoterm Modbus holding registers.
+
+The register map lives in registers.json: how every register decodes, how often it
+is polled, whether it may be written and in which range, and the voice phrases that
+read or set it. Decoders, read plans, sensors and voice templates are all built from
+it once at load time.
+"""
+
+import json
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .kronoterm_models import RegisterAddress
+
+# Poll groups, registers in a group change at a similar rate
+GROUP_POWER = "power"
+GROUP_TEMPERATURES = "temperatures"
+GROUP_STATUS = "status"
+GROUP_ENERGY = "energy"
+GROUP_SETTINGS = "settings"
+GROUPS = (GROUP_POWER, GROUP_TEMPERATURES, GROUP_STATUS, GROUP_ENERGY, GROUP_SETTINGS)
+
+ACCESS_READ = "r"
+ACCESS_READ_WRITE = "rw"
+
+REGISTER_SPEC_FILE = Path(__file__).with_name("registers.json")
+
+
+@dataclass(frozen=True)
+class VoiceSetting:
+    """A fixed raw value written by voice, e.g. one mode of a mode select register."""
+
+    raw: int
+    phrases: tuple[str, ...]
+    answer: str
+
+
+@dataclass(frozen=True)
+class VoiceSpec:
+    """Voice templates of a register, answers fill in {value}."""
+
+    read_phrases: tuple[str, ...] = ()
+    read_answer: str | None = None
+    # Phrases with a <temperature> parameter that write the spoken value
+    write_phrases: tuple[str, ...] = ()
+    write_answer: str | None = None
+    # What the setpoint is for, named when the heat pump stores a different value than asked
+    write_subject: str | None = None
+    settings: tuple[VoiceSetting, ...] = ()
+
+
+@dataclass(frozen=True)
+class RegisterSpec:
+    """How the raw 16-bit word(s) of a register turn into a value.
+
+    For 32-bit values ``address`` is the high word and ``low`` the low word.
+    Bitmask registers additionally decode each named bit into its own boolean.
+    Changes smaller than or equal to ``deadband`` are not reported by the poller,
+    and ``group`` selects the poll group that sets how often the register is read.
+    Writable registers accept scaled values between ``minimum`` and ``maximum``, and
+    ``options`` names the raw values of enumerated registers.
+    """
+
+    address: RegisterAddress
+    signed: bool = False
+    scale: float = 1.0
+    unit: str | None = None
+    low: RegisterAddress | None = None
+    bits: tuple[tuple[str, int], ...] = ()
+    deadband: float = 0.0
+    group: str = GROUP_STATUS
+    access: str = ACCESS_READ
+    minimum: float | None = None
+    maximum: float | None = None
+    options: tuple[tuple[int, str], ...] = ()
+    voice: VoiceSpec | None = None
+
+    @property
+    def key(self) -> str:
+        """Name of the decoded value, 32-bit pairs drop their _HIGH suffix."""
+        if self.low is not None:
+            return self.address.name.removesuffix("_HIGH")
+        return self.address.name
+
+    @property
+    def addresses(self) -> tuple[int, ...]:
+        """Register addresses this spec reads."""
+        if self.low is not None:
+            return self.address.to_int(), self.low.to_int()
+        return (self.address.to_int(),)
+
+    @property
+    def is_integer(self) -> bool:
+        return self.scale == 1.0
+
+    @property
+    def writable(self) -> bool:
+        return self.access == ACCESS_READ_WRITE
+
+    def option(self, raw: int) -> str | None:
+        """Name of an enumerated raw value, None if it has none."""
+        return dict(self.options).get(raw)
+
+    def bit_key(self, field: str) -> str:
+        return f"{self.key}.{field}"
+
+
+def to_signed(raw: int) -> int:
+    """Interpret an unsigned 16-bit word as two's complement."""
+    return raw - (raw >> 15 << 16)
+
+
+def _voice(entry: Mapping[str, Any] | None) -> VoiceSpec | None:
+    if not entry:
+        return None
+
+    read = entry.get("read", {})
+    write = entry.get("write", {})
+    if any("<temperature>" not in phrase for phrase in write.get("phrases", ())):
+        raise ValueError("Write phrases need a <temperature> placeholder")
+    return VoiceSpec(
+        read_phrases=tuple(read.get("phrases", ())),
+        read_answer=read.get("answer"),
+        write_phrases=tuple(write.get("phrases", ())),
+        write_answer=write.get("answer"),
+        write_subject=write.get("subject"),
+        settings=tuple(
+            VoiceSetting(int(raw), tuple(setting["phrases"]), setting["answer"])
+            for raw, setting in entry.get("set", {}).items()
+        ),
+    )
+
+
+def _spec(name: str, entry: Mapping[str, Any]) -> RegisterSpec:
+    try:
+        address = RegisterAddress[name]
+        low = RegisterAddress[entry["low"]] if "low" in entry else None
+    except KeyError as err:
+        raise ValueError(f"Register {name}: unknown address {err}") from None
+    if entry.get("group", GROUP_STATUS) not in GROUPS:
+        raise ValueError(f"Register {name}: unknown group {entry['group']}")
+    if entry.get("access", ACCESS_READ) not in (ACCESS_READ, ACCESS_READ_WRITE):
+        raise ValueError(f"Register {name}: unknown access {entry['access']}")
+    voice = _voice(entry.get("voice"))
+    if voice is not None and (voice.write_phrases or voice.settings):
+        if entry.get("access") != ACCESS_READ_WRITE:
+            raise ValueError(f"Register {name}: voice writes to a read-only register")
+        if voice.write_phrases and (entry.get("min") is None or entry.get("max") is None):
+            raise ValueError(f"Register {name}: voice writes need a valid range")
+
+    return RegisterSpec(
+        address,
+        signed=entry.get("signed", False),
+        scale=entry.get("scale", 1.0),
+        unit=entry.get("unit"),
+        low=low,
+        bits=tuple(entry.get("bits", {}).items()),
+        deadband=entry.get("deadband", 0.0),
+        group=entry.get("group", GROUP_STATUS),
+        access=entry.get("access", ACCESS_READ),
+        minimum=entry.get("min"),
+        maximum=entry.get("max"),
+        options=tuple((int(raw), label) for raw, label in entry.get("options", {}).items()),
+        voice=voice,
+    )
+
+
+@cache
+def load_register_specs(path: Path = REGISTER_SPEC_FILE) -> dict[RegisterAddress, RegisterSpec]:
+    """Read the register map from a JSON spec, every entry over the defaults of its type.
+    :raises ValueError: if an entry names an unknown address, group, access or type
+    """
+    with path.open(encoding="utf-8") as file:
+        data = json.load(file)
+
+    specs = {}
+    for name, entry in data["registers"].items():
+        kind = entry.get("type", "word")
+        if kind not in data["types"]:
+            raise ValueError(f"Register {name}: unknown type {kind}")
+        spec = _spec(name, {**data["types"][kind], **entry})
+        specs[spec.address] = spec
+
+    return specs
+
+
+REGISTER_SPECS: dict[RegisterAddress, RegisterSpec] = load_register_specs()
+
+
+class BlockDecoder:
+    """Decodes every spec covered by one contiguous block of registers in a single vectorized pass."""
+
+    def __init__(self, start: int, count: int, specs: Iterable[RegisterSpec]):
+        """
+        :param start: Address of the first register in the block
+        :param count: Number of registers in the block
+        :param specs: Specs to decode, those not fully inside the block are ignored
+        """
+        self.start = start
+        self.count = count
+        end = start + count
+        self.specs = [spec for spec in specs if all(start <= a < end for a in spec.addresses)]
+
+        words = [spec for spec in self.specs if spec.low is None]
+        pairs = [spec for spec in self.specs if spec.low is not None]
+        bit_fields = [(spec, field, bit) for spec in self.specs for field, bit in spec.bits]
+
+        self._word_index = np.array([spec.address.to_int() - start for spec in words], dtype=np.intp)
+        self._word_signed = np.array([spec.signed for spec in words], dtype=bool)
+        self._word_divisor = np.array([1.0 / spec.scale for spec in words], dtype=np.float64)
+
+        self._pair_high = np.array([spec.address.to_int() - start for spec in pairs], dtype=np.intp)
+        self._pair_low = np.array([spec.low.to_int() - start for spec in pairs], dtype=np.intp)
+        self._pair_divisor = np.array([1.0 / spec.scale for spec in pairs], dtype=np.float64)
+
+        self._bit_index = np.array([spec.address.to_int() - start for spec, _, _ in bit_fields], dtype=np.intp)
+        self._bit_shift = np.array([bit for _, _, bit in bit_fields], dtype=np.uint16)
+
+        # Column order of decode_array()
+        self.keys: list[str] = [spec.key for spec in words] + [spec.key for spec in pairs]
+        self.bit_keys: list[str] = [spec.bit_key(field) for spec, field, _ in bit_fields]
+        self._integer_keys = {spec.key for spec in self.specs if spec.is_integer}
+
+    def decode_array(self, raw: Sequence[int] | np.ndarray) -> np.ndarray:
+        """Decode the block into a float vector ordered like ``keys``."""
+        block = np.asarray(raw, dtype=np.uint16)
+        if block.shape != (self.count,):
+            raise ValueError(f"Expected {self.count} registers, got {block.shape}")
+
+        picked = block[self._word_index]
+        words = np.where(self._word_signed, picked.view(np.int16), picked) / self._word_divisor
+
+        high = block[self._pair_high].astype(np.uint32)
+        low = block[self._pair_low].astype(np.uint32)
+        pairs = ((high << 16) | low) / self._pair_divisor
+
+        return np.concatenate((words, pairs))
+
+    def decode_bits(self, raw: Sequence[int] | np.ndarray) -> np.ndarray:
+        """Decode the bitmask fields of the block into a bool vector ordered like ``bit_keys``."""
+        block = np.asarray(raw, dtype=np.uint16)
+        return ((block[self._bit_index] >> self._bit_shift) & 1).astype(bool)
+
+    def decode(self, raw: Sequence[int] | np.ndarray) -> dict[str, float | int | bool]:
+        """Decode the block into a mapping of value keys to typed values."""
+        values = self.decode_array(raw)
+        result: dict[str, float | int | bool] = {
+            key: int(value) if key in self._integer_keys else value
+            for key, value in zip(self.keys, values.tolist())
+        }
+        result.update(zip(self.bit_keys, self.decode_bits(raw).tolist()))
+        return result
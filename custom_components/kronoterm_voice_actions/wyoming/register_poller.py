@@ -0,0 +1,242 @@
+"""Periodic bulk polling of the heat pump register map."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+
+from .const import DEFAULT_POLL_INTERVAL, EVENT_REGISTERS_CHANGED, SIGNAL_REGISTERS_UPDATED
+from .kronoterm_models import RegisterAddress
+from .mqtt_client import MqttClient
+from .register_decoder import (
+    GROUP_ENERGY,
+    GROUP_POWER,
+    GROUP_SETTINGS,
+    GROUP_STATUS,
+    GROUP_TEMPERATURES,
+    REGISTER_SPECS,
+)
+from .history_store import HistoryStore
+from .snapshot_history import SnapshotHistory
+
+_LOGGER = logging.getLogger(__name__)
+
+Value = float | int | bool
+
+# Weight of the latest poll in the change rate, higher adapts faster
+CHANGE_RATE_WEIGHT = 0.3
+
+
+@dataclass(frozen=True)
+class PollGroup:
+    """Bounds for the adaptive poll interval of a group of registers."""
+
+    name: str
+    min_interval: timedelta
+    max_interval: timedelta
+
+
+POLL_GROUPS: dict[str, PollGroup] = {
+    group.name: group
+    for group in (
+        PollGroup(GROUP_POWER, timedelta(seconds=5), timedelta(seconds=30)),
+        PollGroup(GROUP_STATUS, timedelta(seconds=10), timedelta(minutes=2)),
+        PollGroup(GROUP_TEMPERATURES, timedelta(seconds=15), timedelta(minutes=2)),
+        PollGroup(GROUP_ENERGY, timedelta(minutes=1), timedelta(minutes=15)),
+        PollGroup(GROUP_SETTINGS, timedelta(minutes=2), timedelta(hours=1)),
+    )
+}
+
+
+class _GroupState:
+    """Adaptive schedule of one poll group."""
+
+    def __init__(self, group: PollGroup, addrs: frozenset[RegisterAddress]):
+        self.group = group
+        self.addrs = addrs
+        low = group.min_interval.total_seconds()
+        high = group.max_interval.total_seconds()
+        self.interval = min(max(DEFAULT_POLL_INTERVAL.total_seconds(), low), high)
+        # Share of recent polls that saw a change, starts neutral
+        self.change_rate = 0.5
+        self.due = 0.0
+        self.polled = False
+
+    def adapt(self, changed: bool) -> None:
+        """Move the interval towards the lower bound for volatile groups and the upper bound for quiet ones."""
+        if not self.polled:
+            # The first poll reports every value, which says nothing about volatility
+            self.polled = True
+            return
+
+        self.change_rate += CHANGE_RATE_WEIGHT * (changed - self.change_rate)
+        low = self.group.min_interval.total_seconds()
+        high = self.group.max_interval.total_seconds()
+        self.interval = high - (high - low) * self.change_rate
+
+
+def _deadbands() -> dict[str, float]:
+    return {spec.key: spec.deadband for spec in REGISTER_SPECS.values()}
+
+
+def diff_snapshot(
+    previous: Mapping[str, Value],
+    current: Mapping[str, Value],
+    deadbands: Mapping[str, float],
+) -> dict[str, Value]:
+    """Return the values of current that differ from previous by more than their deadband."""
+    changes = {}
+    for key, value in current.items():
+        if key not in previous:
+            changes[key] = value
+            continue
+
+        old = previous[key]
+        deadband = deadbands.get(key, 0.0)
+        if deadband and not isinstance(value, bool):
+            if abs(value - old) > deadband:
+                changes[key] = value
+        elif value != old:
+            changes[key] = value
+
+    return changes
+
+
+class RegisterPoller:
+    """Polls registers in groups and announces only the values that changed.
+
+    Each poll group runs on its own interval that adapts to how often its values
+    actually change, within the bounds of its PollGroup.
+
+    Changes are sent on the SIGNAL_REGISTERS_UPDATED dispatcher signal for entities
+    and fired as one EVENT_REGISTERS_CHANGED event per poll for automations. The
+    snapshot after every poll is sampled into the optional history and appended to
+    the optional on-disk store.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: MqttClient,
+        addrs: Iterable[RegisterAddress] | None = None,
+        groups: Mapping[str, PollGroup] = POLL_GROUPS,
+        history: SnapshotHistory | None = None,
+        store: HistoryStore | None = None,
+    ):
+        self.hass = hass
+        self.client = client
+        self.history = history
+        self.store = store
+        self.addrs = None if addrs is None else frozenset(addrs)
+        # Last reported value of every register, the baseline deadbands are measured against
+        self.snapshot: dict[str, Value] = {}
+        self._deadbands = _deadbands()
+        self._key_groups = {spec.key: spec.group for spec in REGISTER_SPECS.values()}
+        self._groups: dict[str, _GroupState] = {}
+        for name, group in groups.items():
+            group_addrs = frozenset(
+                addr
+                for addr, spec in REGISTER_SPECS.items()
+                if spec.group == name and (self.addrs is None or addr in self.addrs)
+            )
+            if group_addrs:
+                self._groups[name] = _GroupState(group, group_addrs)
+        self._unsub: CALLBACK_TYPE | None = None
+        self._polling = False
+        self._running = False
+        # Cleared while a scheduled poll runs
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def group_intervals(self) -> dict[str, float]:
+        """Current poll interval of every group in seconds."""
+        return {name: state.interval for name, state in self._groups.items()}
+
+    async def async_poll(self, groups: Iterable[str] | None = None) -> dict[str, Value]:
+        """Read the registers of the given groups, all by default, once and publish the changes.
+        :return: the changed values
+        """
+        if groups is None:
+            addrs = self.addrs
+            states = list(self._groups.values())
+        else:
+            states = [self._groups[name] for name in groups]
+            addrs = frozenset().union(*(state.addrs for state in states))
+
+        values = await self.client.read_registers(addrs)
+        changes = diff_snapshot(self.snapshot, values, self._deadbands)
+
+        changed_groups = {self._key_groups.get(key.split(".")[0]) for key in changes}
+        for state in states:
+            state.adapt(state.group.name in changed_groups)
+
+        self.snapshot.update(changes)
+        if self.history is not None:
+            self.history.append(self.snapshot)
+        if self.store is not None:
+            await self.hass.async_add_executor_job(self.store.append, dict(self.snapshot))
+
+        if not changes:
+            return changes
+
+        _LOGGER.debug("%d of %d registers changed", len(changes), len(values))
+        async_dispatcher_send(self.hass, SIGNAL_REGISTERS_UPDATED, changes)
+        self.hass.bus.async_fire(EVENT_REGISTERS_CHANGED, {"changes": changes})
+        return changes
+
+    async def _async_tick(self, _now=None) -> None:
+        self._unsub = None
+        if self._polling:
+            _LOGGER.debug("Previous poll still running, skipping")
+            return
+
+        now = time.monotonic()
+        due = [name for name, state in self._groups.items() if state.due <= now]
+        self._polling = True
+        self._idle.clear()
+        try:
+            if due:
+                await self.async_poll(due)
+        except Exception:
+            _LOGGER.exception("Polling heat pump registers failed")
+        finally:
+            self._polling = False
+            self._idle.set()
+
+        # Failed groups are retried on their regular interval rather than hammering the bus
+        now = time.monotonic()
+        for name in due:
+            state = self._groups[name]
+            state.due = now + state.interval
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if not self._running or not self._groups:
+            return
+
+        delay = min(state.due for state in self._groups.values()) - time.monotonic()
+        self._unsub = async_call_later(self.hass, max(delay, 0.0), self._async_tick)
+
+    def async_start(self) -> None:
+        """Start polling, every group is read right away."""
+        if not self._running and self._groups:
+            self._running = True
+            self.hass.async_create_task(self._async_tick())
+
+    def async_stop(self) -> None:
+        """Stop polling."""
+        self._running = False
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and wait for a poll in progress, after which the bus and store are unused."""
+        self.async_stop()
+        await self._idle.wait()
@@ -0,0 +1,340 @@
+"""Sensor entities for the Kronoterm heat pump registers."""
+
+from __future__ import annotations
+
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfTemperature, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .cloud_coordinator import KronotermCloudCoordinator
+from .const import DOMAIN, SIGNAL_REGISTERS_UPDATED
+from .energy_analytics import EnergyAnalytics
+from .entity import KronotermCloudEntity, KronotermHeatPumpEntity
+from .kronoterm_enums import HeatPumpOperatingMode, WorkingFunction
+from .modbus_metrics import ModbusMetrics
+from .register_decoder import REGISTER_SPECS, RegisterSpec
+
+if TYPE_CHECKING:
+    from .models import DomainDataItem
+
+_DEVICE_CLASSES: dict[str, tuple[SensorDeviceClass, SensorStateClass]] = {
+    "°C": (SensorDeviceClass.TEMPERATURE, SensorStateClass.MEASUREMENT),
+    "W": (SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
+    "kWh": (SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING),
+    "m³": (SensorDeviceClass.WATER, SensorStateClass.TOTAL_INCREASING),
+    "bar": (SensorDeviceClass.PRESSURE, SensorStateClass.MEASUREMENT),
+}
+
+BUS_METRIC_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="requests_per_second",
+        name="Bus requests per second",
+        native_unit_of_measurement="req/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    SensorEntityDescription(
+        key="registers_per_request",
+        name="Bus registers per request",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    SensorEntityDescription(
+        key="latency_p50_ms",
+        name="Bus latency p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="latency_p95_ms",
+        name="Bus latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="timeouts",
+        name="Bus timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="exception_responses",
+        name="Bus exception responses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="errors",
+        name="Bus errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="reconnects",
+        name="Bus reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="queue_depth",
+        name="Bus queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+ENERGY_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="electric_today",
+        name="Electric energy today",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="heat_today",
+        name="Heat energy today",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="cop_today",
+        name="COP today",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+    ),
+    # Rolling seven day sums rise and fall, so they have no state class
+    SensorEntityDescription(
+        key="electric_week",
+        name="Electric energy last 7 days",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+    ),
+    SensorEntityDescription(
+        key="heat_week",
+        name="Heat energy last 7 days",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+    ),
+    SensorEntityDescription(
+        key="cop_week",
+        name="COP last 7 days",
+        suggested_display_precision=2,
+    ),
+)
+
+
+def _cloud_temperature(key: str, name: str) -> SensorEntityDescription:
+    return SensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+    )
+
+
+# Keys are the CloudState fields the sensors report
+CLOUD_SENSORS: tuple[SensorEntityDescription, ...] = (
+    _cloud_temperature("outside_temperature", "Cloud outside temperature"),
+    _cloud_temperature("room_temperature", "Cloud room temperature"),
+    _cloud_temperature("reservoir_temperature", "Cloud reservoir temperature"),
+    _cloud_temperature("sanitary_water_temperature", "Cloud sanitary water temperature"),
+    _cloud_temperature("outlet_temperature", "Cloud outlet temperature"),
+    SensorEntityDescription(
+        key="working_function",
+        name="Cloud working function",
+        device_class=SensorDeviceClass.ENUM,
+        options=[function.name.lower() for function in WorkingFunction],
+    ),
+    SensorEntityDescription(
+        key="operating_mode",
+        name="Cloud operating mode",
+        device_class=SensorDeviceClass.ENUM,
+        options=[mode.name.lower() for mode in HeatPumpOperatingMode],
+    ),
+    SensorEntityDescription(
+        key="active_errors_count",
+        name="Cloud active alarms",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up heat pump register sensors."""
+    item: DomainDataItem = hass.data[DOMAIN][config_entry.entry_id]
+
+    # Setup is only forwarded for the custom agent
+    assert item.poller is not None
+
+    async_add_entities(
+        KronotermRegisterSensor(config_entry, spec) for spec in REGISTER_SPECS.values()
+    )
+
+    assert item.client is not None
+    metrics = item.client.transport.metrics
+    async_add_entities(
+        KronotermBusMetricSensor(config_entry, metrics, description)
+        for description in BUS_METRIC_SENSORS
+    )
+
+    if item.client.analytics is not None:
+        async_add_entities(
+            KronotermEnergySensor(config_entry, item.client.analytics, description)
+            for description in ENERGY_SENSORS
+        )
+
+    if item.coordinator is not None:
+        async_add_entities(
+            KronotermCloudSensor(item.coordinator, config_entry, description)
+            for description in CLOUD_SENSORS
+        )
+
+
+class KronotermRegisterSensor(KronotermHeatPumpEntity, SensorEntity):
+    """Decoded value of one heat pump register, updated only when the poller reports a change."""
+
+    def __init__(self, config_entry: ConfigEntry, spec: RegisterSpec) -> None:
+        """Initialize entity."""
+        super().__init__(config_entry, spec.key.lower())
+        self._spec = spec
+        self._key = spec.key
+        self._attr_name = spec.key.replace("_", " ").capitalize()
+        self._attr_native_unit_of_measurement = spec.unit
+        if spec.options:
+            self._attr_device_class = SensorDeviceClass.ENUM
+            self._attr_options = [label for _, label in spec.options]
+        elif spec.unit in _DEVICE_CLASSES:
+            self._attr_device_class, self._attr_state_class = _DEVICE_CLASSES[spec.unit]
+        elif spec.unit is not None:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+        # Readings, named states and energy counters are useful by default, raw status words are diagnostics
+        self._attr_entity_registry_enabled_default = spec.unit is not None or bool(spec.options)
+        if not self._attr_entity_registry_enabled_default:
+            self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def _native(self, value: Any) -> Any:
+        """Name of an enumerated value, the decoded value otherwise."""
+        if self._spec.options:
+            return self._spec.option(int(value))
+        return value
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity about to be added to hass."""
+        await super().async_added_to_hass()
+
+        item: DomainDataItem = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        if item.poller is not None and self._key in item.poller.snapshot:
+            self._attr_native_value = self._native(item.poller.snapshot[self._key])
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_REGISTERS_UPDATED, self._registers_updated
+            )
+        )
+
+    @callback
+    def _registers_updated(self, changes: dict[str, Any]) -> None:
+        """Call when the poller reports changed registers."""
+        if self._key not in changes:
+            return
+
+        self._attr_native_value = self._native(changes[self._key])
+        self.async_write_ha_state()
+
+
+class KronotermBusMetricSensor(KronotermHeatPumpEntity, SensorEntity):
+    """Health or throughput metric of the Modbus bus the heat pump is reached through."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Metrics change with every transaction, sampling them on the scan interval is enough
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        metrics: ModbusMetrics,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize entity."""
+        super().__init__(config_entry, f"bus-{description.key}")
+        self.entity_description = description
+        self._metrics = metrics
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current metric value."""
+        return self._metrics.as_dict()[self.entity_description.key]
+
+
+class KronotermEnergySensor(KronotermHeatPumpEntity, SensorEntity):
+    """Energy or effective COP of today or the last seven days, computed from the history."""
+
+    # The analytics cache their result, polling every sensor costs one computation per minute
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        analytics: EnergyAnalytics,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize entity."""
+        super().__init__(config_entry, f"energy-{description.key}")
+        self.entity_description = description
+        self._analytics = analytics
+
+    async def async_update(self) -> None:
+        """Recompute the value from the history."""
+        value, period = self.entity_description.key.split("_")
+        if period == "week":
+            energy = await self._analytics.async_week()
+        else:
+            energy = await self._analytics.async_today()
+
+        if energy is None:
+            self._attr_native_value = None
+        elif value == "cop":
+            self._attr_native_value = None if energy.cop is None else round(energy.cop, 2)
+        else:
+            self._attr_native_value = round(getattr(energy, value), 1)
+
+
+class KronotermCloudSensor(KronotermCloudEntity, SensorEntity):
+    """One value of the state the cloud coordinator polled last."""
+
+    def __init__(
+        self,
+        coordinator: KronotermCloudCoordinator,
+        config_entry: ConfigEntry,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize entity."""
+        super().__init__(coordinator, config_entry, description.key)
+        self.entity_description = description
+
+    @property
+    def native_value(self) -> float | int | str | None:
+        """Return the value from the last cloud state."""
+        if self.coordinator.data is None:
+            return None
+
+        value = getattr(self.coordinator.data, self.entity_description.key)
+        if isinstance(value, Enum):
+            return value.name.lower()
+        return value
@@ -0,0 +1,93 @@
+"""Services of the custom Kronoterm agent."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN
+from .kronoterm_models import RegisterAddress
+from .register_decoder import REGISTER_SPECS, RegisterSpec
+
+if TYPE_CHECKING:
+    from .models import DomainDataItem
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_WRITE_REGISTERS = "write_registers"
+
+ATTR_REGISTERS = "registers"
+ATTR_HEAT_PUMP = "heat_pump"
+
+
+
+def _raw_value(spec: RegisterSpec) -> vol.All:
+    """Validator of the raw word written to a register, the values the voice commands may set."""
+    if spec.options:
+        return vol.All(vol.Coerce(int), vol.In([raw for raw, _ in spec.options]))
+    if spec.minimum is not None and spec.maximum is not None:
+        return vol.All(
+            vol.Coerce(int),
+            vol.Range(min=round(spec.minimum / spec.scale), max=round(spec.maximum / spec.scale)),
+        )
+    return vol.All(vol.Coerce(int), vol.Range(min=-32768, max=65535))
+
+
+WRITE_REGISTERS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_REGISTERS): vol.All(
+            {
+                vol.Optional(addr.name): _raw_value(spec)
+                for addr, spec in REGISTER_SPECS.items()
+                if spec.writable
+            },
+            vol.Length(min=1),
+        ),
+        vol.Optional(ATTR_HEAT_PUMP, default=1): cv.positive_int,
+    }
+)
+
+
+@callback
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the services."""
+
+    async def async_write_registers(call: ServiceCall) -> ServiceResponse:
+        """Write raw register values in one transaction and return the values read back."""
+        entry_items: dict[str, DomainDataItem] = hass.data.get(DOMAIN, {})
+        buses = next(
+            (item.buses for item in entry_items.values() if item.buses is not None),
+            None,
+        )
+        if buses is None:
+            raise ServiceValidationError("The Kronoterm conversation agent is not set up")
+
+        client = buses.client(call.data[ATTR_HEAT_PUMP])
+        writes = [
+            (RegisterAddress[name], value)
+            for name, value in call.data[ATTR_REGISTERS].items()
+        ]
+        _LOGGER.debug("Writing %d registers: %s", len(writes), writes)
+        actual = await client.write_many(writes, "Service write")
+
+        return {ATTR_REGISTERS: {addr.name: value for addr, value in actual.items()}}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_WRITE_REGISTERS,
+        async_write_registers,
+        schema=WRITE_REGISTERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
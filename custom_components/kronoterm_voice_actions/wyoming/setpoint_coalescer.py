@@ -0,0 +1,127 @@
+"""Debounced setpoint writes, a burst of changes to one setpoint is written once with its last value."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+
+log = logging.getLogger(__name__)
+
+# Quiet time after the last change before a setpoint is written
+SETPOINT_WINDOW = 3.0
+# Longest a setpoint that keeps changing waits for its write
+SETPOINT_MAX_DELAY = 10.0
+
+Write = Callable[[float], Awaitable[str]]
+# Called with the setpoint, the value written, the answer of the write or its error,
+# and the origin of the last change, e.g. the device the user spoke to
+Confirm = Callable[[Hashable, float, str | None, Exception | None, Hashable | None], None]
+
+
+class _Pending:
+    """The latest value of a setpoint waiting for its write."""
+
+    def __init__(self, value: float, write: Write, deadline: float, origin: Hashable | None):
+        self.value = value
+        self.write = write
+        self.deadline = deadline
+        self.origin = origin
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class SetpointCoalescer:
+    """Collapses bursts of writes to the same setpoint into one write of the final value.
+
+    Every submit replaces the pending value and restarts the quiet window, so a user
+    correcting or stepping a setpoint causes a single write. The caller is answered
+    right away; the outcome of the write is reported through the confirm callback.
+    A change while the setpoint is not busy is written at once with write_now instead.
+    Writes of one setpoint never overlap, a later burst waits for the earlier write.
+    """
+
+    def __init__(
+        self,
+        confirm: Confirm | None = None,
+        window: float = SETPOINT_WINDOW,
+        max_delay: float = SETPOINT_MAX_DELAY,
+    ):
+        self.confirm = confirm
+        self.window = window
+        self.max_delay = max_delay
+        self._pending: dict[Hashable, _Pending] = {}
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        # When the last write of every setpoint finished
+        self._written: dict[Hashable, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> dict[Hashable, float]:
+        """Values still waiting for their write by setpoint."""
+        return {key: pending.value for key, pending in self._pending.items()}
+
+    def busy(self, key: Hashable) -> bool:
+        """Whether a write of the setpoint is waiting, running or finished within the window."""
+        lock = self._locks.get(key)
+        written = self._written.get(key)
+        return (
+            key in self._pending
+            or (lock is not None and lock.locked())
+            or (written is not None and time.monotonic() - written < self.window)
+        )
+
+    async def write_now(self, key: Hashable, value: float, write: Write) -> str:
+        """Write a setpoint that is not busy right away and return the answer of the write.
+
+        Changes submitted meanwhile are queued behind it as a burst.
+        """
+        return await self._run(key, value, write)
+
+    def submit(self, key: Hashable, value: float, write: Write, origin: Hashable | None = None) -> None:
+        """Queue a value for a setpoint, replacing any value still waiting."""
+        now = time.monotonic()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending(value, write, now + self.max_delay, origin)
+        else:
+            log.debug(f"Coalescing setpoint {key}: {pending.value} -> {value}")
+            pending.value = value
+            pending.write = write
+            pending.origin = origin
+            pending.timer.cancel()
+
+        delay = max(min(self.window, pending.deadline - now), 0.0)
+        pending.timer = asyncio.get_running_loop().call_later(delay, self._start, key)
+
+    def _start(self, key: Hashable) -> None:
+        pending = self._pending.pop(key)
+        task = asyncio.create_task(self._write(key, pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, value: float, write: Write) -> str:
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            try:
+                return await write(value)
+            finally:
+                self._written[key] = time.monotonic()
+
+    async def _write(self, key: Hashable, pending: _Pending) -> None:
+        try:
+            answer = await self._run(key, pending.value, pending.write)
+        except Exception as e:
+            log.warning(f"Writing setpoint {key} = {pending.value} failed: {e}")
+            answer, error = None, e
+        else:
+            log.debug(f"Setpoint {key} = {pending.value} written")
+            error = None
+
+        if self.confirm is not None:
+            self.confirm(key, pending.value, answer, error, pending.origin)
+
+    async def flush(self) -> None:
+        """Write every waiting setpoint now and wait for all writes to land."""
+        for key, pending in list(self._pending.items()):
+            pending.timer.cancel()
+            self._start(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
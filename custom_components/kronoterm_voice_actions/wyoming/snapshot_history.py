@@ -0,0 +1,119 @@
+"""Fixed-size in-memory history of register snapshots."""
+
+import time
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import timedelta
+
+import numpy as np
+
+from .register_decoder import REGISTER_SPECS
+
+# 24 hours of snapshots taken every 30 seconds
+DEFAULT_HISTORY_INTERVAL = timedelta(seconds=30)
+DEFAULT_HISTORY_CAPACITY = 2880
+
+
+def history_keys() -> list[str]:
+    """Every value key a snapshot can contain, bit fields included."""
+    keys = []
+    for spec in REGISTER_SPECS.values():
+        keys.append(spec.key)
+        keys.extend(spec.bit_key(field) for field, _ in spec.bits)
+    return keys
+
+
+class SnapshotHistory:
+    """Ring buffer of snapshots, one row per sample and one column per value key.
+
+    Rows are overwritten oldest first once the buffer is full. Missing values are NaN,
+    so aggregates over a window only see values that were known at the time.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] | None = None,
+        capacity: int = DEFAULT_HISTORY_CAPACITY,
+        interval: timedelta = DEFAULT_HISTORY_INTERVAL,
+    ):
+        self.keys = list(history_keys() if keys is None else keys)
+        self.capacity = capacity
+        self.interval = interval.total_seconds()
+        self._columns = {key: index for index, key in enumerate(self.keys)}
+        self._times = np.full(capacity, np.nan)
+        self._values = np.full((capacity, len(self.keys)), np.nan)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, snapshot: Mapping[str, float | int | bool], timestamp: float | None = None) -> bool:
+        """Store a snapshot unless the last one is more recent than the sample interval.
+        :return: whether the snapshot was stored
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._size:
+            last = self._times[(self._next - 1) % self.capacity]
+            if timestamp - last < self.interval:
+                return False
+
+        row = np.full(len(self.keys), np.nan)
+        for key, value in snapshot.items():
+            column = self._columns.get(key)
+            if column is not None:
+                row[column] = value
+
+        self._times[self._next] = timestamp
+        self._values[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return True
+
+    @property
+    def oldest(self) -> float | None:
+        """Timestamp of the oldest stored snapshot, None while empty."""
+        if not self._size:
+            return None
+        return float(self._times[(self._next - self._size) % self.capacity])
+
+    def series(
+        self, keys: Sequence[str], since: float, until: float | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Snapshots sampled in [since, until] in time order, the same shape as HistoryStore.scan.
+        :return: timestamps and a matrix with one column per requested key, NaN where unknown
+        """
+        mask = self._times >= since
+        if until is not None:
+            mask &= self._times <= until
+        order = np.argsort(self._times[mask])
+        values = np.full((int(mask.sum()), len(keys)), np.nan)
+        for index, key in enumerate(keys):
+            column = self._columns.get(key)
+            if column is not None:
+                values[:, index] = self._values[mask, column][order]
+        return self._times[mask][order], values
+
+    def window(self, key: str, since: float, until: float | None = None) -> np.ndarray:
+        """Known values of key sampled in [since, until], in no particular order."""
+        column = self._columns[key]
+        mask = self._times >= since
+        if until is not None:
+            mask &= self._times <= until
+        values = self._values[mask, column]
+        return values[~np.isnan(values)]
+
+    def aggregate(self, key: str, since: float, until: float | None = None) -> dict[str, float] | None:
+        """Mean, extremes and percentiles of key over a window, None if nothing was sampled."""
+        values = self.window(key, since, until)
+        if not values.size:
+            return None
+
+        p50, p95 = np.percentile(values, [50, 95])
+        return {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "p50": float(p50),
+            "p95": float(p95),
+        }
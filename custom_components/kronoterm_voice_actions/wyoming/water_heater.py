@@ -0,0 +1,97 @@
+"""Water heater entity for the tap water, backed by the cloud coordinator."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.water_heater import (
+    WaterHeaterEntity,
+    WaterHeaterEntityFeature,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .cloud_coordinator import KronotermCloudCoordinator
+from .const import DOMAIN
+from .entity import KronotermCloudEntity
+from .kronoterm_enums import HeatingLoop, HeatingLoopMode
+
+if TYPE_CHECKING:
+    from .models import DomainDataItem
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up the tap water heater entity."""
+    item: DomainDataItem = hass.data[DOMAIN][config_entry.entry_id]
+
+    # The tap water settings are only reachable through the cloud
+    if item.coordinator is None:
+        return
+
+    async_add_entities([KronotermTapWaterHeater(item.coordinator, config_entry)])
+
+
+class KronotermTapWaterHeater(KronotermCloudEntity, WaterHeaterEntity):
+    """Sanitary water temperature, target temperature and mode."""
+
+    _attr_name = "Tap water"
+    # Operation modes are the loop modes, off, on and auto
+    _attr_operation_list = [mode.name.lower() for mode in HeatingLoopMode]
+    _attr_supported_features = (
+        WaterHeaterEntityFeature.TARGET_TEMPERATURE
+        | WaterHeaterEntityFeature.OPERATION_MODE
+    )
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+
+    def __init__(
+        self,
+        coordinator: KronotermCloudCoordinator,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialize entity."""
+        super().__init__(coordinator, config_entry, "water-heater")
+
+    @property
+    def current_temperature(self) -> float | None:
+        """Return the sanitary water temperature."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.sanitary_water_temperature
+
+    @property
+    def target_temperature(self) -> float | None:
+        """Return the target sanitary water temperature."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.loops[HeatingLoop.TAP_WATER].target_temperature
+
+    @property
+    def current_operation(self) -> str | None:
+        """Return the tap water mode."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.loops[HeatingLoop.TAP_WATER].mode.name.lower()
+
+    async def async_set_temperature(self, **kwargs: Any) -> None:
+        """Set a new target temperature."""
+        if (temperature := kwargs.get(ATTR_TEMPERATURE)) is not None:
+            if not await self.coordinator.async_set_target_temperature(
+                HeatingLoop.TAP_WATER, temperature
+            ):
+                raise HomeAssistantError(
+                    f"Kronoterm cloud refused tap water temperature {temperature}"
+                )
+
+    async def async_set_operation_mode(self, operation_mode: str) -> None:
+        """Set a new mode."""
+        if not await self.coordinator.async_set_loop_mode(
+            HeatingLoop.TAP_WATER, HeatingLoopMode[operation_mode.upper()]
+        ):
+            raise HomeAssistantError(f"Kronoterm cloud refused tap water mode {operation_mode}")
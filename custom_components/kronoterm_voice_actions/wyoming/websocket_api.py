@@ -1,14 +1,19 @@
 """Wyoming Websocket API."""
 
+import asyncio
 import logging
 from typing import Any
 
 import voluptuous as vol
+from aiohttp import ClientError
 
 from homeassistant.components import websocket_api
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
 
 from .const import DOMAIN
+from .error import CloudAuthError
+from .kronoterm_enums import ConsumptionPeriod
 from .models import DomainDataItem
 
 _LOGGER = logging.getLogger(__name__)
@@ -18,6 +23,8 @@ _LOGGER = logging.getLogger(__name__)
 def async_register_websocket_api(hass: HomeAssistant) -> None:
     """Register the websocket API."""
     websocket_api.async_register_command(hass, websocket_info)
+    websocket_api.async_register_command(hass, websocket_modbus_metrics)
+    websocket_api.async_register_command(hass, websocket_consumption)
 
 
 @callback
@@ -37,6 +44,74 @@ def websocket_info(
             "info": {
                 entry_id: item.service.info.to_dict()
                 for entry_id, item in entry_items.items()
+                if item.service is not None
             }
         },
     )
+
+
+@callback
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "wyoming/modbus_metrics"})
+def websocket_modbus_metrics(
+    hass: HomeAssistant,
+    connection: websocket_api.connection.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """List Modbus metrics of every bus for all Kronoterm agent config entries."""
+    entry_items: dict[str, DomainDataItem] = hass.data.get(DOMAIN, {})
+
+    connection.send_result(
+        msg["id"],
+        {
+            "metrics": {
+                entry_id: [
+                    {"heat_pumps": numbers, **transport.metrics.as_dict()}
+                    for transport, numbers in item.buses.buses.items()
+                ]
+                for entry_id, item in entry_items.items()
+                if item.buses is not None
+            }
+        },
+    )
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "wyoming/consumption",
+        vol.Required("entry_id"): str,
+        vol.Required("period"): vol.In([period.value for period in ConsumptionPeriod]),
+        vol.Required("since"): cv.date,
+        vol.Optional("until"): cv.date,
+    }
+)
+@websocket_api.async_response
+async def websocket_consumption(
+    hass: HomeAssistant,
+    connection: websocket_api.connection.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Theoretical use series of a Kronoterm agent config entry, finished periods from the disk cache."""
+    item: DomainDataItem | None = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+    if item is None or item.consumption is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "No Kronoterm cloud account for this entry"
+        )
+        return
+
+    try:
+        series = await item.consumption.async_series(
+            ConsumptionPeriod(msg["period"]), msg["since"], msg.get("until")
+        )
+    except ValueError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(err))
+        return
+    except (CloudAuthError, ClientError, asyncio.TimeoutError) as err:
+        _LOGGER.warning("Could not read the theoretical use from the Kronoterm cloud: %s", err)
+        connection.send_error(
+            msg["id"], websocket_api.ERR_HOME_ASSISTANT_ERROR, f"Kronoterm cloud unavailable: {err}"
+        )
+        return
+
+    connection.send_result(msg["id"], {"series": [entry.as_dict() for entry in series]})